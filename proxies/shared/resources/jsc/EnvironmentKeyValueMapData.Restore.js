@@ -0,0 +1,5 @@
+const environmentKeyValueMapData = JSON.parse(context.getVariable("private.environmentKeyValueMapData"));
+
+Object.keys(environmentKeyValueMapData).forEach((name) => {
+    context.setVariable(name, environmentKeyValueMapData[name]);
+});
@@ -0,0 +1,9 @@
+/*
+The variables set by the GetEnvironmentKeyValueMapData shared flow that this proxy reads.
+The cached data only contains these, so any new variable read from the key value map must be added here.
+*/
+const environmentKeyValueMapData = {
+    "private.common.status-endpoint-api-key": context.getVariable("private.common.status-endpoint-api-key")
+};
+
+context.setVariable("private.environmentKeyValueMapData", JSON.stringify(environmentKeyValueMapData));
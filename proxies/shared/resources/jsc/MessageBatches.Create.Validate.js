@@ -2,6 +2,9 @@
  * This script validates the data in the body of a POST request to the /v1/message-batches endpoint, returning an
  * array of up to 100 error responses to be returned by Apigee as a 400 error response.
  *
+ * When the body is valid it also publishes the variables the rest of the flow needs, data.payload and
+ * data.messageBatchReference, so the body is only parsed once.
+ *
  * It is called by the JavaScript.MessageBatches.Create.Validate policy.
  */
 
@@ -42,12 +45,12 @@ const validate = () => {
         const validArray = validateArray(errors, data.attributes.messages, "/data/attributes/messages", 1)
         if (validArray) {
           // $.data.attributes.messages.x
-          data.attributes.messages.forEach((message, index) => {
+          data.attributes.messages.some((message, index) => {
             var pointer = "/data/attributes/messages/" + index;
-            // Limit the amount of errors returned to 100 entries
+            // Limit the amount of errors returned to 100 entries, the rest of the messages don't need checking
             if (errors.length >= 100) {
               errors = errors.slice(0, 100);
-              return null;
+              return true;
             }
 
             if (isUndefined(message)) {
@@ -109,4 +112,6 @@ if (errors.length > 0) {
   context.setVariable("errors", JSON.stringify(errors));
 } else {
   context.setVariable("errors", null);
+  context.setVariable("data.payload", content);
+  context.setVariable("data.messageBatchReference", all.data.attributes.messageBatchReference);
 }
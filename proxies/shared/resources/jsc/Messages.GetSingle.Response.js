@@ -0,0 +1,23 @@
+const content = context.getVariable("response.content")
+const ifNoneMatch = context.getVariable("data.ifNoneMatch")
+
+const sha256 = crypto.getSHA256();
+sha256.update(content);
+const etag = '"' + sha256.digest() + '"';
+
+var notModified = false;
+
+if (ifNoneMatch) {
+    notModified = ifNoneMatch.split(",").some(function (tag) {
+        const trimmed = tag.trim().replace(/^W\//, "");
+        return trimmed === "*" || trimmed === etag;
+    });
+}
+
+context.setVariable("messageETag", etag);
+
+if (notModified) {
+    context.setVariable("response.status.code", 304);
+    context.setVariable("response.reason.phrase", "Not Modified");
+    context.setVariable("response.content", "");
+}
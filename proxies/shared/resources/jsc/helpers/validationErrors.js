@@ -1,11 +1,63 @@
-function createErrorObject(code, title, detail, pointer, links) {
+// The parts of each error that don't depend on where it happened, built once and shared by every error with that code
+function errorTemplate(code, title, detail, links) {
+    return Object.freeze({
+        "code": code,
+        "links": Object.freeze(Object.assign({ "about": "https://digital.nhs.uk/developer/api-catalogue/nhs-notify" }, links)),  // NOSONAR
+        "title": title,
+        "detail": detail
+    });
+}
+
+const missingErrorTemplate = errorTemplate(
+    "CM_MISSING_VALUE",
+    "Missing property",
+    "The property at the specified location is required, but was not present in the request.",
+    {}
+);
+
+const nullErrorTemplate = errorTemplate(
+    "CM_NULL_VALUE",
+    "Property cannot be null",
+    "The property at the specified location is required, but a null value was passed in the request.",
+    {}
+);
+
+const invalidErrorTemplate = errorTemplate(
+    "CM_INVALID_VALUE",
+    "Invalid value",
+    "The property at the specified location does not allow this value.",
+    {}
+);
+
+const duplicateErrorTemplate = errorTemplate(
+    "CM_DUPLICATE_VALUE",
+    "Duplicate value",
+    "The property at the specified location is a duplicate, duplicated values are not allowed.",
+    {}
+);
+
+const tooFewItemsErrorTemplate = errorTemplate(
+    "CM_TOO_FEW_ITEMS",
+    "Too few items",
+    "The property at the specified location contains too few items.",
+    {}
+);
+
+const invalidNhsNumberErrorTemplate = errorTemplate(
+    "CM_INVALID_NHS_NUMBER",
+    "Invalid nhs number",
+    "The value provided in this nhsNumber field is not a valid NHS number.",
+    { "nhsNumbers": "https://www.datadictionary.nhs.uk/attributes/nhs_number.html" }
+);
+
+function createErrorObject(template, pointer) {
     return {
         "id": messageId + "." + errors.length,
-        "code": code,
-        "links": Object.assign({}, { "about": "https://digital.nhs.uk/developer/api-catalogue/nhs-notify" }, links),  // NOSONAR
+        "code": template.code,
+        "links": template.links,
         "status": "400",
-        "title": title,
-        "detail": detail,
+        "title": template.title,
+        "detail": template.detail,
         "source": {
             "pointer": pointer
         }
@@ -13,62 +65,25 @@ function createErrorObject(code, title, detail, pointer, links) {
 }
 
 function missingError(pointer) {
-    return createErrorObject(
-        "CM_MISSING_VALUE",
-        "Missing property",
-        "The property at the specified location is required, but was not present in the request.",
-        pointer,
-        {}
-    );
+    return createErrorObject(missingErrorTemplate, pointer);
 }
 
 function nullError(pointer) {
-    return createErrorObject(
-        "CM_NULL_VALUE",
-        "Property cannot be null",
-        "The property at the specified location is required, but a null value was passed in the request.",
-        pointer,
-        {}
-    );
+    return createErrorObject(nullErrorTemplate, pointer);
 }
 
 function invalidError(pointer) {
-    return createErrorObject(
-        "CM_INVALID_VALUE",
-        "Invalid value",
-        "The property at the specified location does not allow this value.",
-        pointer,
-        {}
-    );
+    return createErrorObject(invalidErrorTemplate, pointer);
 }
 
 function duplicateError(pointer) {
-    return createErrorObject(
-        "CM_DUPLICATE_VALUE",
-        "Duplicate value",
-        "The property at the specified location is a duplicate, duplicated values are not allowed.",
-        pointer,
-        {}
-    );
+    return createErrorObject(duplicateErrorTemplate, pointer);
 }
 
 function tooFewItemsError(pointer) {
-    return createErrorObject(
-        "CM_TOO_FEW_ITEMS",
-        "Too few items",
-        "The property at the specified location contains too few items.",
-        pointer,
-        {}
-    )
+    return createErrorObject(tooFewItemsErrorTemplate, pointer);
 }
 
 function invalidNhsNumberError(pointer) {
-    return createErrorObject(
-        "CM_INVALID_NHS_NUMBER",
-        "Invalid nhs number",
-        "The value provided in this nhsNumber field is not a valid NHS number.",
-        pointer,
-        { "nhsNumbers": "https://www.datadictionary.nhs.uk/attributes/nhs_number.html" }
-    );
+    return createErrorObject(invalidNhsNumberErrorTemplate, pointer);
 }
-
@@ -0,0 +1,87 @@
+const fs = require("fs");
+const uuid = require("uuid");
+
+// Run from this directory: node Performance_MessageBatches.Create.Flow.js
+
+const validateScript = [
+    fs.readFileSync("../../shared/resources/jsc/helpers/validationChecks.js").toString("utf8"),
+    fs.readFileSync("../../shared/resources/jsc/helpers/validationErrors.js").toString("utf8"),
+    fs.readFileSync("../../shared/resources/jsc/MessageBatches.Create.Validate.js").toString("utf8")
+].join("\n");
+
+// The JavaScript.MessageBatches.Create.Request step that used to follow validation, parsing the body a second time
+const previousRequestScript = `
+const content = context.getVariable("request.content")
+const data = JSON.parse(content).data
+var messageBatchReference = null;
+
+if (data && data.attributes) {
+    messageBatchReference = data.attributes.messageBatchReference;
+}
+
+context.setVariable("data.payload", content);
+context.setVariable("data.messageBatchReference", messageBatchReference);
+`;
+
+const generateBigMessage = (size) => {
+    return JSON.stringify({
+      data: {
+        type: "MessageBatch",
+        attributes: {
+          routingPlanId: "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
+          messageBatchReference: "5450539c-3bfd-40bc-9c79-a19040797554",
+          messages: Array.from(Array(size).keys()).map(() => {
+            return {
+              messageReference: uuid.v4(),
+              recipient: { nhsNumber: "9990548609" },
+              personalisation: {}
+            }
+          })
+        }
+      }
+    });
+};
+
+// Each step is evaluated in its own scope, as Apigee runs each JavaScript policy separately
+const runFlow = (steps, message) => {
+    const variables = { "request.content": message };
+    const context = {
+        getVariable: (name) => variables[name],
+        setVariable: (name, value) => { variables[name] = value; }
+    };
+    steps.forEach((step) => new Function("context", step)(context));
+    return variables;
+};
+
+const time = (runs, steps, message) => {
+    const times = [];
+    let variables;
+    for (let i = 0; i < runs; i++) {
+        const start = process.hrtime.bigint();
+        variables = runFlow(steps, message);
+        times.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+    times.sort((a, b) => a - b);
+    return { median: times[Math.floor(runs / 2)], variables };
+};
+
+const testFlowPerformance = (runs, size) => {
+    console.log("Generating big message....");
+    const message = generateBigMessage(size);
+    console.log(`${size} messages, ${(message.length / 1024 / 1024).toFixed(1)}MB`);
+
+    const before = time(runs, [validateScript, previousRequestScript], message);
+    const after = time(runs, [validateScript], message);
+
+    ["errors", "data.payload", "data.messageBatchReference"].forEach((name) => {
+        if (before.variables[name] !== after.variables[name]) {
+            throw new Error(`${name} differs: ${before.variables[name]} and ${after.variables[name]}`);
+        }
+    });
+
+    console.log(`validate then request (median of ${runs}): ${before.median.toFixed(1)}ms`);
+    console.log(`validate only (median of ${runs}):         ${after.median.toFixed(1)}ms`);
+    console.log(`saved per request: ${(before.median - after.median).toFixed(1)}ms`);
+};
+
+testFlowPerformance(10, 50000);
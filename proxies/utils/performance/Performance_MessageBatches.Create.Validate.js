@@ -77,6 +77,8 @@ const testValidationPerformance = (runs) => {
         contextMock.expects("getVariable").once().withArgs("messageid").returns("apigee-message-id");
         contextMock.expects("getVariable").once().withArgs("request.content").returns(message);
         contextMock.expects("setVariable").once().withArgs("errors", null);
+        contextMock.expects("setVariable").once().withArgs("data.payload", message);
+        contextMock.expects("setVariable").once().withArgs("data.messageBatchReference", "5450539c-3bfd-40bc-9c79-a19040797554");
 
         console.time("validation");
         // this makes me just as sad as you
@@ -0,0 +1,87 @@
+const fs = require("fs");
+
+// Run from this directory: node Performance_ValidationErrors.js
+
+const validateScript = [
+    fs.readFileSync("../../shared/resources/jsc/helpers/validationErrors.js").toString("utf8"),
+    fs.readFileSync("../../shared/resources/jsc/helpers/validationChecks.js").toString("utf8"),
+    fs.readFileSync("../../shared/resources/jsc/MessageBatches.Create.Validate.js").toString("utf8")
+].join("\n");
+
+// Every field of every message is invalid, so validation stops adding errors at the limit of 100
+const genInvalidMessage = () => {
+    return {
+        messageReference: "not-a-uuid",
+        recipient: { nhsNumber: "1234567890", dateOfBirth: "17/03/1982" },
+        originator: { odsCode: 12 },
+        personalisation: []
+    }
+};
+
+const generateBigMessage = (size, genFunction) => {
+    return JSON.stringify({
+      data: {
+        type: "MessageBatch",
+        attributes: {
+          routingPlanId: "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
+          messageBatchReference: "5450539c-3bfd-40bc-9c79-a19040797554",
+          messages: Array.from(Array(size).keys()).map(genFunction)
+        }
+      }
+    });
+};
+
+const runValidation = (message) => {
+    const variables = { "messageid": "rrt-1234-5678.1", "request.content": message };
+    const context = {
+        getVariable: (name) => variables[name],
+        setVariable: (name, value) => { variables[name] = value; }
+    };
+    new Function("context", validateScript)(context);
+    return variables.errors;
+};
+
+const testErrorLimitPerformance = (runs, size) => {
+    console.log("Generating big message....");
+    const message = generateBigMessage(size, genInvalidMessage);
+    const parse = [];
+    const times = [];
+    for (let i = 0; i < runs; i++) {
+        let start = process.hrtime.bigint();
+        JSON.parse(message);
+        parse.push(Number(process.hrtime.bigint() - start) / 1e6);
+
+        start = process.hrtime.bigint();
+        const errors = runValidation(message);
+        times.push(Number(process.hrtime.bigint() - start) / 1e6);
+
+        if (JSON.parse(errors).length !== 100) {
+            throw new Error("Expected 100 errors");
+        }
+    }
+    const median = (values) => values.sort((a, b) => a - b)[Math.floor(values.length / 2)];
+    console.log(`${size} invalid messages, median of ${runs}`);
+    console.log(`  validation:               ${median(times).toFixed(1)}ms`);
+    console.log(`  of which parsing the body: ${median(parse).toFixed(1)}ms`);
+};
+
+// Builds errors directly, as the validation scripts do when responding with the full 100 errors
+const testErrorConstructionPerformance = (count) => {
+    const errorsScript = fs.readFileSync("../../shared/resources/jsc/helpers/validationErrors.js").toString("utf8");
+    const build = new Function("messageId", "errors", "count", errorsScript + `
+        for (var i = 0; i < count; i++) {
+            if (errors.length === 100) {
+                errors.length = 0;
+            }
+            errors.push(i % 2 ? invalidNhsNumberError("/data/attributes/recipient/nhsNumber") : missingError("/data"));
+        }
+    `);
+    const start = process.hrtime.bigint();
+    build("rrt-1234-5678.1", [], count);
+    const elapsed = Number(process.hrtime.bigint() - start) / 1e6;
+    console.log(`${count} errors built in ${elapsed.toFixed(1)}ms`);
+};
+
+testErrorConstructionPerformance(1000000);
+testErrorLimitPerformance(10, 1000);
+testErrorLimitPerformance(10, 50000);
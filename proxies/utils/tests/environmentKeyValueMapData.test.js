@@ -0,0 +1,56 @@
+/**
+ * Tests for the caching of the environment key value map data in the shared proxy PreFlow.
+ *
+ * Run from the repository root with: node --test proxies/utils/tests/
+ */
+const assert = require("node:assert");
+const fs = require("node:fs");
+const path = require("node:path");
+const test = require("node:test");
+
+const SHARED_DIR = path.join(__dirname, "../../shared");
+
+const loadScript = (name) => fs.readFileSync(path.join(SHARED_DIR, "resources/jsc", name)).toString("utf8");
+
+// Runs a script as Apigee would, returning the flow variables it sets
+const run = (script, variables) => {
+    const context = {
+        getVariable: (name) => variables[name],
+        setVariable: (name, value) => { variables[name] = value; }
+    };
+    new Function("context", script)(context);
+    return variables;
+};
+
+// The PreFlow request steps as [name, condition] pairs, in order
+const preFlowSteps = () => {
+    const xml = fs.readFileSync(path.join(SHARED_DIR, "partials/Partial.Proxy.PreFlow.xml")).toString("utf8");
+    return [...xml.matchAll(/<Step>([\s\S]*?)<\/Step>/g)].map(([, step]) => [
+        step.match(/<Name>(.*?)<\/Name>/)[1],
+        (step.match(/<Condition>(.*?)<\/Condition>/) || [])[1]
+    ]);
+};
+
+test("the restored variables match those set by the key value map", () => {
+    const loaded = { "private.common.status-endpoint-api-key": "status-api-key" };
+
+    const saved = run(loadScript("EnvironmentKeyValueMapData.Save.js"), { ...loaded });
+    // LookupCache assigns the cached value to the same variable the cache was populated from
+    const cached = saved["private.environmentKeyValueMapData"];
+    const restored = run(loadScript("EnvironmentKeyValueMapData.Restore.js"), { "private.environmentKeyValueMapData": cached });
+
+    assert.deepStrictEqual(restored, { ...loaded, "private.environmentKeyValueMapData": cached });
+});
+
+test("the key value map is only read and cached on a cache miss", () => {
+    const miss = "lookupcache.LookupCache.EnvironmentKeyValueMapData.cachehit != true";
+    const hit = "lookupcache.LookupCache.EnvironmentKeyValueMapData.cachehit = true";
+
+    assert.deepStrictEqual(preFlowSteps(), [
+        ["LookupCache.EnvironmentKeyValueMapData", undefined],
+        ["FlowCallout.GetEnvironmentKeyValueMapData", miss],
+        ["JavaScript.EnvironmentKeyValueMapData.Save", miss],
+        ["PopulateCache.EnvironmentKeyValueMapData", miss],
+        ["JavaScript.EnvironmentKeyValueMapData.Restore", hit]
+    ]);
+});
@@ -0,0 +1,121 @@
+/**
+ * Snapshot tests for the 400 responses built by the create message and create message batch validation scripts.
+ *
+ * Run from the repository root with: node --test proxies/utils/tests/
+ * Set UPDATE_SNAPSHOTS=1 to rewrite the snapshots after an intended change to the responses.
+ */
+const assert = require("node:assert");
+const fs = require("node:fs");
+const path = require("node:path");
+const test = require("node:test");
+
+const JSC_DIR = path.join(__dirname, "../../shared/resources/jsc");
+const SNAPSHOT_DIR = path.join(__dirname, "__snapshots__");
+
+const loadScript = (name) => [
+    "helpers/validationErrors.js",
+    "helpers/validationChecks.js",
+    name
+].map((file) => fs.readFileSync(path.join(JSC_DIR, file)).toString("utf8")).join("\n");
+
+const scripts = {
+    messages: loadScript("Messages.Create.Validate.js"),
+    messageBatches: loadScript("MessageBatches.Create.Validate.js")
+};
+
+// Runs a script as Apigee would, returning the flow variables it sets
+const run = (script, content) => {
+    const variables = { "messageid": "rrt-1234-5678.1", "request.content": content };
+    const context = {
+        getVariable: (name) => variables[name],
+        setVariable: (name, value) => { variables[name] = value; }
+    };
+    new Function("context", script)(context);
+    return variables;
+};
+
+const expectSnapshot = (name, value) => {
+    const file = path.join(SNAPSHOT_DIR, name + ".json");
+    const actual = JSON.stringify(value, null, 2) + "\n";
+    if (process.env.UPDATE_SNAPSHOTS || !fs.existsSync(file)) {
+        fs.mkdirSync(SNAPSHOT_DIR, { recursive: true });
+        fs.writeFileSync(file, actual);
+    }
+    assert.strictEqual(actual, fs.readFileSync(file).toString("utf8"));
+};
+
+const validMessage = (index) => {
+    return {
+        messageReference: "6cbf3d8f-6a58-4a2e-b5f4-6b7e0f1c" + String(index).padStart(4, "0"),
+        recipient: { nhsNumber: "9990548609", dateOfBirth: "1982-03-17" },
+        originator: { odsCode: "X26" },
+        personalisation: {}
+    };
+};
+
+// Each message has an error in every field, so the batch hits the 100 error limit
+const invalidMessage = (index) => {
+    const variants = [
+        { messageReference: "not-a-uuid", recipient: { nhsNumber: "1234567890", dateOfBirth: "17/03/1982" }, originator: { odsCode: 12 }, personalisation: [] },
+        { messageReference: null, recipient: null, originator: null, personalisation: "text" },
+        { recipient: { nhsNumber: null, dateOfBirth: null }, originator: {}, personalisation: null },
+        null,
+        "message",
+        { messageReference: "6cbf3d8f-6a58-4a2e-b5f4-6b7e0f1c0000", recipient: {} }
+    ];
+    return variants[index % variants.length];
+};
+
+const batch = (messages) => JSON.stringify({
+    data: {
+        type: "MessageBatch",
+        attributes: {
+            routingPlanId: "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
+            messageBatchReference: "5450539c-3bfd-40bc-9c79-a19040797554",
+            messages: messages
+        }
+    }
+});
+
+const message = (attributes) => JSON.stringify({ data: { type: "Message", attributes: attributes } });
+
+const cases = {
+    messages: {
+        "invalid-json": "{",
+        "empty-object": "{}",
+        "null-data": JSON.stringify({ data: null }),
+        "invalid-attributes": JSON.stringify({ data: { type: "Batch", attributes: [] } }),
+        "invalid-fields": message({
+            routingPlanId: "not-a-uuid",
+            messageReference: 12,
+            recipient: { nhsNumber: "1234567890", dateOfBirth: "1982-3-17" },
+            originator: { odsCode: null },
+            personalisation: "text"
+        }),
+        "missing-fields": message({}),
+        "valid": message({
+            routingPlanId: "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
+            messageReference: "6cbf3d8f-6a58-4a2e-b5f4-6b7e0f1c0001",
+            recipient: { nhsNumber: "9990548609" },
+            personalisation: {}
+        })
+    },
+    messageBatches: {
+        "invalid-json": "[",
+        "empty-object": "{}",
+        "no-messages": batch([]),
+        "invalid-messages": batch(Array.from(Array(12).keys()).map(invalidMessage)),
+        "duplicate-references": batch([validMessage(1), validMessage(2), validMessage(1), validMessage(1)]),
+        "error-limit": batch(Array.from(Array(500).keys()).map(invalidMessage)),
+        "valid": batch(Array.from(Array(3).keys()).map(validMessage))
+    }
+};
+
+Object.entries(cases).forEach(([scriptName, scriptCases]) => {
+    Object.entries(scriptCases).forEach(([caseName, content]) => {
+        test(scriptName + " " + caseName, () => {
+            const errors = run(scripts[scriptName], content).errors;
+            expectSnapshot(scriptName + "-" + caseName, errors === null ? null : JSON.parse(errors));
+        });
+    });
+});
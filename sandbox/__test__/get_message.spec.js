@@ -70,4 +70,46 @@ describe('/api/v1/messages/{messageId}', () => {
                 .expect("Content-Type", /json/, done);
         });
     });
+
+    it('returns a strong ETag with the message', (done) => {
+        const { messageId } = getMessageData()[0];
+        request(server)
+            .get(`/api/v1/messages/${messageId}`)
+            .expect(200)
+            .expect("ETag", /^"[0-9a-f]{64}"$/, done);
+    });
+
+    it('returns a 304 when If-None-Match matches the ETag', (done) => {
+        const { messageId } = getMessageData()[0];
+        request(server)
+            .get(`/api/v1/messages/${messageId}`)
+            .expect(200)
+            .end((err, res) => {
+                if (err) {
+                    done(err);
+                    return;
+                }
+                request(server)
+                    .get(`/api/v1/messages/${messageId}`)
+                    .set('If-None-Match', res.headers.etag)
+                    .expect(304)
+                    .expect("ETag", res.headers.etag)
+                    .expect((notModified) => {
+                        assert.isEmpty(notModified.text || "");
+                    })
+                    .end(done);
+            });
+    });
+
+    it('returns a 200 when If-None-Match does not match the ETag', (done) => {
+        const { messageId, response } = getMessageData()[0];
+        request(server)
+            .get(`/api/v1/messages/${messageId}`)
+            .set('If-None-Match', '"does-not-match"')
+            .expect(200)
+            .expect((res) => {
+                assert.deepEqual(res.body, response);
+            })
+            .end(done);
+    });
 })
@@ -1,5 +1,5 @@
 import * as  fs from 'fs'
-import { sendError, writeLog } from './utils.js'
+import { sendError, writeLog, generateETag, matchesETag } from './utils.js'
 
 export async function getMessage(req, res, next) {
   if (req.headers.authorization === "banned") {
@@ -24,6 +24,16 @@ export async function getMessage(req, res, next) {
       next();
       return
     }
+
+    const etag = generateETag(fileContent);
+    res.setHeader('ETag', etag);
+
+    if (matchesETag(req, etag)) {
+      res.status(304).end();
+      next();
+      return
+    }
+
     res.type('json').status(200).send(fileContent)
   });
 }
@@ -1,4 +1,5 @@
 import log from "loglevel"
+import { createHash } from "crypto"
 
 export const writeLog = (res, logLevel, options = {}) => {
   if (log.getLevel() > log.levels[logLevel.toUpperCase()]) {
@@ -59,3 +60,19 @@ export function hasValidGlobalTemplatePersonalisation(personalisation) {
   }
   return true;
 }
+
+export function generateETag(content) {
+  return `"${createHash("sha256").update(content).digest("hex")}"`;
+}
+
+export function matchesETag(req, etag) {
+  const ifNoneMatch = req.header("If-None-Match");
+  if (!ifNoneMatch) {
+    return false;
+  }
+
+  return ifNoneMatch
+    .split(",")
+    .map((tag) => tag.trim().replace(/^W\//, ""))
+    .some((tag) => tag === "*" || tag === etag);
+}
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+benchmark_calculate_version.py
+
+Times calculate_version.py on a synthetic repository, with and without the
+version index, to check that a build only pays for the commits added since
+the last build.
+
+The repository has --commits commits, with version commands in some of their
+messages and a branch merged in every --merge-every commits. Each build adds
+--new commits (including a merged branch whose commits are older than the
+previous build) and checks the version against one calculated without the
+index.
+
+    python scripts/benchmark_calculate_version.py --commits 50000
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import git
+from calculate_version import calculate_version
+
+COMMAND_RATE = 0.01
+COMMANDS = ["+major", "+minor", "+patch", "+setstatus beta", "+setstatus rc", "+clearstatus"]
+
+
+class SyntheticRepo():
+    def __init__(self, path, seed, branch_length=5):
+        self.path = path
+        self.random = random.Random(seed)
+        self.branch_length = branch_length
+        self.count = 0
+        subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+
+    def message(self):
+        self.count += 1
+        if self.random.random() < COMMAND_RATE:
+            return f"Commit {self.count}\n\n{self.random.choice(COMMANDS)}"
+        return f"Commit {self.count}"
+
+    @staticmethod
+    def commit(ref, mark, parents, message, at):
+        data = message.encode("utf-8")
+        lines = [f"commit {ref}", f"mark :{mark}", f"committer Benchmark <benchmark@example.com> {at} +0000",
+                 f"data {len(data)}", message]
+        lines.extend(f"{'from' if i == 0 else 'merge'} {parent}" for i, parent in enumerate(parents))
+        return "\n".join(lines) + "\n\n"
+
+    def main_history(self):
+        """The newest commits on main, oldest first, as [(commit, time)]"""
+        result = subprocess.run(["git", "log", f"-{self.branch_length + 1}", "--first-parent", "--format=%H %ct",
+                                 "refs/heads/main"], cwd=self.path, capture_output=True, text=True)
+        history = [line.split() for line in result.stdout.splitlines()]
+        return [(sha, int(at)) for sha, at in reversed(history)]
+
+    def add(self, count, merge_every=0):
+        """
+        Adds count commits to main, one a minute, merging in a branch every
+        merge_every commits. Branches start branch_length commits before the
+        merge, so their commits are between those commits in date order.
+        """
+        history = self.main_history()
+        at = history[-1][1] if history else 1_500_000_000
+        stream = []
+        for i in range(count):
+            mark = len(stream) + 1
+            at += 60
+            parents = [history[-1][0]] if history else []
+            if merge_every and i % merge_every == 0 and len(history) > self.branch_length:
+                fork, fork_at = history[-self.branch_length - 1]
+                for j in range(self.branch_length):
+                    stream.append(self.commit("refs/heads/branch", mark, [fork], self.message(), fork_at + j + 1))
+                    fork = f":{mark}"
+                    mark += 1
+                parents.append(fork)
+            stream.append(self.commit("refs/heads/main", mark, parents, self.message(), at))
+            history.append((f":{mark}", at))
+            history = history[-self.branch_length - 1:]
+
+        subprocess.run(["git", "fast-import", "--quiet", "--force"], cwd=self.path, check=True,
+                       input="".join(stream).encode("utf-8"))
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks calculate_version.py on a synthetic repository")
+    parser.add_argument("--commits", type=int, default=20000, help="Commits in the synthetic repository")
+    parser.add_argument("--merge-every", type=int, default=50, help="Merge a branch in every this many commits")
+    parser.add_argument("--builds", type=int, default=5, help="Builds to run after the first one")
+    parser.add_argument("--new", type=int, default=10, help="Commits added before each build")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "repo")
+        synthetic = SyntheticRepo(path, args.seed)
+        synthetic.add(args.commits, args.merge_every)
+        repo = git.Repo(path)
+        index_path = os.path.join(directory, "index.json")
+        print(f"{sum(1 for _ in repo.iter_commits())} commits")
+
+        version, elapsed = timed(lambda: calculate_version(repo=repo, index_path=index_path))
+        print(f"{'first build, no index':<24} {elapsed:8.3f}s  {version}")
+
+        version, elapsed = timed(lambda: calculate_version(repo=repo, index_path=index_path))
+        print(f"{'same commit, indexed':<24} {elapsed:8.3f}s  {version}")
+
+        for build in range(args.builds):
+            # Merges a branch started before the last build
+            synthetic.add(args.new, merge_every=args.new)
+            repo = git.Repo(path)
+            version, elapsed = timed(lambda: calculate_version(repo=repo, index_path=index_path))
+            full_index = os.path.join(directory, f"full-{build}.json")
+            expected, full_elapsed = timed(lambda: calculate_version(repo=repo, index_path=full_index))
+            label = f"+{args.new} commits, indexed"
+            print(f"{label:<24} {elapsed:8.3f}s  {version}  (without index {full_elapsed:.3f}s)")
+            if version != expected:
+                print(f"version {version} does not match {expected} calculated without the index")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+bundle_specification.py
+
+Bundles the OAS specification into a single, fully dereferenced, JSON
+document on stdout, as `redocly bundle --dereferenced` does for `make publish`.
+
+Every $ref is replaced by the document it points to (markdown files by their
+text), with any keys next to the $ref taking precedence over the referenced
+document's. Each file is only parsed and resolved once per build, however
+many times it is referenced.
+
+The resolved document of each file is cached (in .git, or the --cache path)
+with a hash of its content and the files it references, so a rebuild only
+re-resolves the files that changed and the files that reference them.
+
+    python scripts/bundle_specification.py | python scripts/set_version.py > build/communications-manager.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import yaml
+
+SCRIPT_LOCATION = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(SCRIPT_LOCATION, ".."))
+SPECIFICATION = os.path.join(REPO_ROOT, "specification", "communications-manager.yaml")
+CACHE_PATH = os.path.join(REPO_ROOT, ".git", "specification_bundle_cache.json")
+# Bump when the resolution changes, so documents cached by an older version are not used
+CACHE_VERSION = 1
+
+
+class SpecificationLoader(yaml.SafeLoader):
+    """
+    Loads YAML as the JSON compatible YAML 1.2 core schema does: dates stay
+    strings and only true and false are booleans
+    """
+
+
+YAML_1_1_TAGS = ("tag:yaml.org,2002:timestamp", "tag:yaml.org,2002:bool")
+SpecificationLoader.yaml_implicit_resolvers = {
+    first: [(tag, regexp) for tag, regexp in resolvers if tag not in YAML_1_1_TAGS]
+    for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+}
+SpecificationLoader.add_implicit_resolver("tag:yaml.org,2002:bool", re.compile(
+    r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF"))
+
+
+def parse(path, content):
+    if path.endswith((".yaml", ".yml")):
+        return yaml.load(content, Loader=SpecificationLoader)
+    if path.endswith(".json"):
+        return json.loads(content)
+    return content.decode("utf-8")
+
+
+def follow_pointer(document, pointer, ref):
+    """Returns the part of document at the JSON pointer"""
+    for part in pointer.strip("/").split("/") if pointer.strip("/") else []:
+        part = part.replace("~1", "/").replace("~0", "~")
+        try:
+            document = document[int(part) if isinstance(document, list) else part]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ValueError(f"Cannot resolve $ref {ref}: {pointer} does not exist")
+    return document
+
+
+class Bundler():
+    def __init__(self, cache=None):
+        # {path: {"hash", "refs", "document"}} from the last build
+        self.cache = cache or {}
+        # the same for the files used in this build
+        self.files = {}
+        self.hashes = {}
+        self.unchanged_files = {}
+        self.resolving = []
+        self.resolved_count = 0
+
+    def content(self, path):
+        with open(path, "rb") as f:
+            content = f.read()
+        self.hashes[path] = hashlib.sha256(content).hexdigest()
+        return content
+
+    def hash(self, path):
+        if path not in self.hashes:
+            try:
+                self.content(path)
+            except OSError:
+                self.hashes[path] = None
+        return self.hashes[path]
+
+    def unchanged(self, path):
+        """Returns true if the file and every file it references are the same as when cached"""
+        if path not in self.unchanged_files:
+            entry = self.cache.get(path)
+            self.unchanged_files[path] = (
+                entry is not None
+                and entry["hash"] == self.hash(path)
+                and all(self.unchanged(ref) for ref in entry["refs"])
+            )
+        return self.unchanged_files[path]
+
+    def reuse(self, path):
+        """Uses the cached documents of an unchanged file and the files it references"""
+        if path not in self.files:
+            self.files[path] = self.cache[path]
+            for ref in self.files[path]["refs"]:
+                self.reuse(ref)
+
+    def resolve_file(self, path):
+        """Returns the dereferenced document in the file at path"""
+        if path in self.files:
+            return self.files[path]["document"]
+        if path in self.resolving:
+            chain = " -> ".join(os.path.relpath(p, REPO_ROOT) for p in self.resolving[self.resolving.index(path):])
+            raise ValueError(f"Circular $ref: {chain} -> {os.path.relpath(path, REPO_ROOT)}")
+
+        if self.unchanged(path):
+            self.reuse(path)
+            return self.files[path]["document"]
+
+        self.resolving.append(path)
+        refs = []
+        document = self.resolve(parse(path, self.content(path)), path, refs)
+        self.resolving.pop()
+
+        self.resolved_count += 1
+        self.files[path] = {"hash": self.hashes[path], "refs": sorted(set(refs)), "document": document}
+        return document
+
+    def resolve_ref(self, ref, path, refs):
+        file, _, pointer = ref.partition("#")
+        if not file:
+            raise ValueError(f"Cannot resolve $ref {ref} in {path}: only references to other files are supported")
+
+        target = os.path.normpath(os.path.join(os.path.dirname(path), file))
+        if not os.path.isfile(target):
+            raise ValueError(f"Cannot resolve $ref {ref} in {path}: {target} does not exist")
+        refs.append(target)
+        return follow_pointer(self.resolve_file(target), pointer, ref)
+
+    def resolve(self, node, path, refs):
+        """Returns node with every $ref in it replaced, adding the files referenced to refs"""
+        if isinstance(node, list):
+            return [self.resolve(item, path, refs) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        siblings = {key: self.resolve(value, path, refs) for key, value in node.items() if key != "$ref"}
+        if "$ref" not in node:
+            return siblings
+
+        document = self.resolve_ref(node["$ref"], path, refs)
+        if not isinstance(document, dict):
+            return document
+        for key, value in document.items():
+            siblings.setdefault(key, value)
+        return siblings
+
+    def bundle(self, path):
+        return self.resolve_file(os.path.abspath(path))
+
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache["files"] if cache.get("version") == CACHE_VERSION else {}
+
+
+def save_cache(path, files):
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f)
+    os.replace(f.name, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundles the OAS specification into a single JSON document")
+    parser.add_argument("specification", nargs="?", default=SPECIFICATION)
+    parser.add_argument("--cache", default=CACHE_PATH, help="Path of the cache of resolved files")
+    parser.add_argument("--no-cache", action="store_true", help="Resolve every file, ignoring the cache")
+    args = parser.parse_args()
+
+    use_cache = not args.no_cache and os.path.isdir(os.path.dirname(os.path.abspath(args.cache)))
+    bundler = Bundler(load_cache(args.cache) if use_cache else None)
+    try:
+        specification = bundler.bundle(args.specification)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if use_cache:
+        save_cache(args.cache, bundler.files)
+    print(f"Resolved {bundler.resolved_count} of {len(bundler.files)} files", file=sys.stderr)
+    sys.stdout.write(json.dumps(specification, indent=2))
+    sys.stdout.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,10 +15,17 @@ Commands:
     +setstatus <status>    Set the prerelease status to <status>
     +clearstatus           Clear the prerelease status
     +startversioning       Reset version to v1.0.0-alpha
+
+Commands are applied from the oldest commit to the newest, in the order git
+lists them, so the state after a commit only depends on the state before it
+and its message. The state of the newest commits is kept in a version index
+(in .git, or VERSION_INDEX_PATH) keyed by commit SHA, so a build only reads
+the commits added since the last cached ancestor instead of the whole history.
 """
 
+import json
 import os.path
-import itertools
+import tempfile
 import git
 import semver
 
@@ -27,16 +34,16 @@ SCRIPT_LOCATION = os.path.join(os.path.dirname(os.path.abspath(__file__)))
 REPO_ROOT = os.path.abspath(os.path.join(SCRIPT_LOCATION, ".."))
 REPO = git.Repo(REPO_ROOT)
 
+# Number of commits cached in the version index
+INDEX_SIZE = 32
+# Number of the newest versionable commits of each cached commit whose state is kept, so
+# that commits merged in from a branch can be placed between them
+CHECKPOINTS = 128
 
-def get_versionable_commits(repo):
-    """Gets all the versionable commits for a repository"""
-    # Ignore merge commits
-    commits = [c for c in repo.iter_commits() if len(c.parents) == 1]
 
-    # If there is a marker to start versioning from, use it. Else, start from the first commit
-    return list(
-        itertools.takewhile(lambda c: "+startversioning" not in c.message, commits)
-    )
+def is_versionable(commit):
+    """Returns true if commit is not a merge commit"""
+    return len(commit.parents) == 1
 
 
 def is_status_set_command(commit):
@@ -59,67 +66,161 @@ def is_patch_inc(commit):
     return "+patch" in commit.message
 
 
-def without_empty(commits):
-    """Takes a list of commits and returns a list without empty commits"""
-    pairs = zip(commits, commits[1:])
+def initial_state():
+    """
+    The increments since versioning started, with minor counted since the last
+    major and patch since the last minor, and the last status set (None for the
+    base status)
+    """
+    return {"major": 0, "minor": 0, "patch": 0, "status": None}
 
-    for fst, snd in pairs:
-        if fst.tree != snd.tree:
-            # This means 'fst' isn't empty
-            yield fst
 
-    # Have to remember to yield the last one
-    if commits:
-        yield commits[-1]
+def status_command(commit):
+    """Returns the status set by a status setting command"""
+    message = commit.message.strip()
+    status = None
 
+    if "+setstatus " in message:
+        status = {"pre": message.split("+setstatus ")[1]}  # Take the first string after the command
 
-def calculate_version(base_major=1, base_minor=0, base_revision=0, base_pre="alpha"):
-    """Calculates a semver based on commit history and special flags in commit messages"""
-    major = base_major
-    minor = base_minor
-    patch = base_revision
-    pre = base_pre
+    if "+clearstatus" in message:
+        status = {"pre": None}
 
-    commits = get_versionable_commits(REPO)
+    return status
 
-    # Figure out what the current 'status' (prerelease) is
-    status_sets = [c for c in commits if is_status_set_command(c)]
 
-    if status_sets:
-        most_recent_message = status_sets[0].message.strip()
+def apply_commit(state, commit):
+    """Returns the state after a versionable commit"""
+    # Versioning starts after the marker
+    if "+startversioning" in commit.message:
+        return initial_state()
 
-        if "+setstatus " in most_recent_message:
-            pre = most_recent_message.split("+setstatus ")[
-                1
-            ]  # Take the first string after the command
+    state = dict(state)
 
-        if "+clearstatus" in most_recent_message:
-            pre = None
+    if is_status_set_command(commit):
+        state["status"] = status_command(commit)
 
-    # If there are any +major in commit messages, increment the counter
-    major_incs = [c for c in commits if is_major_inc(c)]
+    if is_major_inc(commit):
+        state.update(major=state["major"] + 1, minor=0, patch=0)
+    elif is_minor_inc(commit):
+        state.update(minor=state["minor"] + 1, patch=0)
+    elif is_patch_inc(commit):
+        state["patch"] += 1
+
+    return state
+
+
+def apply_commits(state, commits, checkpoints):
+    """
+    Applies commits, newest first, to state and returns their checkpoints, a
+    list of [sha, state] for each commit newest first, followed by checkpoints
+    """
+    applied = []
+    for commit in reversed(commits):
+        state = apply_commit(state, commit)
+        applied.append([commit.hexsha, state])
+    applied.reverse()
+    return (applied + checkpoints)[:CHECKPOINTS]
+
+
+def full_checkpoints(repo):
+    """Calculates the checkpoints of HEAD from the whole history"""
+    commits = [c for c in repo.iter_commits() if is_versionable(c)]
+    # The sentinel marks that the history starts here
+    return apply_commits(initial_state(), commits, [[None, initial_state()]])
+
+
+def incremental_checkpoints(repo, index):
+    """
+    Calculates the checkpoints of HEAD from those of its newest cached
+    ancestor, or from the whole history if there isn't one. Returns None if
+    the commits are not in the order they were cached in.
+
+    The commits since the ancestor are read in history order, which is by
+    date, so may be between the ancestor's own newest commits. They are applied
+    to the state of the ancestor's newest commit older than all of them.
+    """
+    ancestor = None
+    added = set()
+    walked = []
+    shared = 0
+
+    for commit in repo.iter_commits():
+        if ancestor is None and commit.hexsha in index:
+            ancestor = index[commit.hexsha]
+            added = set(repo.git.rev_list("--no-merges", f"{commit.hexsha}..HEAD").split())
+            if any(c.hexsha not in added for c in walked):
+                return None
+
+        if ancestor is not None and len(walked) - shared == len(added):
+            break
+
+        if not is_versionable(commit):
+            continue
+
+        if ancestor is not None and commit.hexsha not in added:
+            if shared == len(ancestor) or ancestor[shared][0] != commit.hexsha:
+                # Not in the same order as in the ancestor's history
+                return None
+            shared += 1
 
-    if major_incs:
-        major += len(major_incs)
-        minor = 0
-        patch = 0
+        walked.append(commit)
 
-    # If there are any +minor in commit messages, increment the counter
-    # We only care about commits after the last major increment
-    commits = list(itertools.takewhile(lambda c: not is_major_inc(c), commits))
-    minor_incs = [c for c in commits if is_minor_inc(c)]
+    if ancestor is None:
+        return apply_commits(initial_state(), walked, [[None, initial_state()]])
 
-    if minor_incs:
-        minor += len(minor_incs)
-        patch = 0
+    if shared == len(ancestor):
+        return None
+
+    return apply_commits(ancestor[shared][1], walked, ancestor[shared:])
+
+
+def load_index(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(path, index, sha, checkpoints):
+    index.pop(sha, None)
+    index[sha] = checkpoints
+    for key in list(index)[:-INDEX_SIZE]:
+        del index[key]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(f.name, path)
+
+
+def get_version_state(repo, index_path=None):
+    """Gets the version state of HEAD, using and updating the version index"""
+    index_path = index_path or os.environ.get("VERSION_INDEX_PATH") or os.path.join(repo.git_dir, "version_index.json")
+    index = load_index(index_path)
+    sha = repo.head.commit.hexsha
+
+    checkpoints = incremental_checkpoints(repo, index) or full_checkpoints(repo)
+    save_index(index_path, index, sha, checkpoints)
+    return checkpoints[0][1]
+
+
+def calculate_version(base_major=1, base_minor=0, base_revision=0, base_pre="alpha", repo=REPO, index_path=None):
+    """Calculates a semver based on commit history and special flags in commit messages"""
+    state = get_version_state(repo, index_path)
+
+    # Figure out what the current 'status' (prerelease) is
+    pre = base_pre if state["status"] is None else state["status"]["pre"]
+
+    # If there are any +major in commit messages, increment the counter
+    major = base_major + state["major"]
 
-    # If there are any +patch in commit messages, increment the counter
-    # We only care about commits after the last minor increment
-    commits = list(itertools.takewhile(lambda c: not is_minor_inc(c), commits))
-    patch_incs = [c for c in commits if is_patch_inc(c)]
+    # Minor increments are counted after the last major increment
+    minor = (0 if state["major"] else base_minor) + state["minor"]
 
-    if patch_incs:
-        patch += len(patch_incs)
+    # Patch increments are counted after the last major or minor increment
+    patch = (0 if state["major"] or state["minor"] else base_revision) + state["patch"]
 
     return "v" + str(semver.VersionInfo(major, minor, patch, pre))
 
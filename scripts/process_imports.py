@@ -1,13 +1,39 @@
-import sys
+"""
+process_imports.py
+
+Renders the jinja2 templates of a proxy, expanding the [% include %]
+commands, called by build_proxy.sh.
+
+    process_imports.py <directory>
+        renders every template in directory in place
+
+    process_imports.py <output directory> <source directory>...
+        renders every template in the source directories, except the partials,
+        into the output directory, as if the source directories had been
+        copied into it in order and rendered in place
+
+Files are only written when their rendered content differs from the file
+already there. When rendering into an output directory, the hashes of the
+sources and the templates each one includes are kept next to it, so a rebuild
+only renders the templates that changed or include a template that changed.
+Templates are rendered in parallel across the available cores.
+"""
+import hashlib
+import json
 import os
-from jinja2 import Environment, FileSystemLoader
+import posixpath
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from jinja2 import ChoiceLoader, Environment, FileSystemLoader, meta
 
+# Below this many templates to render, starting worker processes costs more than it saves
+PARALLEL_THRESHOLD = 32
 
-def main():
-    incoming_path = sys.argv[1]
 
-    environment = Environment(
-        loader=FileSystemLoader(incoming_path),
+def create_environment(sources):
+    # the last source wins, as when the sources are copied into one directory
+    return Environment(
+        loader=ChoiceLoader([FileSystemLoader(source) for source in reversed(sources)]),
         block_start_string='[%',
         block_end_string='%]',
         variable_start_string='[[',
@@ -15,12 +41,145 @@ def main():
         autoescape=True
     )
 
-    for template in environment.list_templates():
-        print(f"Processing imports in {template}...")
-        finished = environment.get_template(template).render()
 
-        with open(os.path.join(incoming_path, template), "w") as output:
-            output.write(finished)
+def content_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def template_sources(environment):
+    """Returns {template: source} of every template in the environment"""
+    return {name: environment.loader.get_source(environment, name)[0] for name in environment.list_templates()}
+
+
+def referenced_templates(environment, source):
+    """Returns the templates that a template's source includes or imports"""
+    names = meta.find_referenced_templates(environment.parse(source))
+    return sorted({posixpath.normpath(name) for name in names if name is not None})
+
+
+def render_templates(sources, names):
+    environment = create_environment(sources)
+    return [environment.get_template(name).render() for name in names]
+
+
+def render_all(sources, names):
+    """Returns {template: rendered content}, rendering in worker processes when there are enough templates"""
+    workers = min(os.cpu_count() or 1, len(names) // PARALLEL_THRESHOLD)
+    if workers <= 1:
+        return dict(zip(names, render_templates(sources, names)))
+
+    chunks = [names[i::workers] for i in range(workers)]
+    rendered = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk, results in zip(chunks, executor.map(render_templates, [sources] * workers, chunks)):
+            rendered.update(zip(chunk, results))
+    return rendered
+
+
+def write_if_changed(path, content):
+    """Writes content to path unless the file already has it, returning true if written"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as output:
+        output.write(content)
+    return True
+
+
+class Build():
+    """The templates to render from the sources, and those that changed since the last build"""
+    def __init__(self, sources, manifest):
+        self.environment = create_environment(sources)
+        self.templates = template_sources(self.environment)
+        self.hashes = {name: content_hash(source) for name, source in self.templates.items()}
+        self.manifest = manifest
+        self.dependencies = {}
+        self.changed = {}
+
+    def includes(self, name):
+        """Returns the templates that name includes, parsing it only if it changed since the last build"""
+        if name not in self.dependencies:
+            cached = self.manifest.get(name)
+            if cached is not None and cached["hash"] == self.hashes[name]:
+                self.dependencies[name] = cached["includes"]
+            else:
+                self.dependencies[name] = referenced_templates(self.environment, self.templates[name])
+        return self.dependencies[name]
+
+    def is_changed(self, name, including=()):
+        """Returns true if name, or a template it includes, changed since the last build"""
+        if name not in self.changed:
+            if name in including:
+                raise ValueError(f"{name} includes itself through {' -> '.join(including)}")
+            cached = self.manifest.get(name)
+            self.changed[name] = (
+                name not in self.hashes
+                or cached is None
+                or cached["hash"] != self.hashes[name]
+                or any(self.is_changed(include, including + (name,)) for include in self.includes(name))
+            )
+        return self.changed[name]
+
+    def manifest_entries(self, names):
+        return {name: {"hash": self.hashes[name], "includes": self.includes(name)} for name in names}
+
+
+def load_manifest(path, sources):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest["templates"] if manifest.get("sources") == sources else {}
+
+
+def save_manifest(path, sources, templates):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"sources": sources, "templates": templates}, f, indent=2, sort_keys=True)
+
+
+def process(output_path, sources):
+    """Renders the templates in sources into output_path, returning the number of files written"""
+    in_place = sources == [output_path]
+    manifest_path = os.path.join(os.path.dirname(os.path.normpath(output_path)), ".process_imports.json")
+    sources = [os.path.abspath(source) for source in sources]
+    build = Build(sources, {} if in_place else load_manifest(manifest_path, sources))
+
+    names = sorted(name for name in build.templates if in_place or not name.startswith("partials/"))
+    outputs = {name: os.path.join(output_path, name) for name in names}
+    dirty = [name for name in names if build.is_changed(name) or not os.path.exists(outputs[name])]
+
+    written = 0
+    for name, content in render_all(sources, dirty).items():
+        if write_if_changed(outputs[name], content):
+            print(f"Processed imports in {name}")
+            written += 1
+
+    if not in_place:
+        # remove the files rendered by the last build from templates that no longer exist
+        for name in build.manifest:
+            if name not in outputs and os.path.isfile(os.path.join(output_path, name)):
+                os.remove(os.path.join(output_path, name))
+        save_manifest(manifest_path, sources, build.manifest_entries(build.templates))
+
+    print(f"Rendered {len(dirty)} of {len(names)} templates, {written} changed")
+    return written
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(f"Usage: {sys.argv[0]} <directory> | <output directory> <source directory>...")
+    output_path = sys.argv[1]
+    sources = sys.argv[2:] or [output_path]
+    try:
+        process(output_path, sources)
+    except ValueError as e:
+        sys.exit(str(e))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,64 @@
+"""
+transform_specification.py
+
+Helpers for deriving specifications from the bundled specification in
+build/communications-manager.json, such as the ZAP compatible one built by
+publish_zap_compatible.py.
+
+Transforms change the parsed document in place instead of copying it, and
+walk it with a stack rather than recursion, so they use no more memory than
+the document itself and are not limited by its depth.
+"""
+import json
+
+
+def objects(document):
+    """
+    Yields every object in document, parents before their children. Keys
+    removed from an object before the next object is requested are not walked.
+    """
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if type(node) is dict:
+            yield node
+            children = node.values()
+        else:
+            children = node
+        stack.extend(child for child in children if type(child) is dict or type(child) is list)
+
+
+def index_mappings(mappings):
+    """Returns {key: [value]} for (key, value) mappings"""
+    rules = {}
+    for key, value in mappings:
+        rules.setdefault(key, []).append(value)
+    return rules
+
+
+def remove_keys(document, mappings):
+    """
+    Removes, at any depth, each key of a (key, value) mapping whose value
+    equals the mapping's value, or has any value if the mapping's value is
+    None. Returns document.
+    """
+    rules = index_mappings(mappings)
+    for node in objects(document):
+        matches = [
+            key for key in node
+            if key in rules and any(value is None or node[key] == value for value in rules[key])
+        ]
+        for key in matches:
+            del node[key]
+    return document
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(path, document):
+    # json.dump writes the document as it is encoded, rather than building the whole string first
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f)
@@ -17,6 +17,66 @@ Add similar lines if you intend to add more helper functions to more directories
 pytest.register_assert_rewrite('lib')
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--record-traffic",
+        action="store",
+        default=None,
+        help="Append every API request made during the run to this file, see lib/traffic.py to replay it"
+    )
+    parser.addoption(
+        "--http-profile",
+        action="store",
+        default=None,
+        help="Write the time spent in HTTP calls by endpoint, test and fixture to this file, see lib/http_profiler.py"
+    )
+    parser.addoption(
+        "--validate-contract",
+        action="store_true",
+        default=False,
+        help="Fail tests that receive a response not matching the specification, see lib/contract.py"
+    )
+    parser.addoption(
+        "--record-impact",
+        action="store_true",
+        default=False,
+        help="Record the API paths each test file calls for test selection, see lib/impact.py"
+    )
+
+
+def pytest_configure(config):
+    # imported here so lib is registered for assertion rewriting before it is loaded
+    from lib.shared_resource import SharedResources
+    config.pluginmanager.register(SharedResources(config), "shared_resources")
+
+    record_traffic = config.getoption("--record-traffic")
+    if record_traffic:
+        from lib.traffic import TrafficRecording
+        config.pluginmanager.register(TrafficRecording(config, record_traffic), "traffic_recording")
+
+    http_profile = config.getoption("--http-profile")
+    if http_profile:
+        from lib.http_profiler import HttpProfiler
+        config.pluginmanager.register(HttpProfiler(config, http_profile), "http_profiler")
+
+    if config.getoption("--validate-contract"):
+        from lib.contract import ContractValidator
+        config.pluginmanager.register(ContractValidator(config), "contract_validator")
+
+    if config.getoption("--record-impact"):
+        from lib.impact import ImpactRecorder
+        config.pluginmanager.register(ImpactRecorder(config), "impact_recorder")
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_fixture_setup(fixturedef, request):
+    outcome = yield
+    # requests to the proxy under test are told apart from the others by its url, see lib/traffic.py
+    if fixturedef.argname == "nhsd_apim_proxy_url" and outcome.excinfo is None:
+        from lib.traffic import add_proxy_url
+        add_proxy_url(outcome.get_result())
+
+
 def pytest_assertrepr_compare(op, left, right):
     """
     This function overrides pytests function for representing failed assertion statements
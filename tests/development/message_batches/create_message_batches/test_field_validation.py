@@ -1,7 +1,7 @@
 import requests
 import pytest
 import uuid
-from lib import Assertions, Permutations, Generators
+from lib import Assertions, Permutations, Generators, ValidationMultiplexer
 from lib.fixtures import *  # NOSONAR
 import lib.constants.constants as constants
 from lib.constants.shared_paths import ROUTING_PLAN_ID_PATH
@@ -14,6 +14,12 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# the invalid message value cases are packed into one request per correlation id, see ValidationMultiplexer
+multiplexer = ValidationMultiplexer("dev")
+multiplexer.add("/recipient/nhsNumber", constants.INVALID_NHS_NUMBER)
+multiplexer.add("/recipient/dateOfBirth", constants.INVALID_DOB)
+multiplexer.add("/personalisation", constants.INVALID_PERSONALISATION_VALUES + constants.NULL_VALUES)
+
 
 @pytest.mark.devtest
 @pytest.mark.parametrize("correlation_id", constants.CORRELATION_IDS)
@@ -56,9 +62,9 @@ def test_property_missing(nhsd_apim_proxy_url, bearer_token_internal_dev, proper
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_batch_body("dev"),
-            property
+            pointer
         ),
     )
 
@@ -87,9 +93,9 @@ def test_data_null(nhsd_apim_proxy_url, bearer_token_internal_dev, property, poi
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_batch_body("dev"),
-            property
+            pointer
         ),
     )
 
@@ -118,9 +124,9 @@ def test_data_invalid(nhsd_apim_proxy_url, bearer_token_internal_dev, property,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("dev"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -183,9 +189,9 @@ def test_data_too_few_items(nhsd_apim_proxy_url, bearer_token_internal_dev, prop
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("dev"),
-            property,
+            pointer,
             []
         ),
     )
@@ -205,22 +211,20 @@ def test_invalid_nhs_number(nhsd_apim_proxy_url, bearer_token_internal_dev, nhs_
     """
     .. include:: ../../partials/validation/test_invalid_nhs_number.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("dev")
-    data["data"]["attributes"]["messages"][0]["recipient"]["nhsNumber"] = nhs_number
-    resp = requests.post(
+    result = multiplexer.result(
         f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             "Authorization": bearer_token_internal_dev.value,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=data
+        "/recipient/nhsNumber",
+        nhs_number
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_nhs_number_error(FIRST_MESSAGE_RECIPIENT_NHSNUMBER_PATH),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_nhs_number_error(result.pointer),
         correlation_id
     )
 
@@ -232,22 +236,20 @@ def test_invalid_dob(nhsd_apim_proxy_url, bearer_token_internal_dev, dob, correl
     """
     .. include:: ../../partials/validation/test_invalid_dob.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("dev")
-    data["data"]["attributes"]["messages"][0]["recipient"]["dateOfBirth"] = dob
-    resp = requests.post(
+    result = multiplexer.result(
         f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             "Authorization": bearer_token_internal_dev.value,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=data
+        "/recipient/dateOfBirth",
+        dob
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/recipient/dateOfBirth"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -390,22 +392,20 @@ def test_invalid_personalisation(nhsd_apim_proxy_url, bearer_token_internal_dev,
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("dev")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             "Authorization": bearer_token_internal_dev.value,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -417,22 +417,20 @@ def test_null_personalisation(nhsd_apim_proxy_url, bearer_token_internal_dev, co
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("dev")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             "Authorization": bearer_token_internal_dev.value,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_null_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_null_value_error(result.pointer),
         correlation_id
     )
 
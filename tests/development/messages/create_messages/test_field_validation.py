@@ -55,9 +55,9 @@ def test_property_missing(nhsd_apim_proxy_url, bearer_token_internal_dev, proper
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -86,9 +86,9 @@ def test_data_null(nhsd_apim_proxy_url, bearer_token_internal_dev, property, poi
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -117,9 +117,9 @@ def test_data_invalid(nhsd_apim_proxy_url, bearer_token_internal_dev, property,
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
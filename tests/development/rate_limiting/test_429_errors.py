@@ -1,9 +1,7 @@
-import requests
 import pytest
-from lib import Assertions, Generators
+from lib import Assertions, Generators, Burst
 from lib.fixtures import *  # NOSONAR
 from lib.constants.messages_paths import MESSAGES_ENDPOINT
-import time
 
 CORRELATION_IDS = [None, "0f160ae2-9b62-47bf-bdf0-c6a844d59488"]
 
@@ -17,12 +15,34 @@ def default_request_url(nhsd_apim_proxy_url):
     return f"{nhsd_apim_proxy_url}{MESSAGES_ENDPOINT}/pending_enrichment_request_item_id"
 
 
-def send_multiple_requests(url, headers, count=10, delay=0):
-    for i in range(count):
-        resp = requests.get(url, headers=headers)
-        if delay > 0:
-            time.sleep(delay)
-    return resp
+# well under the default spike arrest of 6000pm, for checking requests are not rate limited
+UNLIMITED_RATE = 20
+
+
+# sends count requests at once (or at rate per second), returns the first 429 to arrive or the last response
+def send_multiple_requests(url, headers, count=10, rate=None):
+    return Burst(url, headers).send(count, rate).limited_or_last()
+
+
+def is_rate_limited(detail):
+    return lambda resp: resp.status_code == 429 and detail in resp.text
+
+
+# the specific app limits are set for test client 1 only, so once its requests are rate limited the change has
+# reached the proxy and requests from other apps can be checked with a single burst, without retrying
+def wait_for_rate_limit(rate_limiting, url, headers, detail):
+    resp = rate_limiting.poll_response(lambda: send_multiple_requests(url, headers), is_rate_limited(detail))
+    assert resp.status_code == 429, f"Rate limit was not applied. Response: {resp.status_code}: {resp.text}"
+
+
+TEST_CLIENT_1_QUOTA_DETAIL = (
+    "Your application, NHS Notify Test Client 1, "
+    "has exceeded its quota of 4 requests every 1 minute(s) and is being rate limited."
+)
+TEST_CLIENT_1_SPIKEARREST_DETAIL = (
+    "Your application, NHS Notify Test Client 1, "
+    "has created a spike in traffic and is being rate limited. Please reduce the frequency of your requests."
+)
 
 
 @pytest.mark.devperftest
@@ -41,14 +61,19 @@ def test_429_triggered_app_quota(nhsd_apim_proxy_url, bearer_token_internal_dev,
         "X-Correlation-Id": correlation_id
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    detail = (
+        "Your application, Comms-manager-local, "
+        "has exceeded its quota of 4 requests every 1 minute(s) and is being rate limited."
+    )
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(detail)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "Your application, Comms-manager-local, "
-            "has exceeded its quota of 4 requests every 1 minute(s) and is being rate limited."),
+        Generators.generate_quota_error_custom(detail),
         correlation_id
     )
 
@@ -70,14 +95,19 @@ def test_429_triggered_app_spikearrest(nhsd_apim_proxy_url, bearer_token_interna
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    detail = (
+        "Your application, Comms-manager-local, "
+        "has created a spike in traffic and is being rate limited. Please reduce the frequency of your requests."
+    )
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(detail)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "Your application, Comms-manager-local, "
-            "has created a spike in traffic and is being rate limited. Please reduce the frequency of your requests."),
+        Generators.generate_quota_error_custom(detail),
         None
     )
 
@@ -99,14 +129,19 @@ def test_429_triggered_proxy_quota(nhsd_apim_proxy_url, bearer_token_internal_de
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    detail = (
+        "This API is currently receiving a high volume of requests "
+        "and is being rate limited."
+    )
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(detail)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "This API is currently receiving a high volume of requests "
-            "and is being rate limited."),
+        Generators.generate_quota_error_custom(detail),
         None
     )
 
@@ -128,14 +163,19 @@ def test_429_triggered_proxy_spikearrest(nhsd_apim_proxy_url, bearer_token_inter
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    detail = (
+        "This API is currently receiving a high volume of requests "
+        "and is being rate limited."
+    )
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(detail)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "This API is currently receiving a high volume of requests "
-            "and is being rate limited."),
+        Generators.generate_quota_error_custom(detail),
         None
     )
 
@@ -158,14 +198,15 @@ def test_429_triggered_specific_app_quota(nhsd_apim_proxy_url, bearer_token_inte
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(TEST_CLIENT_1_QUOTA_DETAIL)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "Your application, NHS Notify Test Client 1, "
-            "has exceeded its quota of 4 requests every 1 minute(s) and is being rate limited."),
+        Generators.generate_quota_error_custom(TEST_CLIENT_1_QUOTA_DETAIL),
         None
     )
 
@@ -174,7 +215,10 @@ def test_429_triggered_specific_app_quota(nhsd_apim_proxy_url, bearer_token_inte
 
 
 @pytest.mark.devperftest
-def test_429_not_triggered_other_specific_app_quota(nhsd_apim_proxy_url, bearer_token_internal_dev, rate_limiting):
+def test_429_not_triggered_other_specific_app_quota(nhsd_apim_proxy_url,
+                                                    bearer_token_internal_dev,
+                                                    bearer_token_internal_dev_test_1,
+                                                    rate_limiting):
 
     """
     .. include:: ../../partials/too_many_requests/test_200_specific_app_quota_different_app.rst
@@ -182,13 +226,25 @@ def test_429_not_triggered_other_specific_app_quota(nhsd_apim_proxy_url, bearer_
     rate_limiting.set_default_rate_limit()
     rate_limiting.set_app_ratelimit(test_client_1_details["email"], test_client_1_details["name"], quota=4)
 
+    url = default_request_url(nhsd_apim_proxy_url)
+    wait_for_rate_limit(
+        rate_limiting,
+        url,
+        {
+            "Authorization": bearer_token_internal_dev_test_1.value,
+            "Accept": "*/*",
+            "Content-Type": "application/json"
+        },
+        TEST_CLIENT_1_QUOTA_DETAIL
+    )
+
     headers = {
         "Authorization": bearer_token_internal_dev.value,
         "Accept": "*/*",
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    resp = send_multiple_requests(url, headers, rate=UNLIMITED_RATE)
 
     assert resp.status_code == 200, f"Response: {resp.status_code}: {resp.text}"
 
@@ -211,14 +267,15 @@ def test_429_triggered_specific_app_spikearrest(nhsd_apim_proxy_url,
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    resp = rate_limiting.poll_response(
+        lambda: send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers),
+        is_rate_limited(TEST_CLIENT_1_SPIKEARREST_DETAIL)
+    )
 
     Assertions.assert_error_with_optional_correlation_id(
         resp,
         429,
-        Generators.generate_quota_error_custom(
-            "Your application, NHS Notify Test Client 1, "
-            "has created a spike in traffic and is being rate limited. Please reduce the frequency of your requests."),
+        Generators.generate_quota_error_custom(TEST_CLIENT_1_SPIKEARREST_DETAIL),
         None
     )
 
@@ -227,7 +284,10 @@ def test_429_triggered_specific_app_spikearrest(nhsd_apim_proxy_url,
 
 
 @pytest.mark.devperftest
-def test_429_not_triggered_other_specific_spikearrest(nhsd_apim_proxy_url, bearer_token_internal_dev, rate_limiting):
+def test_429_not_triggered_other_specific_spikearrest(nhsd_apim_proxy_url,
+                                                      bearer_token_internal_dev,
+                                                      bearer_token_internal_dev_test_1,
+                                                      rate_limiting):
 
     """
     .. include:: ../../partials/too_many_requests/test_200_specific_app_spikearrest_different_app.rst
@@ -235,12 +295,24 @@ def test_429_not_triggered_other_specific_spikearrest(nhsd_apim_proxy_url, beare
     rate_limiting.set_default_rate_limit()
     rate_limiting.set_app_ratelimit(test_client_1_details["email"], test_client_1_details["name"], spikearrest="4pm")
 
+    url = default_request_url(nhsd_apim_proxy_url)
+    wait_for_rate_limit(
+        rate_limiting,
+        url,
+        {
+            "Authorization": bearer_token_internal_dev_test_1.value,
+            "Accept": "*/*",
+            "Content-Type": "application/json"
+        },
+        TEST_CLIENT_1_SPIKEARREST_DETAIL
+    )
+
     headers = {
         "Authorization": bearer_token_internal_dev.value,
         "Accept": "*/*",
         "Content-Type": "application/json"
     }
 
-    resp = send_multiple_requests(default_request_url(nhsd_apim_proxy_url), headers)
+    resp = send_multiple_requests(url, headers, rate=UNLIMITED_RATE)
 
     assert resp.status_code == 200, f"Response: {resp.status_code}: {resp.text}"
@@ -4,44 +4,65 @@ set -euo pipefail
 
 source ../../.venv/bin/activate
 
-if [ "$1" == "--verify" ]; then
-    OLD_VERIFICATION_HASH=$(find ../../docs/tests -name "*.md" -type f -exec md5sum {} \; | md5sum)
-    OLD_VERIFICATION_HASH=${OLD_VERIFICATION_HASH// -}
-    echo "Verifying documentation is up to date, existing documentation hash is $OLD_VERIFICATION_HASH"
-fi
+VERIFY=false
+for ARG in "$@"; do
+    case $ARG in
+        --verify) VERIFY=true ;;
+        # rebuild every page rather than only those whose sources changed
+        --clean) rm -rf build ;;
+    esac
+done
 
 export PYTHONPATH=../
 
-#clean
-rm -rf build
+BUILD=$(pwd)/build
+DOCS=$(pwd)/../../docs/tests
+
+#the pages are post processed from build/markdown into build/tests, rebuild them all if that's missing
+if [ ! -d "$BUILD/tests" ]; then
+    rm -rf "$BUILD"
+fi
+mkdir -p "$BUILD/tests"
+touch "$BUILD/markdown.md5"
+
+#run the build, build/doctrees is kept so sphinx only rebuilds the pages whose test modules or included partials changed
+sphinx-build -M markdown . build -j auto
 
-#run the build
-sphinx-build -M markdown . build
+#the pages sphinx wrote, by their hashes from the last build
+(cd "$BUILD/markdown" && find . -name '*.md' -type f | sort | xargs md5sum) > "$BUILD/markdown.md5.new"
 
-#clear the doctrees
-rm -rf build/doctrees
+#remove the pages that no longer exist
+for f in $(comm -23 <(cut -c35- "$BUILD/markdown.md5" | sort) <(cut -c35- "$BUILD/markdown.md5.new" | sort)) ; do
+    rm -f "$BUILD/tests/$f" ;
+done
 
-#remove all headers that match the regex
-for f in $(find build/markdown -name '*.md') ; do
-    TARGET_PATH=${f//build\/markdown\//} ;
-    mkdir -p build/${TARGET_PATH//$(basename $f)} ;
-    grep -v -E '### \w+\..*?\)' $f > build/$TARGET_PATH ;
+#remove all headers that match the regex from the pages that changed
+for f in $(comm -13 <(sort "$BUILD/markdown.md5") <(sort "$BUILD/markdown.md5.new") | cut -c35-) ; do
+    mkdir -p "$BUILD/tests/$(dirname $f)" ;
+    grep -v -E '### \w+\..*?\)' "$BUILD/markdown/$f" > "$BUILD/tests/$f" ;
 done
 
-#remove the original markdown folder
-rm -rf build/markdown
+mv "$BUILD/markdown.md5.new" "$BUILD/markdown.md5"
 
-#move the build to the docs location
-rm -rf ../../docs/tests/
-mv build ../../docs/tests
+#the hash of each page, to check the docs location against
+(cd "$BUILD/tests" && find . -name '*.md' -type f | sort | xargs md5sum) > "$BUILD/tests.md5"
 
-if [ "$1" == "--verify" ]; then
-    NEW_VERIFICATION_HASH=$(find ../../docs/tests -name "*.md" -type f -exec md5sum {} \; | md5sum)
-    NEW_VERIFICATION_HASH=${NEW_VERIFICATION_HASH// -}
-    echo "After documentation build hash is $NEW_VERIFICATION_HASH"
+#copy the pages that differ to the docs location, and remove the ones that no longer exist
+mkdir -p "$DOCS"
+STALE=$(cd "$DOCS" && md5sum -c "$BUILD/tests.md5" 2>/dev/null | grep -v ': OK$' | sed 's/: [^:]*$//' || true)
+EXTRA=$(comm -13 <(cut -c35- "$BUILD/tests.md5") <(cd "$DOCS" && find . -type f | sort))
 
-    if [ "$OLD_VERIFICATION_HASH" != "$NEW_VERIFICATION_HASH" ]; then
-        echo "!!!!!! Documentation hash mismatch, erroring"
-        exit 1
-    fi
-fi
\ No newline at end of file
+for f in $STALE ; do
+    mkdir -p "$DOCS/$(dirname $f)" ;
+    cp "$BUILD/tests/$f" "$DOCS/$f" ;
+done
+
+for f in $EXTRA ; do
+    rm -f "$DOCS/$f" ;
+done
+
+if [ "$VERIFY" == "true" ] && [ -n "$STALE$EXTRA" ]; then
+    echo "!!!!!! Documentation is out of date, these files have been updated:"
+    echo "$STALE" "$EXTRA" | xargs -n 1
+    exit 1
+fi
@@ -7,7 +7,7 @@ from notifications_python_client.notifications import NotificationsAPIClient
 
 @pytest.mark.e2e
 @pytest.mark.devtest
-def test_email_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_email_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_internal_dev, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_email_end_to_end_internal_dev.rst
     """
@@ -22,7 +22,8 @@ def test_email_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_interna
     Helper.poll_get_message(
         url=nhsd_apim_proxy_url,
         auth={"Authorization": bearer_token_internal_dev.value},
-        message_id=message_id
+        message_id=message_id,
+        etag_cache=etag_cache
     )
 
     notifications_client = NotificationsAPIClient(os.environ.get("GUKN_API_KEY"))
@@ -33,7 +34,7 @@ def test_email_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_interna
 
 @pytest.mark.e2e
 @pytest.mark.uattest
-def test_email_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_email_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_email_end_to_end_uat.rst
     """
@@ -48,7 +49,8 @@ def test_email_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
     Helper.poll_get_message(
         url=nhsd_apim_proxy_url,
         auth={"Authorization": bearer_token_internal_dev.value},
-        message_id=message_id
+        message_id=message_id,
+        etag_cache=etag_cache
     )
 
     notifications_client = NotificationsAPIClient(os.environ.get("UAT_GUKN_API_KEY"))
@@ -7,7 +7,7 @@ from notifications_python_client.notifications import NotificationsAPIClient
 
 @pytest.mark.e2e
 @pytest.mark.devtest
-def test_letter_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_letter_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_internal_dev, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_letter_end_to_end_internal_dev.rst
     """
@@ -25,6 +25,7 @@ def test_letter_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_intern
         message_id=message_id,
         end_state="sending",
         poll_time=595,
+        etag_cache=etag_cache
     )
 
     notifications_client = NotificationsAPIClient(os.environ.get("GUKN_API_KEY"))
@@ -37,7 +38,7 @@ def test_letter_end_to_end_internal_dev(nhsd_apim_proxy_url, bearer_token_intern
 
 @pytest.mark.e2e
 @pytest.mark.uattest
-def test_letter_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_letter_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_letter_end_to_end_uat.rst
     """
@@ -55,6 +56,7 @@ def test_letter_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
         message_id=message_id,
         end_state="sending",
         poll_time=595,
+        etag_cache=etag_cache
     )
 
     notifications_client = NotificationsAPIClient(os.environ.get("UAT_GUKN_API_KEY"))
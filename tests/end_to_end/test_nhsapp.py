@@ -6,7 +6,7 @@ from lib.fixtures import *  # NOSONAR
 
 @pytest.mark.e2e
 @pytest.mark.devtest
-def test_nhsapp_end_to_end(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_nhsapp_end_to_end(nhsd_apim_proxy_url, bearer_token_internal_dev, message_cache, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_nhsapp_end_to_end_internal_dev.rst
     """
@@ -21,14 +21,18 @@ def test_nhsapp_end_to_end(nhsd_apim_proxy_url, bearer_token_internal_dev):
     Helper.poll_get_message(
         url=nhsd_apim_proxy_url,
         auth={"Authorization": bearer_token_internal_dev.value},
-        message_id=message_id
+        message_id=message_id,
+        cache=message_cache,
+        etag_cache=etag_cache
     )
 
     Assertions.assert_get_message_status(
         Helper.get_message(
             nhsd_apim_proxy_url,
             {"Authorization": bearer_token_internal_dev.value},
-            message_id
+            message_id,
+            cache=message_cache,
+            etag_cache=etag_cache
         ),
         "delivered"
     )
@@ -36,7 +40,7 @@ def test_nhsapp_end_to_end(nhsd_apim_proxy_url, bearer_token_internal_dev):
 
 @pytest.mark.e2e
 @pytest.mark.uattest
-def test_nhsapp_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
+def test_nhsapp_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev, message_cache, etag_cache):
     """
     .. include:: ../../partials/happy_path/test_nhsapp_end_to_end_uat.rst
     """
@@ -54,14 +58,18 @@ def test_nhsapp_end_to_end_uat(nhsd_apim_proxy_url, bearer_token_internal_dev):
         url=nhsd_apim_proxy_url,
         auth={"Authorization": bearer_token_internal_dev.value},
         message_id=message_id,
-        end_state="sending"
+        end_state="sending",
+        cache=message_cache,
+        etag_cache=etag_cache
     )
 
     Assertions.assert_get_message_status(
         Helper.get_message(
             nhsd_apim_proxy_url,
             {"Authorization": bearer_token_internal_dev.value},
-            message_id
+            message_id,
+            cache=message_cache,
+            etag_cache=etag_cache
         ),
         "sending"
     )
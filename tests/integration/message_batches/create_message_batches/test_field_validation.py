@@ -1,7 +1,7 @@
 import requests
 import pytest
 import uuid
-from lib import Assertions, Permutations, Generators
+from lib import Assertions, Permutations, Generators, ValidationMultiplexer
 import lib.constants.constants as constants
 from lib.constants.message_batches_paths import MISSING_PROPERTIES_PATHS, NULL_PROPERTIES_PATHS, \
     INVALID_PROPERTIES_PATHS, DUPLICATE_PROPERTIES_PATHS, TOO_FEW_PROPERTIES_PATHS, MESSAGE_BATCH_REFERENCE_PATH, \
@@ -12,6 +12,12 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# the invalid message value cases are packed into one request per correlation id, see ValidationMultiplexer
+multiplexer = ValidationMultiplexer("int")
+multiplexer.add("/recipient/nhsNumber", constants.INVALID_NHS_NUMBER)
+multiplexer.add("/recipient/dateOfBirth", constants.INVALID_DOB)
+multiplexer.add("/personalisation", constants.INVALID_PERSONALISATION_VALUES + constants.NULL_VALUES)
+
 
 @pytest.mark.inttest
 @pytest.mark.parametrize("correlation_id", constants.CORRELATION_IDS)
@@ -54,9 +60,9 @@ def test_property_missing(bearer_token_int, property, pointer, correlation_id):
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_batch_body("int"),
-            property
+            pointer
         ),
     )
 
@@ -85,9 +91,9 @@ def test_data_null(bearer_token_int, property, pointer, correlation_id):
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_batch_body("int"),
-            property
+            pointer
         ),
     )
 
@@ -116,9 +122,9 @@ def test_data_invalid(bearer_token_int, property, pointer, correlation_id):
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("int"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -181,9 +187,9 @@ def test_data_too_few_items(bearer_token_int, property, pointer, correlation_id)
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("int"),
-            property,
+            pointer,
             []
         ),
     )
@@ -203,22 +209,20 @@ def test_invalid_nhs_number(bearer_token_int, nhs_number, correlation_id):
     """
     .. include:: ../../partials/validation/test_invalid_nhs_number.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("int")
-    data["data"]["attributes"]["messages"][0]["recipient"]["nhsNumber"] = nhs_number
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.INT_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=data
+        "/recipient/nhsNumber",
+        nhs_number
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_nhs_number_error(FIRST_MESSAGE_RECIPIENT_NHSNUMBER_PATH),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_nhs_number_error(result.pointer),
         correlation_id
     )
 
@@ -230,22 +234,20 @@ def test_invalid_dob(bearer_token_int, dob, correlation_id):
     """
     .. include:: ../../partials/validation/test_invalid_dob.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("int")
-    data["data"]["attributes"]["messages"][0]["recipient"]["dateOfBirth"] = dob
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.INT_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=data
+        "/recipient/dateOfBirth",
+        dob
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/recipient/dateOfBirth"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -388,22 +390,20 @@ def test_invalid_personalisation(bearer_token_int, correlation_id, personalisati
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("int")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.INT_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -415,22 +415,20 @@ def test_null_personalisation(bearer_token_int, correlation_id, personalisation)
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("int")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.INT_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "X-Correlation-Id": correlation_id,
             "Authorization": bearer_token_int.value
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_null_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_null_value_error(result.pointer),
         correlation_id
     )
 
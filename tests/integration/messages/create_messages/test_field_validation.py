@@ -56,9 +56,9 @@ def test_property_missing(bearer_token_int, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -87,9 +87,9 @@ def test_data_null(bearer_token_int, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -118,9 +118,9 @@ def test_data_invalid(bearer_token_int, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
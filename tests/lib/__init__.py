@@ -4,3 +4,10 @@ from .generators import Generators
 from .authentication import AuthenticationCache
 from .error_handler import error_handler
 from .helper import Helper
+from .paginator import NhsAppAccountsPaginator
+from .message_cache import MessageCache
+from .etag_cache import EtagCache
+from .payload_factory import PayloadFactory
+from .validation_multiplexer import ValidationMultiplexer
+from .burst import Burst
+from .schema_validators import SchemaValidators, SchemaValidationError
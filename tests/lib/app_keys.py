@@ -1,3 +1,7 @@
+import os
+import requests
+from pytest_nhsd_apim.apigee_apis import ApigeeClient, ApigeeNonProdCredentials, AppKeysAPI
+
 
 def ensure_api_product_in_application(developer_app_keys_api, dev_email, app_name, key_id, api_product_name):
     r = developer_app_keys_api.get_app_key(
@@ -13,6 +17,9 @@ def ensure_api_product_in_application(developer_app_keys_api, dev_email, app_nam
             key=key_id,
             body={'apiProducts': [api_product_name]}
             )
+        # post_app_key returns the requests Response itself when apigee answers 204
+        if isinstance(r2, requests.Response):
+            return r2.json() if r2.content else None
         return r2
     else:
         return r
@@ -37,3 +44,25 @@ def ensure_api_product_not_in_application(
     # no need to remove anything (i.e. there are more than one test workers)
     except Exception:
         return None
+
+
+def remove_api_product_from_application(dev_email, app_name, key_env, api_product_name):
+    """
+    Teardown of a shared api product association, see lib/shared_resource.py. This runs on the xdist controller,
+    which has no fixtures, so it builds its own client the way the developer_app_keys_api fixture does, and reads
+    the key from the key_env environment variable.
+    """
+    developer_app_keys_api = AppKeysAPI(client=ApigeeClient(config=ApigeeNonProdCredentials()))
+    try:
+        return developer_app_keys_api.delete_product_app_key_association(
+                email=dev_email,
+                app_name=app_name,
+                app_key=os.environ[key_env],
+                apiproduct_name=api_product_name
+                )
+    except Exception as e:
+        # the library raises a bare Exception naming the status code, a 404 means the product is already gone.
+        # Anything else is raised so it is reported by SharedResources.
+        if "status_code: 404" in str(e):
+            return None
+        raise
@@ -282,6 +282,23 @@ class Assertions():
         # ensure we have our cache-control set correctly
         assert resp.headers.get("Cache-Control") == "no-cache, no-store, must-revalidate"
 
+    @staticmethod
+    def assert_multiplexed_error(result, error, correlation_id):
+        resp = result.resp
+        assert resp.status_code == 400, f"Response: {resp.status_code}: {resp.text}"
+
+        # identifiers are numbered across the whole response, not per case
+        for num, e in enumerate(resp.json().get("errors")):
+            assert e.get("id") is not None
+            assert int(e.get("id").split(".")[-1]) == num
+
+        case_errors = [{k: v for k, v in e.items() if k != "id"} for e in result.errors]
+        assert case_errors == [error], f"Errors for {result.pointer}: {case_errors}"
+
+        Assertions.assert_correlation_id(resp.headers.get("X-Correlation-Id"), correlation_id)
+        assert resp.headers.get("X-Content-Type-Options") == "nosniff"
+        assert resp.headers.get("Cache-Control") == "no-cache, no-store, must-revalidate"
+
     @staticmethod
     def assert_correlation_id(res_correlation_id, correlation_id):
         # apigee generates this value if not present with rrt prefix
@@ -0,0 +1,128 @@
+"""
+Sends a burst of identical requests to trigger (or check for) spike arrest
+and quota limits.
+
+Every request gets its own connection, opened (including the TLS handshake)
+before anything is sent. Without a rate all requests wait on a barrier and are
+released together; with a rate they are sent on a fixed schedule of rate
+requests per second. Either way the timing of the burst is decided here
+rather than by the round trip time of the previous request.
+
+    result = Burst(url, headers).send(10)
+    result.first_limited()   # how many responses arrived before the first 429
+    result.limited_or_last() # a 429 to assert on, or the last response
+
+Requests are made with http.client, so they are not seen by lib/http_hooks.py.
+Responses are returned as requests.Response objects so the usual Assertions
+can be used on them.
+"""
+import http.client
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class BurstResult():
+    def __init__(self, responses, sent_at, received_at):
+        """responses, sent_at and received_at are in send order, times are from time.perf_counter"""
+        self.responses = responses
+        self.sent_at = sent_at
+        self.received_at = received_at
+        self.arrival_order = sorted(range(len(responses)), key=lambda i: received_at[i])
+
+    def statuses(self):
+        """Status codes in the order the responses arrived"""
+        return [self.responses[i].status_code for i in self.arrival_order]
+
+    def first_limited(self):
+        """The number of responses that arrived before the first 429, or None if there wasn't one"""
+        statuses = self.statuses()
+        return statuses.index(429) if 429 in statuses else None
+
+    def limited(self):
+        """The 429 responses in the order they arrived"""
+        return [self.responses[i] for i in self.arrival_order if self.responses[i].status_code == 429]
+
+    def last(self):
+        return self.responses[self.arrival_order[-1]]
+
+    def limited_or_last(self):
+        limited = self.limited()
+        return limited[0] if limited else self.last()
+
+    def duration(self):
+        return max(self.received_at) - min(self.sent_at)
+
+
+class Burst():
+    def __init__(self, url, headers=None, method="GET", body=None, timeout=30):
+        split = urlsplit(url)
+        self.scheme = split.scheme
+        self.host = split.hostname
+        self.port = split.port
+        self.path = split.path + (f"?{split.query}" if split.query else "")
+        self.url = url
+        self.method = method
+        self.body = body.encode("utf-8") if isinstance(body, str) else body
+        self.timeout = timeout
+        # requests drops headers set to None, do the same
+        self.headers = {k: v for k, v in (headers or {}).items() if v is not None}
+
+    def connect(self):
+        if self.scheme == "https":
+            context = ssl.create_default_context(cafile=requests.certs.where())
+            connection = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=context)
+        else:
+            connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        connection.connect()
+        return connection
+
+    def to_response(self, resp):
+        response = requests.Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.headers = CaseInsensitiveDict(resp.getheaders())
+        response._content = resp.read()
+        response.url = self.url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def send(self, count, rate=None):
+        """Sends count requests, all at once or at rate requests per second"""
+        connections = [self.connect() for _ in range(count)]
+        responses = [None] * count
+        sent_at = [None] * count
+        received_at = [None] * count
+        errors = []
+        barrier = threading.Barrier(count + 1)
+
+        def worker(i):
+            barrier.wait()
+            if rate is not None:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                sent_at[i] = time.perf_counter()
+                connections[i].request(self.method, self.path, body=self.body, headers=self.headers)
+                responses[i] = self.to_response(connections[i].getresponse())
+                received_at[i] = time.perf_counter()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections[i].close()
+
+        threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        start = time.perf_counter()
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+        return BurstResult(responses, sent_at, received_at)
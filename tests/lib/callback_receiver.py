@@ -0,0 +1,271 @@
+"""
+Local receiver for the message and channel status callbacks described in
+specification/callbacks, so tests can wait for a message to reach a status as
+soon as it is pushed rather than polling GET /v1/messages/{messageId}.
+
+Callbacks are accepted on any path with a POST of a JSON:API body. The x-api-key
+header must match the api key (401 otherwise) and x-hmac-sha256-signature must
+be the HMAC-SHA256 of the body with the secret (403 otherwise). Every status in
+the data array is then recorded, once: redeliveries with the same
+meta.idempotencyKey, or the same content when there isn't one, are accepted and
+ignored. With validate=True each status is also checked against its schema in
+specification/schemas (400 otherwise).
+
+Statuses are indexed by both messageId and messageReference, and waiting for
+one returns a future that completes with the CallbackEvent as soon as the
+status arrives, or straight away if it already has. Waiting for any message
+status other than failed fails with a ValueError if the message fails first.
+
+    receiver = CallbackReceiver(api_key, secret)
+    await receiver.start()
+    event = await receiver.wait_for(message_id, "delivered")
+    event = await receiver.wait_for(message_reference, "delivered", channel="nhsapp")
+
+or from synchronous tests, with the receiver running on a thread of its own:
+
+    receiver = CallbackReceiver(api_key, secret).start_in_thread()
+    receiver.wait(message_id, "delivered", timeout=300)
+    receiver.stop_in_thread()
+
+The server is a small HTTP/1.1 implementation on asyncio streams, handling
+keep-alive connections so a sender can push thousands of callbacks a second.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from lib.schema_validators import SchemaValidationError, SchemaValidators
+
+SIGNATURE_HEADER = "x-hmac-sha256-signature"
+API_KEY_HEADER = "x-api-key"
+MAX_BODY_SIZE = 1024 * 1024
+# the schema of each type of status in a callback's data array
+SCHEMAS = {
+    "MessageStatus": "components/MessageStatus",
+    "ChannelStatus": "components/SupplierStatus",
+}
+REASONS = {
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+}
+
+
+def sign(secret, body):
+    """The x-hmac-sha256-signature of a callback body"""
+    return hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def header_bytes(headers, name):
+    # headers are decoded as latin-1, so this gives back the bytes that were sent, and compare_digest only
+    # accepts str values that are ascii
+    return headers.get(name, "").encode("latin-1")
+
+
+class CallbackEvent():
+    """A message or channel status from a callback, channel is None for message statuses"""
+    def __init__(self, item):
+        attributes = item["attributes"]
+        self.type = item["type"]
+        self.message_id = attributes["messageId"]
+        self.message_reference = attributes["messageReference"]
+        if self.type == "ChannelStatus":
+            self.channel = attributes["channel"]
+            self.status = attributes["channelStatus"]
+        else:
+            self.channel = None
+            self.status = attributes["messageStatus"]
+        self.timestamp = attributes.get("timestamp")
+        self.data = item
+
+    def __repr__(self):
+        channel = f" {self.channel}" if self.channel is not None else ""
+        return f"CallbackEvent({self.message_id}{channel} {self.status})"
+
+
+class CallbackReceiver():
+    def __init__(self, api_key, secret, host="127.0.0.1", port=0, validate=False):
+        self.api_key = api_key
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.server = None
+        self.loop = None
+        self.thread = None
+        self.validators = SchemaValidators.shared() if validate else None
+        # {message id or reference: [CallbackEvent]}
+        self.events = {}
+        # {(message id or reference, channel, status): CallbackEvent}, the first time each status was reached
+        self.reached = {}
+        # {message id or reference: [(channel, status, future)]}
+        self.waiters = {}
+        self.idempotency_keys = set()
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method = request_line.split(" ", 1)[0]
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length")
+                if length is None or not length.isdigit():
+                    status = 411
+                elif int(length) > MAX_BODY_SIZE:
+                    status = 413
+                else:
+                    body = await reader.readexactly(int(length))
+                    status = self.receive(headers, body) if method == "POST" else 405
+
+                keep_alive = status < 411 and headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Length: 0\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    def receive(self, headers, body):
+        """Records the statuses in a callback, returning the status code of the response"""
+        if not hmac.compare_digest(header_bytes(headers, API_KEY_HEADER), self.api_key.encode("utf-8")):
+            self.rejected += 1
+            return 401
+        if not hmac.compare_digest(header_bytes(headers, SIGNATURE_HEADER), sign(self.secret, body).encode("utf-8")):
+            self.rejected += 1
+            return 403
+        try:
+            items = json.loads(body)["data"]
+            if self.validators is not None:
+                for item in items:
+                    self.validators.validate(SCHEMAS.get(item.get("type"), "components/MessageStatus"), item)
+            events = [(self.idempotency_key(item), CallbackEvent(item)) for item in items]
+        except (ValueError, KeyError, TypeError, AttributeError, SchemaValidationError):
+            self.rejected += 1
+            return 400
+
+        for key, event in events:
+            if key in self.idempotency_keys:
+                self.duplicates += 1
+                continue
+            self.idempotency_keys.add(key)
+            self.received += 1
+            self.record(event)
+        return 202
+
+    @staticmethod
+    def idempotency_key(item):
+        key = (item.get("meta") or {}).get("idempotencyKey")
+        if key is None:
+            key = hashlib.sha256(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()
+        return key
+
+    def record(self, event):
+        for identifier in (event.message_id, event.message_reference):
+            self.events.setdefault(identifier, []).append(event)
+            self.reached.setdefault((identifier, event.channel, event.status), event)
+
+            waiters = self.waiters.get(identifier)
+            if not waiters:
+                continue
+            remaining = []
+            for channel, status, future in waiters:
+                if future.done():
+                    continue
+                if channel == event.channel and status == event.status:
+                    future.set_result(event)
+                elif event.channel is None and event.status == "failed" and channel is None:
+                    future.set_exception(ValueError(
+                        f"Message {event.message_id} failed while waiting for it to be {status}"))
+                else:
+                    remaining.append((channel, status, future))
+            if remaining:
+                self.waiters[identifier] = remaining
+            else:
+                del self.waiters[identifier]
+
+    def wait_for(self, message, status, channel=None):
+        """
+        Returns a future of the CallbackEvent of message, its id or reference, reaching status on channel, or
+        reaching the message status if channel is None. Must be called on the receiver's event loop.
+        """
+        future = self.loop.create_future()
+        event = self.reached.get((message, channel, status))
+        if event is not None:
+            future.set_result(event)
+        elif channel is None and status != "failed" and (message, None, "failed") in self.reached:
+            future.set_exception(ValueError(f"Message {message} failed while waiting for it to be {status}"))
+        else:
+            self.waiters.setdefault(message, []).append((channel, status, future))
+        return future
+
+    def history(self, message):
+        """The statuses received for message, its id or reference, in the order they arrived"""
+        return list(self.events.get(message, []))
+
+    def start_in_thread(self):
+        """Starts the receiver on an event loop on a thread of its own, returning once it is listening"""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        self.thread = threading.Thread(target=run, name="callback-receiver", daemon=True)
+        self.thread.start()
+        started.wait()
+        return self
+
+    def stop_in_thread(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def wait(self, message, status, channel=None, timeout=300):
+        """Blocks until message reaches status, for a receiver started with start_in_thread"""
+        async def wait():
+            return await asyncio.wait_for(self.wait_for(message, status, channel), timeout)
+
+        try:
+            return asyncio.run_coroutine_threadsafe(wait(), self.loop).result()
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"No callback for message {message} reaching {status} in {timeout}s. "
+                               f"Received: {self.history(message)}")
@@ -0,0 +1,221 @@
+"""
+Pytest plugin checking every API response against the OpenAPI specification.
+
+Enable it with --validate-contract. Each response to an API call made through
+the requests library (see lib/http_hooks.py) is looked up by its method, path
+and status in specification/communications-manager.yaml, and its body is
+validated against the schema of that operation's response. A test passes only
+if every response it received matched, otherwise it fails listing the
+mismatches. Statuses that aren't documented for an operation are mismatches
+too.
+
+The schemas are compiled into Python functions by lib/schema_validators.py, and
+each operation's validator is looked up the first time a response to it is
+seen, so checking a response costs little more than parsing its body.
+
+    from lib.contract import Contract
+
+    Contract.shared().validate("GET", "/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM", 200, body)
+"""
+import os
+import threading
+from collections import Counter
+import pytest
+import yaml
+from lib import http_hooks
+from lib.schema_validators import SCHEMAS_DIR, SchemaValidationError, SchemaValidators, schema_name
+from lib.traffic import api_path, route
+
+SPECIFICATION = os.path.join(os.path.dirname(SCHEMAS_DIR), "communications-manager.yaml")
+METHODS = ("get", "put", "post", "delete", "patch", "head", "options")
+SUMMARY_ROWS = 10
+
+
+def load_yaml(path):
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+def resolve(document, directory):
+    """Returns (document, directory) following a $ref to another file, if document is one"""
+    if isinstance(document, dict) and "$ref" in document:
+        path = os.path.normpath(os.path.join(directory, document["$ref"]))
+        return load_yaml(path), os.path.dirname(path)
+    return document, directory
+
+
+def media_type(content_type):
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+class Contract():
+    """The response schemas of the operations in the specification, by method, path and status"""
+    _shared = None
+    _lock = threading.Lock()
+
+    def __init__(self, specification=SPECIFICATION, validators=None):
+        self.validators = validators or SchemaValidators.shared()
+        directory = os.path.dirname(specification)
+        self.schemas_dir = os.path.join(directory, "schemas")
+        self.operations = {}
+        for path, item in load_yaml(specification)["paths"].items():
+            # the callbacks are documented as paths, but are requests we make to clients
+            if not path.startswith("/"):
+                continue
+            for method, operation in item.items():
+                if method in METHODS:
+                    self.operations[f"{method.upper()} {path}"] = resolve(operation, directory)
+        # {(route, status): {media type: validator}}, filled in as responses are seen
+        self.responses = {}
+        self.responses_lock = threading.Lock()
+
+    @staticmethod
+    def shared():
+        """The contract of specification/communications-manager.yaml, loaded once per process"""
+        with Contract._lock:
+            if Contract._shared is None:
+                Contract._shared = Contract()
+            return Contract._shared
+
+    def response_validators(self, operation_route, status):
+        """Returns {media type: validator} of an operation's response, or None if the status isn't documented"""
+        key = (operation_route, status)
+        if key not in self.responses:
+            operation, directory = self.operations[operation_route]
+            responses = operation.get("responses", {})
+            response = responses.get(str(status), responses.get(f"{str(status)[0]}XX", responses.get("default")))
+            validators = None
+            if response is not None:
+                response, directory = resolve(response, directory)
+                validators = {}
+                for name, content in (response.get("content") or {}).items():
+                    schema, schema_directory = content["schema"], directory
+                    if "$ref" not in schema:
+                        raise ValueError(f"The {status} response of {operation_route} doesn't $ref a schema file")
+                    path = os.path.normpath(os.path.join(schema_directory, schema["$ref"]))
+                    validators[name.lower()] = self.validators.validator(schema_name(self.schemas_dir, path))
+            with self.responses_lock:
+                self.responses[key] = validators
+        return self.responses[key]
+
+    def route(self, method, path):
+        """Returns the operation a request is for, e.g. GET /v1/messages/{messageId}, or None if it isn't one"""
+        operation_route = route(method, path)
+        return operation_route if operation_route in self.operations else None
+
+    def validate(self, method, path, status, body, content_type=None):
+        """
+        Raises a SchemaValidationError if a response doesn't match the specification. body is the parsed
+        response, or None if it was empty. Returns the route of the operation, or None if the request isn't
+        for a documented operation, in which case it isn't checked.
+        """
+        operation_route = self.route(method, path)
+        if operation_route is None:
+            return None
+        validators = self.response_validators(operation_route, status)
+        if validators is None:
+            raise SchemaValidationError("", f"status {status} is not documented for {operation_route}")
+        if validators:
+            if body is None:
+                raise SchemaValidationError("", "must have a body")
+            validator = validators.get(media_type(content_type)) or next(iter(validators.values()))
+            validator(body)
+        return operation_route
+
+    def validate_response(self, response):
+        """Checks a requests Response, returning the route of its operation, or None if it isn't an API call"""
+        path = api_path(response.request.url)
+        if path is None or self.route(response.request.method, path) is None:
+            return None
+        try:
+            body = response.json() if response.content else None
+        except ValueError:
+            raise SchemaValidationError("", "response body is not json")
+        return self.validate(response.request.method, path, response.status_code, body,
+                             response.headers.get("Content-Type"))
+
+
+class ContractValidator():
+    def __init__(self, config, contract=None):
+        self.config = config
+        self.contract = contract or Contract.shared()
+        self.nodeid = None
+        self.violations = {}
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def __call__(self, request, response, exception, started, elapsed):
+        if response is None:
+            return
+        try:
+            checked = self.contract.validate_response(response) is not None
+            violation = None
+        except SchemaValidationError as e:
+            checked = True
+            violation = f"{request.method} {api_path(request.url)} {response.status_code}: {e}"
+        except (ValueError, KeyError) as e:
+            # the specification itself is broken, e.g. a response schema that can't be compiled, which must not
+            # break the request the test is making
+            checked = True
+            violation = f"{request.method} {api_path(request.url)} {response.status_code}: cannot check, {e!r}"
+
+        with self.lock:
+            self.counts["responses"] += checked
+            if violation is not None:
+                self.counts["violations"] += 1
+                self.violations.setdefault(self.nodeid, []).append(violation)
+
+    def is_worker(self):
+        return hasattr(self.config, "workerinput")
+
+    def pytest_sessionstart(self, session):
+        http_hooks.add_listener(self)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.nodeid = item.nodeid
+        yield
+        self.nodeid = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        # only the responses of the last rerun decide whether the test passes
+        with self.lock:
+            self.violations.pop(item.nodeid, None)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        outcome = yield
+        report = outcome.get_result()
+        if call.when != "call":
+            return
+        with self.lock:
+            violations = self.violations.get(item.nodeid)
+        if not violations:
+            return
+        message = "Responses don't match the specification:\n" + "\n".join(f"  {v}" for v in violations)
+        if report.passed:
+            report.outcome = "failed"
+            report.longrepr = message
+        else:
+            report.sections.append(("contract", message))
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        self.counts.update(getattr(node, "workeroutput", {}).get("contract_counts", {}))
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        http_hooks.remove_listener(self)
+        if self.is_worker():
+            self.config.workeroutput["contract_counts"] = dict(self.counts)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.is_worker():
+            return
+        terminalreporter.write_sep(
+            "-", f"contract: {self.counts['responses']} responses checked, {self.counts['violations']} mismatches")
+        for nodeid, violations in list(self.violations.items())[:SUMMARY_ROWS]:
+            terminalreporter.write_line(f"{nodeid or 'outside a test'}:")
+            for violation in violations:
+                terminalreporter.write_line(f"  {violation}")
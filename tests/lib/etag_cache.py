@@ -0,0 +1,66 @@
+import requests
+from collections import OrderedDict
+from threading import Lock
+from requests.structures import CaseInsensitiveDict
+
+# headers of a 304 that describe its own empty body rather than the cached one
+BODY_HEADERS = ["content-length", "content-type", "content-encoding", "transfer-encoding"]
+
+
+class EtagCache():
+    """
+    Client side store of GET responses that carried an ETag, so repeat requests
+    can be revalidated with If-None-Match and an unchanged resource costs
+    headers only.
+
+    Responses are kept in an LRU of at most max_size entries. A 304 is answered
+    with a new response holding the cached body and the cached headers updated
+    with those of the 304, so per-request headers such as X-Correlation-Id are
+    the ones just received.
+    """
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.responses = OrderedDict()
+        self.revalidations = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            resp = self.responses.get(key)
+            if resp is not None:
+                self.responses.move_to_end(key)
+            return resp
+
+    def put(self, key, resp):
+        with self.lock:
+            self.responses[key] = resp
+            self.responses.move_to_end(key)
+            while len(self.responses) > self.max_size:
+                self.responses.popitem(last=False)
+                self.evictions += 1
+
+    def revalidated(self, cached_resp, not_modified_resp):
+        """The response a 304 stands for: the cached body with the headers of both responses"""
+        with self.lock:
+            self.revalidations += 1
+
+        resp = requests.Response()
+        resp.status_code = cached_resp.status_code
+        resp.reason = cached_resp.reason
+        resp._content = cached_resp.content
+        resp.encoding = cached_resp.encoding
+        resp.headers = CaseInsensitiveDict(cached_resp.headers)
+        resp.headers.update({
+            name: value for name, value in not_modified_resp.headers.items() if name.lower() not in BODY_HEADERS
+        })
+        resp.url = not_modified_resp.url
+        resp.request = not_modified_resp.request
+        resp.elapsed = not_modified_resp.elapsed
+        resp.history = not_modified_resp.history
+        resp.cookies = not_modified_resp.cookies
+        return resp
+
+    def clear(self):
+        with self.lock:
+            self.responses.clear()
@@ -1,8 +1,10 @@
 import pytest
 import os
 from .authentication import AuthenticationCache
-from .app_keys import ensure_api_product_in_application, ensure_api_product_not_in_application
+from .app_keys import ensure_api_product_in_application, remove_api_product_from_application
 from .rate_limiting import RateLimiting
+from .message_cache import MessageCache
+from .etag_cache import EtagCache
 
 
 @pytest.fixture(scope='session')
@@ -25,41 +27,53 @@ def api_product_name():
         return os.environ['PROXY_NAME']
 
 
+# the shared resources plugin registered in conftest.py
+@pytest.fixture(scope='session')
+def shared_resources(pytestconfig):
+    return pytestconfig.pluginmanager.get_plugin("shared_resources")
+
+
 # define one of these for each key we have set up and intend to use
+#
+# the association is shared by every xdist worker in the run, so it is made by
+# the first worker to need it and removed once the whole run is over. Only the
+# key's api products are shared, and the teardown reads the key from key_env,
+# so no credentials end up in the shared state file
+def api_product_in_application(shared_resources, developer_app_keys_api, api_product_name,
+                               dev_email, app_name, key_env):
+    def setup():
+        app_key = ensure_api_product_in_application(
+            developer_app_keys_api, dev_email, app_name, os.environ[key_env], api_product_name)
+        return (app_key or {}).get('apiProducts')
+
+    shared = shared_resources.resource(f"{api_product_name}-{app_name}")
+    yield shared.acquire(setup, remove_api_product_from_application, dev_email, app_name, key_env, api_product_name)
+
+
 @pytest.fixture(scope='session')
-def api_product_in_comms_manager_local(developer_app_keys_api, api_product_name):
+def api_product_in_comms_manager_local(shared_resources, developer_app_keys_api, api_product_name):
     if api_product_name.startswith('communications-manager-pr-'):
-        yield ensure_api_product_in_application(
+        yield from api_product_in_application(
+                shared_resources,
                 developer_app_keys_api,
+                api_product_name,
                 'phillip.skinner2@nhs.net',
                 'Comms-manager-local',
-                os.environ['NON_PROD_API_KEY'],
-                api_product_name)
-        ensure_api_product_not_in_application(
-                developer_app_keys_api,
-                'phillip.skinner2@nhs.net',
-                'Comms-manager-local',
-                os.environ['NON_PROD_API_KEY'],
-                api_product_name)
+                'NON_PROD_API_KEY')
     else:
         yield None
 
 
 @pytest.fixture(scope='session')
-def api_product_in_nhs_notify_test_client_1(developer_app_keys_api, api_product_name):
+def api_product_in_nhs_notify_test_client_1(shared_resources, developer_app_keys_api, api_product_name):
     if api_product_name.startswith('communications-manager-pr-'):
-        yield ensure_api_product_in_application(
+        yield from api_product_in_application(
+                shared_resources,
                 developer_app_keys_api,
+                api_product_name,
                 'ian.hodges1@nhs.net',
                 'NHS Notify Test Client 1',
-                os.environ['NON_PROD_API_KEY_TEST_1'],
-                api_product_name)
-        ensure_api_product_not_in_application(
-                developer_app_keys_api,
-                'ian.hodges1@nhs.net',
-                'NHS Notify Test Client 1',
-                os.environ['NON_PROD_API_KEY_TEST_1'],
-                api_product_name)
+                'NON_PROD_API_KEY_TEST_1')
     else:
         yield None
 
@@ -92,8 +106,21 @@ def bearer_token_prod(authentication_cache):
     return authentication_cache.generate_authentication('prod')
 
 
+# terminal state messages are shared across the whole session, the cache is
+# keyed by message URL so it assumes a single client per session
+@pytest.fixture(scope='session')
+def message_cache():
+    return MessageCache()
+
+
+# responses revalidated with If-None-Match, keyed by URL and Authorization header
+@pytest.fixture(scope='session')
+def etag_cache():
+    return EtagCache()
+
+
 @pytest.fixture(scope='session')
 def rate_limiting(products_api, api_product_name, developer_apps_api):
-    rate_limiting = RateLimiting(products_api, developer_apps_api, api_product_name, 5)
+    rate_limiting = RateLimiting(products_api, developer_apps_api, api_product_name)
     yield rate_limiting
     rate_limiting.set_default_rate_limit()
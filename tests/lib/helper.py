@@ -5,11 +5,35 @@ from install_playwright import install
 from playwright.sync_api import expect, sync_playwright
 from lib.constants.messages_paths import MESSAGES_ENDPOINT
 from lib import error_handler
+from lib.etag_cache import EtagCache
 
 DEFAULT_CONTENT_TYPE = "application/vnd.api+json"
 
 
 class Helper():
+    @staticmethod
+    def conditional_get(url, headers, etag_cache=None):
+        """GETs url, revalidating the response cached in etag_cache with If-None-Match, if there is one"""
+        if etag_cache is None:
+            return requests.get(url, headers=headers)
+
+        cache_key = (url, headers.get("Authorization"))
+        cached_resp = etag_cache.get(cache_key)
+
+        request_headers = dict(headers)
+        if cached_resp is not None:
+            request_headers["If-None-Match"] = cached_resp.headers.get("ETag")
+
+        resp = requests.get(url, headers=request_headers)
+
+        if resp.status_code == 304 and cached_resp is not None:
+            return etag_cache.revalidated(cached_resp, resp)
+
+        if resp.status_code == 200 and resp.headers.get("ETag"):
+            etag_cache.put(cache_key, resp)
+
+        return resp
+
     @staticmethod
     def send_single_message(url, auth, body):
         resp = requests.post(f"{url}{MESSAGES_ENDPOINT}", headers={
@@ -23,37 +47,60 @@ class Helper():
         return resp
 
     @staticmethod
-    def get_message(url, auth, message_id):
-        resp = requests.get(f"{url}{MESSAGES_ENDPOINT}/{message_id}", headers={
+    def get_message(url, auth, message_id, cache=None, etag_cache=None):
+        message_url = f"{url}{MESSAGES_ENDPOINT}/{message_id}"
+
+        if cache is not None:
+            cached_resp = cache.get(message_url)
+            if cached_resp is not None:
+                return cached_resp
+
+        resp = Helper.conditional_get(message_url, headers={
             **auth,
             "Accept": DEFAULT_CONTENT_TYPE
-        })
+        }, etag_cache=etag_cache)
         error_handler.handle_retry(resp)
         assert resp.status_code == 200
+
+        if cache is not None:
+            cache.put(message_url, resp)
         return resp
 
     @staticmethod
-    def poll_get_message(url, auth, message_id, end_state="delivered", poll_time=300):
+    def poll_get_message(url, auth, message_id, end_state="delivered", poll_time=300, cache=None, etag_cache=None):
         message_status = None
+        message_url = f"{url}{MESSAGES_ENDPOINT}/{message_id}"
         end_time = int(time.time()) + poll_time
+        # polls revalidate the last response with If-None-Match even when the caller doesn't share a cache
+        if etag_cache is None:
+            etag_cache = EtagCache(max_size=1)
 
         while message_status != end_state and int(time.time()) < end_time:
-            get_message_response = requests.get(
-                f"{url}{MESSAGES_ENDPOINT}/{message_id}",
-                headers={
-                    **auth,
-                    "Accept": DEFAULT_CONTENT_TYPE
-                },
-            )
+            # a non-terminal message is still changing, so only terminal ones are served from the cache
+            get_message_response = cache.get(message_url, terminal_only=True) if cache is not None else None
+
+            if get_message_response is None:
+                get_message_response = Helper.conditional_get(
+                    message_url,
+                    headers={
+                        **auth,
+                        "Accept": DEFAULT_CONTENT_TYPE
+                    },
+                    etag_cache=etag_cache
+                )
+                if cache is not None and get_message_response.status_code == 200:
+                    cache.put(message_url, get_message_response)
 
             if get_message_response.status_code == 200:
                 message_status = get_message_response.json().get("data").get("attributes").get("messageStatus")
-            time.sleep(10)
 
             if message_status == "failed":
                 raise ValueError(f"Request ended up in an unexpected state. \
                                  Message status: {message_status}, Message ID: {message_id}")
 
+            if message_status != end_state:
+                time.sleep(10)
+
         if message_status != end_state:
             raise TimeoutError(f"Request took too long to be processed. \
                                Message status: {message_status}, Message ID: {message_id}")
@@ -0,0 +1,67 @@
+import math
+
+
+class Histogram():
+    """
+    A sparse HdrHistogram style recorder for integer values (e.g. latencies in
+    microseconds).
+
+    Values are stored in exponentially sized buckets, each split into linear
+    sub buckets, so every recorded value is kept to the requested number of
+    significant figures regardless of magnitude while memory stays bounded.
+    """
+    def __init__(self, significant_figures=3):
+        largest_value_with_single_unit_resolution = 2 * 10 ** significant_figures
+        self.sub_bucket_count_magnitude = (largest_value_with_single_unit_resolution - 1).bit_length()
+        self.counts = {}
+        self.total_count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def bucket_shift(self, value):
+        return max(0, value.bit_length() - self.sub_bucket_count_magnitude)
+
+    def lowest_equivalent_value(self, value):
+        shift = self.bucket_shift(value)
+        return (value >> shift) << shift
+
+    def highest_equivalent_value(self, value):
+        shift = self.bucket_shift(value)
+        return (((value >> shift) + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        value = max(0, int(value))
+        key = self.lowest_equivalent_value(value)
+        self.counts[key] = self.counts.get(key, 0) + count
+        self.total_count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total_count += other.total_count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def mean(self):
+        return self.total / self.total_count if self.total_count else 0
+
+    def value_at_percentile(self, percentile):
+        if self.total_count == 0:
+            return 0
+
+        target = max(1, math.ceil(percentile / 100 * self.total_count))
+        cumulative = 0
+        for key in sorted(self.counts):
+            cumulative += self.counts[key]
+            if cumulative >= target:
+                return min(self.highest_equivalent_value(key), self.max)
+        return self.max
+
+    def percentiles(self, percentiles=(50, 90, 99, 99.9)):
+        return {p: self.value_at_percentile(p) for p in percentiles}
@@ -0,0 +1,46 @@
+"""
+Every request made through the requests library (requests.get, requests.post,
+Session.request...) ends up in Session.send, so wrapping it once gives us a
+single place to observe all of the HTTP traffic made by Helper and the tests.
+
+Listeners are called with (request, response, exception, started, elapsed)
+where started is the wall clock time the request was sent and elapsed is the
+time taken in seconds. Exactly one of response and exception is set.
+"""
+import time
+import requests
+
+_listeners = []
+_original_send = requests.Session.send
+
+
+def _send(self, request, **kwargs):
+    if not _listeners:
+        return _original_send(self, request, **kwargs)
+
+    started = time.time()
+    start_counter = time.perf_counter()
+    try:
+        resp = _original_send(self, request, **kwargs)
+    except Exception as e:
+        _notify(request, None, e, started, time.perf_counter() - start_counter)
+        raise
+    _notify(request, resp, None, started, time.perf_counter() - start_counter)
+    return resp
+
+
+def _notify(request, response, exception, started, elapsed):
+    for listener in list(_listeners):
+        listener(request, response, exception, started, elapsed)
+
+
+def add_listener(listener):
+    requests.Session.send = _send
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+    if not _listeners:
+        requests.Session.send = _original_send
@@ -0,0 +1,211 @@
+"""
+Pytest plugin recording every HTTP request made during a test run against the
+test that made it, to show where the time in a run goes.
+
+Enable it with --http-profile=<file>. Each request made through the requests
+library (see lib/http_hooks.py) is recorded with its latency, bytes sent and
+received, status and whether it was made by a rerun of a failed test. Requests
+made while a fixture is being set up are attributed to that fixture.
+
+At the end of the run <file> is written as JSON, ranking endpoints, tests and
+fixtures by the time spent in HTTP calls, and the slowest of each are shown in
+the terminal summary. Each test also gets http_* properties in the JUnit report.
+
+Under xdist every worker records its own requests and sends them to the
+controller when it finishes, which writes the report.
+"""
+import json
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+import pytest
+from lib import http_hooks
+from lib.histogram import Histogram
+from lib.traffic import api_path, route
+
+REPORT_PERCENTILES = (50, 95, 99)
+SUMMARY_ROWS = 10
+
+
+def endpoint(method, url):
+    """Groups requests by route, e.g. GET /v1/messages/{messageId}, or host and path when not an API call"""
+    path = api_path(url)
+    if path is None:
+        split = urlsplit(url)
+        path = split.netloc + split.path
+    return route(method, path)
+
+
+def body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, bytes):
+        return len(body)
+    return 0
+
+
+def response_size(response):
+    if response is None:
+        return 0
+    length = response.headers.get("Content-Length")
+    return int(length) if length is not None else len(response.content)
+
+
+class Timing():
+    def __init__(self, name):
+        self.name = name
+        self.histogram = Histogram()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.rerun_requests = 0
+        self.statuses = Counter()
+
+    def record(self, record):
+        self.histogram.record(record["us"])
+        self.bytes_sent += record["sent"]
+        self.bytes_received += record["received"]
+        self.rerun_requests += 1 if record["attempt"] > 1 else 0
+        self.statuses[str(record["status"])] += 1
+
+    def seconds(self):
+        return self.histogram.total / 1e6
+
+    def to_dict(self, key):
+        summary = {
+            key: self.name,
+            "requests": self.histogram.total_count,
+            "seconds": round(self.seconds(), 3),
+            "mean_ms": round(self.histogram.mean() / 1000, 3),
+        }
+        for p, value in self.histogram.percentiles(REPORT_PERCENTILES).items():
+            summary[f"p{p}_ms"] = round(value / 1000, 3)
+        summary["max_ms"] = round((self.histogram.max or 0) / 1000, 3)
+        summary["bytes_sent"] = self.bytes_sent
+        summary["bytes_received"] = self.bytes_received
+        summary["rerun_requests"] = self.rerun_requests
+        summary["statuses"] = dict(self.statuses)
+        return summary
+
+
+def rank(records, key):
+    timings = {}
+    for record in records:
+        name = record[key]
+        if name is None:
+            continue
+        if name not in timings:
+            timings[name] = Timing(name)
+        timings[name].record(record)
+    return sorted(timings.values(), key=lambda timing: timing.seconds(), reverse=True)
+
+
+def build_report(records):
+    return {
+        "requests": len(records),
+        "seconds": round(sum(record["us"] for record in records) / 1e6, 3),
+        "endpoints": [timing.to_dict("endpoint") for timing in rank(records, "endpoint")],
+        "tests": [timing.to_dict("nodeid") for timing in rank(records, "nodeid")],
+        "fixtures": [timing.to_dict("fixture") for timing in rank(records, "fixture")],
+    }
+
+
+class HttpProfiler():
+    def __init__(self, config, path):
+        self.config = config
+        self.path = path
+        self.records = []
+        self.lock = threading.Lock()
+        self.attempts = Counter()
+        self.nodeid = None
+        self.fixtures = []
+        self.report = None
+
+    def __call__(self, request, response, exception, started, elapsed):
+        record = {
+            "nodeid": self.nodeid,
+            "fixture": self.fixtures[-1] if self.fixtures else None,
+            "endpoint": endpoint(request.method, request.url),
+            "status": response.status_code if response is not None else type(exception).__name__,
+            "us": int(elapsed * 1e6),
+            "sent": body_size(request.body),
+            "received": response_size(response),
+            "attempt": self.attempts[self.nodeid],
+        }
+        with self.lock:
+            self.records.append(record)
+
+    def is_worker(self):
+        return hasattr(self.config, "workerinput")
+
+    def pytest_sessionstart(self, session):
+        http_hooks.add_listener(self)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.nodeid = item.nodeid
+        yield
+        self.nodeid = None
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item):
+        # pytest-rerunfailures runs setup again for every rerun
+        self.attempts[item.nodeid] += 1
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        self.fixtures.append(fixturedef.argname)
+        try:
+            yield
+        finally:
+            self.fixtures.pop()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        if call.when == "teardown":
+            with self.lock:
+                records = [r for r in self.records if r["nodeid"] == item.nodeid and
+                           r["attempt"] == self.attempts[item.nodeid]]
+            properties = [
+                ("http_requests", len(records)),
+                ("http_seconds", round(sum(r["us"] for r in records) / 1e6, 3)),
+                ("http_bytes_sent", sum(r["sent"] for r in records)),
+                ("http_bytes_received", sum(r["received"] for r in records)),
+                ("http_attempt", self.attempts[item.nodeid]),
+            ]
+            # added before the report is made so they are copied into it, and so into the JUnit report. A rerun
+            # replaces the properties of the attempt before it rather than adding to them.
+            names = {name for name, _ in properties}
+            item.user_properties[:] = [p for p in item.user_properties if p[0] not in names] + properties
+        yield
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        self.records.extend(getattr(node, "workeroutput", {}).get("http_profile", []))
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        http_hooks.remove_listener(self)
+        if self.is_worker():
+            self.config.workeroutput["http_profile"] = self.records
+            return
+
+        self.report = build_report(self.records)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.report, f, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.report is None:
+            return
+
+        report = self.report
+        terminalreporter.write_sep("-", f"http profile: {report['requests']} requests, {report['seconds']}s")
+        for title, key in [("endpoints", "endpoint"), ("tests", "nodeid"), ("fixtures", "fixture")]:
+            terminalreporter.write_line(f"slowest {title}:")
+            for row in report[title][:SUMMARY_ROWS]:
+                terminalreporter.write_line(
+                    f"  {row['seconds']:>9.3f}s {row['requests']:>6} requests "
+                    f"p95 {row['p95_ms']:>9.3f}ms {row['rerun_requests']:>4} in reruns  {row[key]}"
+                )
+        terminalreporter.write_line(f"full report written to {self.path}")
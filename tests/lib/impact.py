@@ -0,0 +1,469 @@
+"""
+Selects the tests affected by a change to the proxy, sandbox or specification.
+
+Each test file is reduced to the API paths it calls, found statically (endpoint
+constants and path literals in the test and in the lib modules it uses) and,
+once recorded, from the requests it actually made. Each source file is reduced
+to the paths it takes part in handling:
+
+  * proxy flow partials, and the policies and JavaScript resources only used by
+    them, to the MatchesPath patterns of their flows. Anything else under
+    proxies/ (pre/post flows, fault rules and the policies they use) affects
+    every path.
+  * sandbox handlers, and the modules and data directories they use, to the
+    sandbox routes they serve. The proxy paths that reach a route are found
+    from the requestpath each flow sends to the backend.
+  * specification files to the API paths that reference them.
+
+A test is selected when it or a source file with a path it calls has changed.
+Changes to files nothing is known about (tests/lib, conftest.py, pyproject.toml
+...) select every test, changes to documentation select none.
+
+    PYTHONPATH=./tests python -m lib.impact --base origin/main tests/sandbox
+
+prints the test files to run, or the given directories if everything is
+affected. Static paths are cached in .test-impact.json by file hash so only
+changed test files are re-read, and running pytest with --record-impact adds
+the paths each test file called to the same file.
+"""
+import argparse
+import ast
+import fnmatch
+import glob
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import pytest
+from lib import http_hooks
+from lib.traffic import api_path, is_api_path, route
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MAP_FILE = os.path.join(ROOT_DIR, ".test-impact.json")
+MAP_VERSION = 1
+
+EVERYTHING = "**"
+TIERS = ("sandbox", "live")
+TEST_FILE_PATTERNS = ("test_*.py", "*_tests.py")
+IGNORED_PATTERNS = [
+    "*.md", "*.rst", "docs/*", "tests/docs/*", ".github/*", "postman/*",
+    "specification/documentation/*", "sandbox/__test__/*", "sandbox/.*",
+]
+CONSTANT_MODULES = [
+    "lib.constants.constants",
+    "lib.constants.messages_paths",
+    "lib.constants.message_batches_paths",
+    "lib.constants.nhsapp_accounts_paths",
+    "lib.constants.shared_paths",
+]
+PATH_LITERAL = re.compile(r"[\"'](/(?:v1/|channels/|_)[^\"'{}\s?]*)")
+
+
+def relative(path):
+    return os.path.relpath(path, ROOT_DIR).replace(os.sep, "/")
+
+
+def read(path):
+    with open(os.path.join(ROOT_DIR, path), encoding="utf-8") as f:
+        return f.read()
+
+
+def sha(path):
+    with open(os.path.join(ROOT_DIR, path), "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def is_test_file(path):
+    name = os.path.basename(path)
+    return path.startswith("tests/") and any(fnmatch.fnmatch(name, p) for p in TEST_FILE_PATTERNS)
+
+
+def test_tiers(path):
+    if path.startswith("tests/sandbox/"):
+        return {"sandbox"}
+    if path.count("/") == 1:
+        # tests/test_endpoints.py runs against every environment
+        return set(TIERS)
+    return {"live"}
+
+
+def matches_path(value, pattern):
+    """Apigee's MatchesPath operator, where a {name} segment, as in "/v1/messages/{messageId}", matches like *"""
+    regex = ""
+    for part in re.split(r"(\*\*|\*|\{[^/{}]*\})", pattern):
+        if part == "**":
+            regex += ".*"
+        elif part == "*" or part.startswith("{"):
+            regex += "[^/]*"
+        else:
+            regex += re.escape(part)
+    return re.fullmatch(regex + "/?", value) is not None
+
+
+def matches(path, pattern):
+    return pattern == EVERYTHING or matches_path(path, pattern)
+
+
+def sample(pattern):
+    """A path matched by pattern, e.g. /v1/messages/x for /v1/messages/{messageId}"""
+    return re.sub(r"\{[^/]*\}|:\w+|\*\*?", "x", pattern)
+
+
+class TestPaths():
+    """Finds the API paths called by test files"""
+    def __init__(self):
+        self.constants = {}
+        for module in CONSTANT_MODULES:
+            for name, value in vars(importlib.import_module(module)).items():
+                values = value if isinstance(value, list) else [value]
+                paths = [v for v in values if isinstance(v, str) and is_api_path(v)]
+                if paths and name.isupper():
+                    self.constants[name] = paths
+        self.modules = {}
+
+    def source_paths(self, source):
+        # "/v1/messages/" is what is left of f"/v1/messages/{message_id}"
+        paths = {p + "x" if p.endswith("/") else p for p in PATH_LITERAL.findall(source)}
+        for name, values in self.constants.items():
+            if re.search(rf"\b{name}\b", source):
+                paths.update(values)
+                # e.g. f"{MESSAGES_ENDPOINT}/{message_id}"
+                if re.search(rf"\b{name}\}}?\s*(\+\s*[\"'])?/", source):
+                    paths.update(f"{value}/x" for value in values)
+        return paths
+
+    def lib_paths(self, name):
+        """
+        Paths requested by a lib module, or the lib module exporting name. Paths
+        in modules that only check responses (Assertions) are not requests.
+        """
+        if name not in self.modules:
+            self.modules[name] = set()
+            module = importlib.import_module("lib")
+            target = getattr(module, name, None)
+            module_name = getattr(target, "__module__", None) or f"lib.{name}"
+            spec = importlib.util.find_spec(module_name) if module_name.startswith("lib") else None
+            if spec is not None and spec.origin and spec.origin.endswith(".py"):
+                with open(spec.origin, encoding="utf-8") as f:
+                    source = f.read()
+                if re.search(r"^(import|from) requests\b", source, re.MULTILINE):
+                    self.modules[name] = self.source_paths(source)
+        return self.modules[name]
+
+    def paths(self, path):
+        source = read(path)
+        paths = self.source_paths(source)
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] == "lib":
+                if node.module == "lib":
+                    names = [alias.name for alias in node.names if alias.name != "*"]
+                else:
+                    names = [node.module.split(".", 1)[1]]
+                for name in names:
+                    paths.update(self.lib_paths(name))
+        return sorted(paths)
+
+
+class SourceIndex():
+    """Maps proxy, sandbox and specification files to the paths they handle"""
+    def __init__(self):
+        self.proxy = {}
+        self.backend = {}
+        self.flows = []
+        self.index_proxy()
+        self.index_sandbox()
+        self.spec = {}
+        self.index_specification()
+
+    # proxy
+
+    def index_proxy(self):
+        policies = {}
+        for path in glob.glob(os.path.join(ROOT_DIR, "proxies/shared/policies/*.xml")):
+            match = re.search(r"<\w+[^>]*\sname=\"([^\"]+)\"", read(relative(path)))
+            if match:
+                policies[match.group(1)] = relative(path)
+
+        users = {}
+        for path in glob.glob(os.path.join(ROOT_DIR, "proxies/*/apiproxy/**/*.xml"), recursive=True) + \
+                glob.glob(os.path.join(ROOT_DIR, "proxies/shared/partials/*.xml")):
+            path = relative(path)
+            source = read(path)
+            steps = re.findall(r"<Name>\s*([^<\s]+)\s*</Name>", source)
+            patterns = [EVERYTHING]
+            if os.path.basename(path).startswith("Partial.Flows."):
+                patterns = re.findall(r"MatchesPath\s+\"([^\"]+)\"", source) or [EVERYTHING]
+                self.flows.append({
+                    "patterns": patterns,
+                    "requestpath": self.flow_requestpath([policies.get(step) for step in steps]),
+                })
+            self.proxy[path] = set(patterns)
+            for step in steps:
+                users.setdefault(step, set()).update(patterns)
+
+        for name, path in policies.items():
+            self.proxy[path] = set(users.get(name, set()))
+            for resource in re.findall(r"jsc://([^<\s]+)", read(path)):
+                resource_path = f"proxies/shared/resources/jsc/{resource}"
+                self.proxy.setdefault(resource_path, set()).update(self.proxy[path])
+
+    @staticmethod
+    def flow_requestpath(policy_paths):
+        for path in policy_paths:
+            if path is None:
+                continue
+            match = re.search(r"<Name>requestpath</Name>\s*<(?:Value|Template)>([^<]*)<", read(path))
+            if match and match.group(1):
+                return match.group(1)
+        return None
+
+    def backend_paths(self, path):
+        """The sandbox paths a proxy path is sent to"""
+        paths = set()
+        for flow in self.flows:
+            if flow["requestpath"] and any(matches(path, p) for p in flow["patterns"]):
+                paths.add(sample(flow["requestpath"]))
+        return paths or {path}
+
+    # sandbox
+
+    def index_sandbox(self):
+        handler_files = dict(re.findall(r"export \{ (\w+) \} from \"\./([^\"]+)\"", read("sandbox/handlers/index.js")))
+        routes = re.findall(r"app\.\w+\(\"([^\"]+)\",\s*handlers\.(\w+)\)", read("sandbox/app.js"))
+        for route_path, handler in routes:
+            pattern = re.sub(r":(\w+)", r"{\1}", route_path)
+            for path in self.sandbox_closure(f"sandbox/handlers/{handler_files[handler]}"):
+                self.backend.setdefault(path, set()).add(pattern)
+
+    def sandbox_closure(self, path, seen=None):
+        seen = seen if seen is not None else set()
+        if path in seen or not os.path.isfile(os.path.join(ROOT_DIR, path)):
+            return seen
+        seen.add(path)
+        source = read(path)
+        for imported in re.findall(r"from\s+[\"'](\.{1,2}/[^\"']+)[\"']", source):
+            self.sandbox_closure(os.path.normpath(os.path.join(os.path.dirname(path), imported)), seen)
+        # data read from directories relative to the sandbox, e.g. `./messages/${messageId}.json`
+        for directory in re.findall(r"[\"'`]\./([\w\-]+)/", source):
+            if os.path.isdir(os.path.join(ROOT_DIR, "sandbox", directory)):
+                seen.add(f"sandbox/{directory}/")
+        return seen
+
+    # specification
+
+    def index_specification(self):
+        root = "specification/communications-manager.yaml"
+        paths_section = read(root).split("\npaths:", 1)[-1]
+        current = None
+        for line in paths_section.splitlines():
+            match = re.match(r"^  (/[^:]+):", line)
+            if match:
+                current = match.group(1)
+            elif re.match(r"^\S", line):
+                current = None
+            ref = re.search(r"\$ref:\s*['\"]?([^'\"#\s]+)", line)
+            if current and ref:
+                for path in self.spec_closure(os.path.normpath(os.path.join("specification", ref.group(1)))):
+                    self.spec.setdefault(path, set()).add(current)
+
+    def spec_closure(self, path, seen=None):
+        seen = seen if seen is not None else set()
+        if path in seen or not os.path.isfile(os.path.join(ROOT_DIR, path)):
+            return seen
+        seen.add(path)
+        for ref in re.findall(r"\$ref:\s*['\"]?([^'\"#\s]+)", read(path)):
+            self.spec_closure(os.path.normpath(os.path.join(os.path.dirname(path), ref)), seen)
+        return seen
+
+    # impact
+
+    def impact(self, path):
+        """
+        Returns [(tiers, kind, patterns)] for a changed file, where kind is
+        "proxy" or "backend" depending on which paths the patterns match, [] if
+        it cannot affect any test and None if it is not known.
+        """
+        if any(fnmatch.fnmatch(path, p) for p in IGNORED_PATTERNS):
+            return []
+
+        if path.startswith("proxies/") and not path.startswith("proxies/utils/"):
+            tiers = set(TIERS) if path.startswith("proxies/shared/") else {path.split("/")[1]}
+            if path in self.proxy:
+                return [(tiers, "proxy", self.proxy[path])]
+            return [(tiers, "proxy", {EVERYTHING})]
+
+        if path.startswith("sandbox/"):
+            patterns = set(self.backend.get(path, set()))
+            for directory in self.backend:
+                if directory.endswith("/") and path.startswith(directory):
+                    patterns.update(self.backend[directory])
+            return [({"sandbox"}, "backend", patterns or {EVERYTHING})]
+
+        if path.startswith("specification/"):
+            return [(set(TIERS), "proxy", self.spec.get(path, {EVERYTHING}))]
+
+        return None
+
+
+class ImpactMap():
+    """The API paths each test file calls, cached in MAP_FILE"""
+    def __init__(self, path=MAP_FILE):
+        self.path = path
+        self.tests = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MAP_VERSION:
+                self.tests = data["tests"]
+
+    def update(self, test_files, test_paths=None):
+        """Re-reads test files that have changed since they were cached"""
+        for path in test_files:
+            digest = sha(path)
+            entry = self.tests.setdefault(path, {"recorded": []})
+            if entry.get("sha") != digest:
+                test_paths = test_paths or TestPaths()
+                entry["sha"] = digest
+                entry["paths"] = test_paths.paths(path)
+        for path in set(self.tests) - set(test_files):
+            del self.tests[path]
+
+    def record(self, recorded):
+        for path, paths in recorded.items():
+            self.tests.setdefault(path, {"recorded": []})["recorded"] = sorted(paths)
+
+    def paths(self, path):
+        entry = self.tests.get(path, {})
+        return set(entry.get("paths", [])) | set(entry.get("recorded", []))
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": MAP_VERSION, "tests": self.tests}, f, indent=1, sort_keys=True)
+
+
+def find_test_files(directories):
+    files = set()
+    for directory in directories:
+        for pattern in TEST_FILE_PATTERNS:
+            found = glob.glob(os.path.join(ROOT_DIR, directory, "**", pattern), recursive=True)
+            files.update(relative(p) for p in found)
+    return sorted(f for f in files if "/docs/" not in f)
+
+
+def changed_files(base):
+    output = subprocess.check_output(["git", "diff", "--name-only", base], cwd=ROOT_DIR, text=True)
+    return [line for line in output.splitlines() if line]
+
+
+def select(changed, test_files, impact_map, index, explain=None):
+    """Returns the affected test files, or None if every test is affected"""
+    explain = explain or (lambda message: None)
+    selected = set()
+    impacts = []
+    for path in changed:
+        if path in test_files:
+            explain(f"{path}: changed")
+            selected.add(path)
+        elif path.startswith("tests/") and os.path.basename(path) == "conftest.py":
+            directory = os.path.dirname(path) + "/"
+            explain(f"{path}: every test under {directory}")
+            selected.update(f for f in test_files if f.startswith(directory))
+        elif is_test_file(path):
+            continue
+        else:
+            impact = index.impact(path)
+            if impact is None:
+                explain(f"{path}: unknown file, every test is affected")
+                return None
+            impacts.extend((path, tiers, kind, patterns) for tiers, kind, patterns in impact)
+
+    for test_file in test_files:
+        if test_file in selected:
+            continue
+        tiers = test_tiers(test_file)
+        paths = impact_map.paths(test_file)
+        backend = set().union(*[index.backend_paths(p) for p in paths]) if paths else set()
+        for path, impact_tiers, kind, patterns in impacts:
+            if not tiers & impact_tiers:
+                continue
+            candidates = paths if kind == "proxy" else backend
+            # a test that calls no paths we know of is affected by anything in its tiers
+            if not candidates or any(matches(c, p) for c in candidates for p in patterns):
+                explain(f"{test_file}: {path}")
+                selected.add(test_file)
+                break
+    return sorted(selected)
+
+
+class ImpactRecorder():
+    """Records the API paths each test file calls, enabled with --record-impact"""
+    def __init__(self, config):
+        self.config = config
+        self.recorded = {}
+        self.current = None
+        self.lock = threading.Lock()
+
+    def __call__(self, request, response, exception, started, elapsed):
+        path = api_path(request.url)
+        if path is None or self.current is None:
+            return
+        with self.lock:
+            self.recorded.setdefault(self.current, set()).add(route("", path).strip())
+
+    def pytest_sessionstart(self, session):
+        http_hooks.add_listener(self)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self.current = relative(str(item.path))
+        yield
+        self.current = None
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        for path, paths in getattr(node, "workeroutput", {}).get("impact", {}).items():
+            self.recorded.setdefault(path, set()).update(paths)
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        http_hooks.remove_listener(self)
+        if hasattr(self.config, "workerinput"):
+            self.config.workeroutput["impact"] = {k: sorted(v) for k, v in self.recorded.items()}
+            return
+
+        impact_map = ImpactMap()
+        impact_map.record(self.recorded)
+        impact_map.save()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Prints the test files affected by a change")
+    parser.add_argument("directories", nargs="*", default=["tests"], help="Only select tests in these directories")
+    parser.add_argument("--base", default="origin/main", help="Git ref to diff against")
+    parser.add_argument("--changed", nargs="*", help="Use these changed files instead of a git diff")
+    parser.add_argument("--explain", action="store_true", help="Print why each test was selected to stderr")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    changed = args.changed if args.changed is not None else changed_files(args.base)
+
+    test_files = find_test_files(args.directories)
+    impact_map = ImpactMap()
+    impact_map.update(find_test_files(["tests"]))
+    impact_map.save()
+
+    explain = (lambda message: print(message, file=sys.stderr)) if args.explain else None
+    selected = select(changed, test_files, impact_map, SourceIndex(), explain)
+    for path in args.directories if selected is None else selected:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
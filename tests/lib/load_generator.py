@@ -0,0 +1,283 @@
+"""
+Open-loop load generator for the create message, create message batch and get
+message endpoints.
+
+Requests are scheduled at a constant arrival rate regardless of how quickly the
+API responds. Latency is measured from the time each request was scheduled to
+be sent, not from when a worker became free to send it, so a slow API shows up
+in the percentiles instead of silently lowering the request rate
+(coordinated omission).
+
+Usage (from the repository root):
+
+    PYTHONPATH=./tests python -m lib.load_generator --url http://localhost:9000 --local-sandbox \
+        --scenario messages --rate 50 --duration 30
+
+    PYTHONPATH=./tests python -m lib.load_generator --url https://internal-dev.api.service.nhs.uk/comms-pr-123 \
+        --auth-env internal-dev --environment dev --scenario messages --scenario get-message --rate 5
+
+With --validate every request body is checked against its schema in
+specification/schemas, and every response against the specification of its
+operation (see lib/contract.py), after the response is timed. A request or
+response that doesn't match is recorded with the SchemaValidationError status,
+and one that can't be checked with the type of the error, e.g. ValueError.
+--validate-sample checks only that fraction of the requests, picked at random.
+"""
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from lib.authentication import AuthenticationCache
+from lib.payload_factory import PayloadFactory
+from lib.schema_validators import SchemaValidationError, SchemaValidators
+from lib.histogram import Histogram
+from lib.constants.messages_paths import MESSAGES_ENDPOINT
+from lib.constants.message_batches_paths import MESSAGE_BATCHES_ENDPOINT
+from lib.constants.constants import DEFAULT_CONTENT_TYPE
+
+SANDBOX_MESSAGE_ID = "2WL3qFTEFM0qMY8xjRbt1LIKCzM"
+
+# the sandbox backend is served on /api/*, the proxy rewrites to these paths
+PROXY_PATHS = {
+    "messages": MESSAGES_ENDPOINT,
+    "message-batches": MESSAGE_BATCHES_ENDPOINT,
+    "get-message": MESSAGES_ENDPOINT + "/{message_id}",
+}
+LOCAL_SANDBOX_PATHS = {
+    "messages": "/api/v1/messages",
+    "message-batches": "/api/v1/send",
+    "get-message": "/api/v1/messages/{message_id}",
+}
+REQUEST_SCHEMAS = {
+    "messages": "requests/CreateMessage",
+    "message-batches": "requests/CreateMessageBatch",
+}
+SCENARIOS = list(PROXY_PATHS.keys())
+REPORT_PERCENTILES = (50, 75, 90, 99, 99.9, 99.99)
+
+
+class LoadResult():
+    def __init__(self):
+        self.latency = Histogram()
+        self.service_time = Histogram()
+        self.statuses = Counter()
+        self.scenarios = Counter()
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def record(self, scenario, status, latency_us, service_time_us):
+        with self.lock:
+            self.latency.record(latency_us)
+            self.service_time.record(service_time_us)
+            self.statuses[status] += 1
+            self.scenarios[scenario] += 1
+
+    def elapsed(self):
+        return self.finished_at - self.started_at
+
+    def throughput(self):
+        elapsed = self.elapsed()
+        return self.latency.total_count / elapsed if elapsed > 0 else 0
+
+    def to_dict(self):
+        return {
+            "requests": self.latency.total_count,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "throughput_rps": round(self.throughput(), 2),
+            "latency_ms": histogram_summary(self.latency),
+            "service_time_ms": histogram_summary(self.service_time),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items(), key=lambda i: str(i[0]))},
+            "scenarios": dict(self.scenarios),
+        }
+
+
+def histogram_summary(histogram):
+    summary = {f"p{p:g}": round(v / 1000, 3) for p, v in histogram.percentiles(REPORT_PERCENTILES).items()}
+    summary["mean"] = round(histogram.mean() / 1000, 3)
+    summary["max"] = round((histogram.max or 0) / 1000, 3)
+    return summary
+
+
+class LoadGenerator():
+    def __init__(self, url, scenarios, rate, duration, environment="sandbox", auth_env=None,
+                 authentication_cache=None, local_sandbox=False, message_id=SANDBOX_MESSAGE_ID,
+                 max_workers=64, timeout=30, validate=False, validate_sample=1.0):
+        self.url = url.rstrip("/")
+        self.scenarios = scenarios
+        self.rate = rate
+        self.duration = duration
+        self.environment = environment
+        self.payloads = PayloadFactory(environment)
+        self.auth_env = auth_env
+        self.authentication_cache = authentication_cache or AuthenticationCache()
+        self.paths = LOCAL_SANDBOX_PATHS if local_sandbox else PROXY_PATHS
+        self.message_id = message_id
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.local = threading.local()
+        self.validators = SchemaValidators.shared() if validate else None
+        self.contract = None
+        if validate:
+            # imported here as lib.contract imports lib.traffic, which imports this module
+            from lib.contract import Contract
+            self.contract = Contract.shared()
+        self.validate_sample = validate_sample
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def auth(self):
+        if self.auth_env is None:
+            return {}
+        # tokens only live for a few minutes, the cache refreshes them as the run goes on
+        return {"Authorization": self.authentication_cache.generate_authentication(self.auth_env).value}
+
+    def build_request(self, scenario):
+        headers = {
+            **self.auth(),
+            "Accept": DEFAULT_CONTENT_TYPE,
+        }
+        path = self.paths[scenario]
+
+        if scenario == "get-message":
+            return "GET", f"{self.url}{path.format(message_id=self.message_id)}", headers, None
+
+        if scenario == "messages":
+            body = self.payloads.message_body()
+        else:
+            body = self.payloads.message_batch_body()
+
+        headers["Content-Type"] = DEFAULT_CONTENT_TYPE
+        return "POST", f"{self.url}{path}", headers, body
+
+    def validate(self, scenario, body, resp):
+        """Checks the request body against its schema, and the response against the specification"""
+        if scenario in REQUEST_SCHEMAS:
+            self.validators.validate(REQUEST_SCHEMAS[scenario], json.loads(body))
+        # the local sandbox serves other paths, the contract is for those of the proxy
+        path = PROXY_PATHS[scenario].format(message_id=self.message_id)
+        try:
+            response_body = resp.json() if resp.content else None
+        except ValueError:
+            raise SchemaValidationError("", "response body is not json")
+        self.contract.validate(resp.request.method, path, resp.status_code, response_body,
+                               resp.headers.get("Content-Type"))
+
+    def execute(self, scenario, intended_start, result):
+        method, url, headers, body = self.build_request(scenario)
+        actual_start = time.perf_counter()
+        resp = None
+        try:
+            resp = self.session().request(method, url, headers=headers, data=body, timeout=self.timeout)
+            status = resp.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+
+        if self.validators is not None and resp is not None and random.random() < self.validate_sample:
+            try:
+                self.validate(scenario, body, resp)
+            except (SchemaValidationError, ValueError, KeyError) as e:
+                # a specification that can't be checked, e.g. a schema that can't be compiled, is recorded by the
+                # type of its error rather than losing the request
+                status = type(e).__name__
+
+        result.record(
+            scenario,
+            status,
+            (finished - intended_start) * 1_000_000,
+            (finished - actual_start) * 1_000_000
+        )
+
+    def run(self):
+        result = LoadResult()
+        total = int(self.rate * self.duration)
+        scenarios = itertools.cycle(self.scenarios)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            result.started_at = time.perf_counter()
+            for i in range(total):
+                intended_start = result.started_at + i / self.rate
+                delay = intended_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.execute, next(scenarios), intended_start, result)
+
+        result.finished_at = time.perf_counter()
+        return result
+
+
+def format_report(result):
+    report = result.to_dict()
+    lines = [
+        f"Requests:   {report['requests']} in {report['elapsed_seconds']}s "
+        f"({report['throughput_rps']} req/s)",
+        "Scenarios:  " + ", ".join(f"{k}={v}" for k, v in report["scenarios"].items()),
+        "",
+        f"{'':<10}{'latency (ms)':>16}{'service time (ms)':>20}",
+    ]
+    for key in report["latency_ms"]:
+        lines.append(f"{key:<10}{report['latency_ms'][key]:>16}{report['service_time_ms'][key]:>20}")
+    lines.append("")
+    lines.append("Status codes:")
+    for status, count in report["statuses"].items():
+        lines.append(f"  {status:<24}{count:>8}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the communications manager API")
+    parser.add_argument("--url", required=True, help="base url of the proxy, or of the sandbox with --local-sandbox")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="scenario to run, repeat to interleave scenarios (default: messages)")
+    parser.add_argument("--rate", type=float, default=10, help="arrival rate in requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="duration of the run in seconds")
+    parser.add_argument("--environment", default="sandbox", choices=["sandbox", "dev", "int", "prod"],
+                        help="environment used to pick the routing plan for generated bodies")
+    parser.add_argument("--auth-env", help="AuthenticationCache environment used to sign requests, e.g. internal-dev")
+    parser.add_argument("--local-sandbox", action="store_true", help="target a sandbox server directly (/api/* paths)")
+    parser.add_argument("--message-id", default=SANDBOX_MESSAGE_ID, help="message id used by the get-message scenario")
+    parser.add_argument("--max-workers", type=int, default=64, help="maximum number of requests in flight")
+    parser.add_argument("--validate", action="store_true",
+                        help="check requests and responses against the specification")
+    parser.add_argument("--validate-sample", type=float, default=1.0,
+                        help="fraction of the requests to check with --validate, e.g. 0.1")
+    parser.add_argument("--json", dest="json_output", help="write the report as json to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    generator = LoadGenerator(
+        args.url,
+        args.scenario or ["messages"],
+        args.rate,
+        args.duration,
+        environment=args.environment,
+        auth_env=args.auth_env,
+        local_sandbox=args.local_sandbox,
+        message_id=args.message_id,
+        max_workers=args.max_workers,
+        validate=args.validate,
+        validate_sample=args.validate_sample
+    )
+    result = generator.run()
+
+    print(format_report(result))
+
+    if args.json_output:
+        with open(args.json_output, "w") as f:
+            json.dump(result.to_dict(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+TERMINAL_MESSAGE_STATUSES = ["delivered", "failed"]
+
+
+class MessageCache():
+    """
+    Client side cache of GET /v1/messages/{messageId} responses.
+
+    Messages in a terminal state (delivered or failed) no longer change, so they
+    are kept for the lifetime of the cache. Anything else is kept for ttl seconds
+    in an LRU of at most max_size entries.
+    """
+    def __init__(self, ttl=5, max_size=1000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.terminal = {}
+        self.transient = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def message_status(resp):
+        return resp.json().get("data").get("attributes").get("messageStatus")
+
+    def get(self, key, terminal_only=False):
+        """
+        Returns the cached response for key, or None. With terminal_only the
+        response is only returned if the message has reached a terminal state,
+        for callers waiting for a message's status to change.
+        """
+        with self.lock:
+            resp = self.terminal.get(key)
+            if resp is not None:
+                self.hits += 1
+                return resp
+
+            entry = None if terminal_only else self.transient.get(key)
+            if entry is not None:
+                resp, expires_at = entry
+                if expires_at > self.clock():
+                    self.transient.move_to_end(key)
+                    self.hits += 1
+                    return resp
+                del self.transient[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, resp):
+        terminal = self.message_status(resp) in TERMINAL_MESSAGE_STATUSES
+        with self.lock:
+            self.transient.pop(key, None)
+            if terminal:
+                self.terminal[key] = resp
+                return
+
+            self.transient[key] = (resp, self.clock() + self.ttl)
+            while len(self.transient) > self.max_size:
+                self.transient.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.terminal.clear()
+            self.transient.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "terminal_entries": len(self.terminal),
+                "transient_entries": len(self.transient)
+            }
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import requests
+from lib.constants.nhsapp_accounts_paths import NHSAPP_ACCOUNTS_ENDPOINT, ODS_CODE_PARAM_NAME, PAGE_PARAM_NAME
+
+DEFAULT_CONTENT_TYPE = "application/vnd.api+json"
+RETRYABLE_STATUS_CODES = [429, 502]
+
+
+class NhsAppAccountsPaginator():
+    """
+    Streams every account for an ODS code from GET /channels/nhsapp/accounts.
+
+    Page 1 is fetched first to discover the last page from links.last, the
+    remaining pages are then prefetched concurrently (at most max_workers
+    requests in flight) while accounts are yielded in page order. Each thread
+    fetching pages has a requests.Session of its own, as sessions aren't
+    thread safe.
+
+    Usable as both an iterator and an async iterator:
+
+        for account in NhsAppAccountsPaginator(url, auth, "T00001"):
+            ...
+
+        async for account in NhsAppAccountsPaginator(url, auth, "T00001"):
+            ...
+    """
+    def __init__(self, url, auth, ods_code, max_workers=4, max_retries=5, retry_delay=1):
+        self.url = f"{url}{NHSAPP_ACCOUNTS_ENDPOINT}"
+        self.auth = auth
+        self.ods_code = ods_code
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.last_page = None
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def fetch_page(self, page):
+        for attempt in range(self.max_retries + 1):
+            resp = self.session.get(self.url, headers={
+                **self.auth,
+                "Accept": DEFAULT_CONTENT_TYPE
+            }, params={
+                ODS_CODE_PARAM_NAME: self.ods_code,
+                PAGE_PARAM_NAME: page
+            })
+
+            if resp.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                break
+
+            time.sleep(self.retry_after(resp, attempt))
+
+        assert resp.status_code == 200, f"Page {page} - Response: {resp.status_code}: {resp.text}"
+        return resp.json()
+
+    def retry_after(self, resp, attempt):
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            return int(retry_after)
+        return self.retry_delay * (2 ** attempt)
+
+    @staticmethod
+    def extract_last_page(response):
+        last_link = response.get("links").get("last")
+        return int(parse_qs(urlparse(last_link).query)[PAGE_PARAM_NAME][0])
+
+    @staticmethod
+    def extract_accounts(response):
+        return response.get("data").get("attributes").get("accounts")
+
+    def __iter__(self):
+        first_page = self.fetch_page(1)
+        self.last_page = self.extract_last_page(first_page)
+        yield from self.extract_accounts(first_page)
+
+        # shut down without waiting, as waiting would block until any pages still in flight when iteration stops
+        # early have been fetched
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        in_flight = deque()
+        try:
+            pages = iter(range(2, self.last_page + 1))
+
+            for page in pages:
+                in_flight.append(executor.submit(self.fetch_page, page))
+                if len(in_flight) == self.max_workers:
+                    break
+
+            while in_flight:
+                response = in_flight.popleft().result()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    in_flight.append(executor.submit(self.fetch_page, next_page))
+                yield from self.extract_accounts(response)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        # as above, but waiting would block the event loop
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        in_flight = deque()
+        try:
+            first_page = await loop.run_in_executor(executor, self.fetch_page, 1)
+            self.last_page = self.extract_last_page(first_page)
+            for account in self.extract_accounts(first_page):
+                yield account
+
+            pages = iter(range(2, self.last_page + 1))
+
+            for page in pages:
+                in_flight.append(loop.run_in_executor(executor, self.fetch_page, page))
+                if len(in_flight) == self.max_workers:
+                    break
+
+            while in_flight:
+                response = await in_flight.popleft()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    in_flight.append(loop.run_in_executor(executor, self.fetch_page, next_page))
+                for account in self.extract_accounts(response):
+                    yield account
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
@@ -0,0 +1,74 @@
+import itertools
+import json
+import uuid
+from lib.generators import Generators
+
+REFERENCE_SLOT = "__REFERENCE_SLOT__"
+MESSAGES_SLOT = "__MESSAGES_SLOT__"
+
+
+class PayloadFactory():
+    """
+    Stamps out serialised create message and create message batch bodies.
+
+    The bodies returned by Generators are serialised once per environment with
+    a placeholder in place of each reference, and split into byte templates
+    either side of it. Every body after that is the templates joined around
+    fresh references, so no dicts are built and json.dumps is never called.
+
+    References are uuid shaped: a random prefix per factory followed by a
+    counter, which is unique per factory and much cheaper than uuid1/uuid4.
+    """
+    def __init__(self, environment="sandbox"):
+        self.environment = environment
+        self.reference_prefix = str(uuid.uuid4())[:24]
+        self.counter = itertools.count()
+
+        message = Generators.generate_valid_create_message_body(environment)
+        message["data"]["attributes"]["messageReference"] = REFERENCE_SLOT
+        self.message_template = PayloadFactory.compile(message, REFERENCE_SLOT)
+
+        batch = Generators.generate_valid_create_message_batch_body(environment)
+        attributes = batch["data"]["attributes"]
+        batch_message = attributes["messages"][0]
+        batch_message["messageReference"] = REFERENCE_SLOT
+        self.batch_message_template = PayloadFactory.compile(batch_message, REFERENCE_SLOT)
+
+        attributes["messageBatchReference"] = REFERENCE_SLOT
+        attributes["messages"] = MESSAGES_SLOT
+        batch_prefix, batch_suffix = PayloadFactory.compile(batch, f'"{MESSAGES_SLOT}"')
+        self.batch_template = PayloadFactory.compile_split(batch_prefix, REFERENCE_SLOT) + (batch_suffix,)
+
+    @staticmethod
+    def compile(body, slot):
+        return PayloadFactory.compile_split(json.dumps(body, separators=(",", ":")).encode("utf-8"), slot)
+
+    @staticmethod
+    def compile_split(serialised, slot):
+        parts = serialised.split(slot.encode("utf-8"))
+        if len(parts) != 2:
+            raise ValueError(f"Expected exactly one {slot} in the template, found {len(parts) - 1}")
+        return tuple(parts)
+
+    def reference(self):
+        return f"{self.reference_prefix}{next(self.counter):012x}".encode("ascii")
+
+    def message_body(self):
+        prefix, suffix = self.message_template
+        return prefix + self.reference() + suffix
+
+    def message_batch_body(self, messages=1):
+        prefix, suffix = self.batch_message_template
+        reference = self.reference
+        items = b",".join([prefix + reference() + suffix for _ in range(messages)])
+
+        batch_prefix, messages_prefix, batch_suffix = self.batch_template
+        return b"".join([batch_prefix, reference(), messages_prefix, b"[", items, b"]", batch_suffix])
+
+    def message_bodies(self, count):
+        for _ in range(count):
+            yield self.message_body()
+
+    def message_batch_bodies(self, count, messages=1):
+        for _ in range(count):
+            yield self.message_batch_body(messages)
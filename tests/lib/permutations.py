@@ -28,3 +28,76 @@ class Permutations():
             return [Permutations.new_dict_with_new_value(element, key, new_value) for element in input_dict]
         else:
             return input_dict
+
+    @staticmethod
+    def parse_pointer(pointer):
+        # RFC 6901, "" is the whole document and "~1" / "~0" escape "/" and "~"
+        if pointer == "":
+            return []
+        if not pointer.startswith("/"):
+            raise ValueError(f"Invalid JSON pointer '{pointer}'")
+        return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+    @staticmethod
+    def format_pointer(tokens):
+        return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+    @staticmethod
+    def new_dict_with_change_at_pointer(input_dict, pointer, change):
+        """
+        Returns a copy of input_dict with change(parent, key) applied to the
+        node at pointer.
+
+        Only the containers on the path to the node are copied, every other
+        subtree is shared with input_dict. Each copy is shallow, but a list on
+        the path is copied in full, so the cost grows with the length of those
+        lists, such as the messages of a batch, rather than the size of the
+        whole body. The shared subtrees must not be mutated afterwards.
+        """
+        tokens = Permutations.parse_pointer(pointer)
+        if not tokens:
+            raise ValueError("Cannot change the root of the document")
+
+        root = Permutations._shallow_copy(input_dict)
+        parent = root
+        for token in tokens[:-1]:
+            key = Permutations._key(parent, token, pointer)
+            parent[key] = Permutations._shallow_copy(parent[key])
+            parent = parent[key]
+
+        change(parent, Permutations._key(parent, tokens[-1], pointer))
+        return root
+
+    @staticmethod
+    def new_dict_without_pointer(input_dict, pointer):
+        def remove(parent, key):
+            del parent[key]
+        return Permutations.new_dict_with_change_at_pointer(input_dict, pointer, remove)
+
+    @staticmethod
+    def new_dict_with_null_pointer(input_dict, pointer):
+        return Permutations.new_dict_with_value_at_pointer(input_dict, pointer, None)
+
+    @staticmethod
+    def new_dict_with_value_at_pointer(input_dict, pointer, new_value):
+        def replace(parent, key):
+            parent[key] = new_value
+        return Permutations.new_dict_with_change_at_pointer(input_dict, pointer, replace)
+
+    @staticmethod
+    def _shallow_copy(node):
+        if isinstance(node, dict):
+            return dict(node)
+        if isinstance(node, list):
+            return list(node)
+        raise ValueError(f"Cannot follow a JSON pointer through {type(node).__name__}")
+
+    @staticmethod
+    def _key(parent, token, pointer):
+        if isinstance(parent, list):
+            if not token.isdigit() or int(token) >= len(parent):
+                raise KeyError(f"'{token}' is not an index of the array at '{pointer}'")
+            return int(token)
+        if token not in parent:
+            raise KeyError(f"'{token}' is not present at '{pointer}'")
+        return token
@@ -3,13 +3,52 @@ import time
 
 
 class RateLimiting:
-    def __init__(self, products_api, developer_apps_api, api_product_name, delay):
+    """
+    Changes the rate limits applied to the API product and developer apps.
+
+    Changes are only PUT when they differ from the current value, and each
+    change waits until it can be read back from the management API rather than
+    sleeping for a fixed time. Apigee can take a little longer to apply a change
+    at runtime, so tests that expect a limit to be hit send their requests
+    through poll_response, which repeats them a few times until the limit shows.
+    """
+    def __init__(self, products_api, developer_apps_api, api_product_name, timeout=60, interval=1, attempts=3,
+                 attempt_delay=5):
         self.products_api = products_api
         self.developer_apps_api = developer_apps_api
         self.api_product_name = api_product_name
         self.product = products_api.get_product_by_name(api_product_name)
         self.previous_ratelimit = self.extract_ratelimiting_attribute()
-        self.delay = delay
+        self.timeout = timeout
+        self.interval = interval
+        self.attempts = attempts
+        self.attempt_delay = attempt_delay
+
+    def wait_until(self, condition, description):
+        """Calls condition every interval seconds until it returns something truthy, which is returned"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            result = condition()
+            if result:
+                return result
+            if time.monotonic() >= deadline:
+                raise Exception(f'Timed out after {self.timeout}s waiting for {description}')
+            time.sleep(self.interval)
+
+    def poll_response(self, send, predicate):
+        """
+        Calls send, at most attempts times, until the response it returns
+        satisfies predicate, e.g. is the expected 429, and returns that
+        response. If it never does the last response is returned for the test
+        to assert on.
+        """
+        resp = send()
+        for _ in range(self.attempts - 1):
+            if predicate(resp):
+                break
+            time.sleep(self.attempt_delay)
+            resp = send()
+        return resp
 
     def extract_ratelimiting_attribute(self):
         if self.product["attributes"] is None:
@@ -29,14 +68,38 @@ class RateLimiting:
     def restore_rate_limit(self):
         self.update_product_rate_limit(self.previous_ratelimit)
 
-    def update_product_rate_limit(self, ratelimit):
+    @staticmethod
+    def attribute_values(entity):
+        return {attribute["name"]: attribute["value"] for attribute in entity["attributes"] or []}
+
+    def update_product_attributes(self, attributes):
+        """Sets every attribute in the attributes dict with a single PUT, returns False if nothing changed"""
+        current = RateLimiting.attribute_values(self.product)
+        changes = {name: value for name, value in attributes.items() if current.get(name) != value}
+        if not changes:
+            return False
+
         for attribute in self.product["attributes"]:
-            if attribute["name"] == 'ratelimiting':
-                attribute["value"] = ratelimit
-                break
+            if attribute["name"] in changes:
+                attribute["value"] = changes.pop(attribute["name"])
+        for name, value in changes.items():
+            self.product["attributes"].append({"name": name, "value": value})
 
         self.products_api.put_product_by_name(self.api_product_name, self.product)
-        time.sleep(self.delay)
+        self.wait_until(
+            lambda: RateLimiting.has_attributes(
+                self.products_api.get_product_by_name(self.api_product_name), attributes),
+            f'product "{self.api_product_name}" to be updated'
+        )
+        return True
+
+    @staticmethod
+    def has_attributes(entity, attributes):
+        values = RateLimiting.attribute_values(entity)
+        return all(values.get(name) == value for name, value in attributes.items())
+
+    def update_product_rate_limit(self, ratelimit):
+        return self.update_product_attributes({"ratelimiting": ratelimit})
 
     def set_default_rate_limit(self):
         self.set_rate_limit()
@@ -80,9 +143,17 @@ class RateLimiting:
             if attribute["name"] != 'ratelimiting':
                 new_attributes.append(attribute)
 
+        if len(new_attributes) == len(app["attributes"]):
+            return
+
         app["attributes"] = new_attributes
 
         self.developer_apps_api.put_app_by_name(email, app_name, app)
+        self.wait_until(
+            lambda: "ratelimiting" not in RateLimiting.attribute_values(
+                self.developer_apps_api.get_app_by_name(email, app_name)),
+            f'app "{app_name}" to be updated'
+        )
 
     def set_app_ratelimit(self, email, app_name, quota=1200, spikearrest="6000pm"):
         app = self.developer_apps_api.get_app_by_name(email, app_name)
@@ -104,6 +175,9 @@ class RateLimiting:
 
         ratelimit_value = json.dumps(config_dict)
 
+        if RateLimiting.attribute_values(app).get("ratelimiting") == ratelimit_value:
+            return
+
         updated = False
         for attribute in app["attributes"]:
             if attribute["name"] == 'ratelimiting':
@@ -118,3 +192,8 @@ class RateLimiting:
             })
 
         self.developer_apps_api.put_app_by_name(email, app_name, app)
+        self.wait_until(
+            lambda: RateLimiting.has_attributes(
+                self.developer_apps_api.get_app_by_name(email, app_name), {"ratelimiting": ratelimit_value}),
+            f'app "{app_name}" to be updated'
+        )
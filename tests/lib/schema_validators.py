@@ -0,0 +1,431 @@
+"""
+Validators for the request and response schemas in specification/schemas,
+compiled into Python source code.
+
+Each schema file becomes one function, with the type, enum, length, pattern
+and format checks of the schema written out inline and a call to the function
+of any schema it $refs, so checking a request or response body costs a few
+microseconds instead of walking the schema every time. The generated source is
+cached in .schema-validators/ by a hash of the specification and of this
+module, so it is only generated again when one of them changes.
+
+    from lib.schema_validators import SchemaValidators
+
+    SchemaValidators.shared().validate("requests/CreateMessage", body)
+
+Schemas are named by their path under specification/schemas, without the
+extension. Files elsewhere in specification/ that a schema $refs, such as the
+snippets, are compiled too but are not named. Only the keywords the schemas
+use are supported: compiling a schema with any other validation keyword raises
+a ValueError rather than silently ignoring it. Validation stops at the first
+error, which is raised as a SchemaValidationError with the JSON pointer of the
+invalid value.
+"""
+import contextlib
+import glob
+import hashlib
+import itertools
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import date, datetime
+import yaml
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SCHEMAS_DIR = os.path.join(ROOT_DIR, "specification", "schemas")
+CACHE_DIR = os.path.join(ROOT_DIR, ".schema-validators")
+
+ANNOTATIONS = {
+    "title", "description", "example", "examples", "default", "readOnly", "writeOnly", "deprecated", "externalDocs",
+}
+TYPE_CHECKS = {
+    "string": "isinstance({0}, str)",
+    "integer": "(isinstance({0}, int) and not isinstance({0}, bool))",
+    "number": "(isinstance({0}, (int, float)) and not isinstance({0}, bool))",
+    "boolean": "isinstance({0}, bool)",
+    "object": "isinstance({0}, dict)",
+    "array": "isinstance({0}, list)",
+    "null": "{0} is None",
+}
+# the keywords that only apply to values of each type
+TYPE_KEYWORDS = {
+    "string": ("minLength", "maxLength", "pattern", "format"),
+    "number": ("minimum", "maximum"),
+    "object": ("required", "properties", "additionalProperties", "minProperties", "maxProperties"),
+    "array": ("items", "minItems", "maxItems", "uniqueItems"),
+}
+KEYWORDS = {"$ref", "type", "nullable", "enum"}.union(*TYPE_KEYWORDS.values())
+
+UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DATE_TIME = re.compile(r"^\d{4}-\d{2}-\d{2}[Tt]\d{2}:\d{2}:\d{2}(\.\d+)?([Zz]|[+-]\d{2}:\d{2})$")
+URI = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:[^\s]*$")
+
+
+class SchemaValidationError(AssertionError):
+    def __init__(self, pointer, message):
+        super().__init__(f"{pointer or '/'} {message}")
+        self.pointer = pointer
+        self.message = message
+
+
+def is_uuid(value):
+    return UUID.match(value) is not None
+
+
+def is_date(value):
+    if DATE.match(value) is None:
+        return False
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def is_date_time(value):
+    if DATE_TIME.match(value) is None:
+        return False
+    try:
+        # before Python 3.11 fromisoformat only accepts an upper case T between the date and time
+        datetime.fromisoformat(value[:10] + "T" + value[11:19])
+    except ValueError:
+        return False
+    return True
+
+
+def is_uri(value):
+    return URI.match(value) is not None
+
+
+def pointer_key(name):
+    return str(name).replace("~", "~0").replace("/", "~1")
+
+
+def is_enum_member(value, values):
+    # JSON doesn't treat true as equal to 1, as Python does
+    return any(value == v and isinstance(value, bool) == isinstance(v, bool) for v in values)
+
+
+def is_unique(items):
+    try:
+        return len(set(items)) == len(items)
+    except TypeError:
+        return len({json.dumps(item, sort_keys=True) for item in items}) == len(items)
+
+
+FORMATS = {"uuid": "is_uuid", "date": "is_date", "date-time": "is_date_time", "uri": "is_uri"}
+# the names the generated source can use
+HELPERS = {
+    "SchemaValidationError": SchemaValidationError,
+    "is_uuid": is_uuid,
+    "is_date": is_date,
+    "is_date_time": is_date_time,
+    "is_uri": is_uri,
+    "is_unique": is_unique,
+    "is_enum_member": is_enum_member,
+    "pointer_key": pointer_key,
+    "re": re,
+}
+
+
+def schema_files(schemas_dir):
+    return sorted(glob.glob(os.path.join(schemas_dir, "**", "*.yaml"), recursive=True))
+
+
+def schema_name(schemas_dir, path):
+    return os.path.splitext(os.path.relpath(path, schemas_dir))[0].replace(os.sep, "/")
+
+
+def source_hash(schemas_dir):
+    """Hashes the specification the schemas are in and this module, which together decide the generated source"""
+    specification_dir = os.path.dirname(schemas_dir)
+    digest = hashlib.sha256()
+    with open(__file__, "rb") as f:
+        digest.update(f.read())
+    for path in schema_files(specification_dir):
+        digest.update(schema_name(specification_dir, path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+class SchemaCompiler():
+    """Generates the source of a module with a validate_<name> function for each schema file"""
+    def __init__(self, schemas_dir=SCHEMAS_DIR):
+        self.schemas_dir = schemas_dir
+        self.specification_dir = os.path.dirname(schemas_dir)
+        self.constants = []
+        # the files that have been $ref'd but not compiled yet
+        self.pending = []
+        self.functions = {}
+        # the files each compiled file $refs
+        self.references = {}
+        self.variables = itertools.count()
+
+    def variable(self, prefix="v"):
+        return f"{prefix}{next(self.variables)}"
+
+    def constant(self, source):
+        if source not in self.constants:
+            self.constants.append(source)
+        return f"_C{self.constants.index(source)}"
+
+    @staticmethod
+    def path(pointer):
+        """
+        The expression of the JSON pointer to a value, from static parts and (variable name,) tuples for array
+        indexes or (variable name, "key") for object keys, which are escaped when the pointer is built
+        """
+        if not pointer:
+            return "path"
+        if all(isinstance(part, str) for part in pointer):
+            return f"path + {''.join(pointer)!r}"
+        parts = "".join(
+            part.replace("{", "{{").replace("}", "}}") if isinstance(part, str)
+            else "/{pointer_key(" + part[0] + ")}" if len(part) > 1 else "/{" + part[0] + "}"
+            for part in pointer
+        )
+        return f"path + f{parts!r}"
+
+    @staticmethod
+    def key(name):
+        return "/" + pointer_key(name)
+
+    def function(self, path):
+        """The name of the function validating the schema file at path, compiling it if it has not been"""
+        if path not in self.functions:
+            self.functions[path] = "validate_" + re.sub(r"\W", "_", schema_name(self.specification_dir, path))
+            self.pending.append(path)
+        return self.functions[path]
+
+    def reference(self, source, target):
+        self.references.setdefault(source, set()).add(target)
+        return self.function(target)
+
+    def fail(self, pointer, message):
+        return f"raise SchemaValidationError({SchemaCompiler.path(pointer)}, {message!r})"
+
+    def compile(self):
+        names = {schema_name(self.schemas_dir, path): self.function(path) for path in schema_files(self.schemas_dir)}
+        bodies = {}
+        errors = {}
+        while self.pending:
+            path = self.pending.pop(0)
+            with open(path, encoding="utf-8") as f:
+                schema = yaml.safe_load(f)
+            try:
+                bodies[path] = self.schema(schema, "data", [], path)
+            except ValueError as e:
+                errors[path] = f"Cannot compile {schema_name(self.specification_dir, path)}: {e}"
+
+        # a schema that can't be compiled only fails validation against it, or any schema that $refs it, so one
+        # broken file doesn't stop the rest being used
+        failed = True
+        while failed:
+            failed = [
+                path for path in bodies
+                if any(target in errors for target in self.references.get(path, ()))
+            ]
+            for path in failed:
+                target = next(target for target in sorted(self.references[path]) if target in errors)
+                errors[path] = errors[target]
+                del bodies[path]
+        for path, error in errors.items():
+            bodies[path] = [f"raise ValueError({error!r})"]
+
+        functions = [
+            "\n".join([f"def {self.functions[path]}(data, path=''):"] + ["    " + line for line in body or ["pass"]])
+            for path, body in sorted(bodies.items(), key=lambda item: self.functions[item[0]])
+        ]
+
+        validators = ",\n".join(f"    {name!r}: {function}" for name, function in names.items())
+        return "\n\n\n".join([
+            "# Generated by tests/lib/schema_validators.py from specification, do not edit",
+            "\n".join(f"_C{index} = {source}" for index, source in enumerate(self.constants)),
+            *functions,
+            "VALIDATORS = {\n" + validators + ",\n}",
+        ]) + "\n"
+
+    def schema(self, schema, value, pointer, source):
+        """Returns the lines checking that the variable named value matches schema, from the file at source"""
+        unknown = [key for key in schema if key not in KEYWORDS and key not in ANNOTATIONS and not key.startswith("x-")]
+        if unknown:
+            raise ValueError(f"unsupported keywords {', '.join(unknown)}")
+
+        lines = []
+        if "$ref" in schema:
+            target = os.path.normpath(os.path.join(os.path.dirname(source), schema["$ref"]))
+            if not os.path.isfile(target) or not target.startswith(self.specification_dir + os.sep):
+                raise ValueError(f"$ref {schema['$ref']} is not a file in the specification")
+            lines.append(f"{self.reference(source, target)}({value}, {self.path(pointer)})")
+
+        types = schema.get("type")
+        types = [types] if isinstance(types, str) else list(types or [])
+        if types:
+            check = " or ".join(TYPE_CHECKS[t].format(value) for t in types)
+            lines += [f"if not ({check}):", "    " + self.fail(pointer, "must be " + " or ".join(types))]
+
+        if "enum" in schema:
+            values = schema["enum"]
+            if all(isinstance(v, str) for v in values):
+                allowed = self.constant(f"frozenset({sorted(values)!r})")
+                check = f"not isinstance({value}, str) or {value} not in {allowed}"
+            else:
+                allowed = self.constant(repr(tuple(values)))
+                check = f"not is_enum_member({value}, {allowed})"
+            lines += [f"if {check}:", "    " + self.fail(pointer, f"must be one of {values}")]
+
+        for type_name, keywords in TYPE_KEYWORDS.items():
+            checks = getattr(self, type_name)(schema, value, pointer, source) if any(
+                keyword in schema for keyword in keywords) else []
+            if not checks:
+                continue
+            if types == [type_name] or (type_name == "number" and types == ["integer"]):
+                lines += checks
+            else:
+                guard = TYPE_CHECKS[type_name].format(value)
+                lines += [f"if {guard}:"] + ["    " + line for line in checks]
+
+        if schema.get("nullable") is True and lines:
+            return [f"if {value} is not None:"] + ["    " + line for line in lines]
+        return lines
+
+    def string(self, schema, value, pointer, source):
+        lines = []
+        if "minLength" in schema:
+            lines += [f"if len({value}) < {int(schema['minLength'])}:",
+                      "    " + self.fail(pointer, f"must be at least {schema['minLength']} characters")]
+        if "maxLength" in schema:
+            lines += [f"if len({value}) > {int(schema['maxLength'])}:",
+                      "    " + self.fail(pointer, f"must be at most {schema['maxLength']} characters")]
+        if "pattern" in schema:
+            pattern = self.constant(f"re.compile({schema['pattern']!r})")
+            lines += [f"if {pattern}.search({value}) is None:",
+                      "    " + self.fail(pointer, f"must match {schema['pattern']}")]
+        if "format" in schema:
+            if schema["format"] not in FORMATS:
+                raise ValueError(f"unsupported format {schema['format']}")
+            lines += [f"if not {FORMATS[schema['format']]}({value}):",
+                      "    " + self.fail(pointer, f"must be a {schema['format']}")]
+        return lines
+
+    def number(self, schema, value, pointer, source):
+        lines = []
+        if "minimum" in schema:
+            lines += [f"if {value} < {schema['minimum']!r}:",
+                      "    " + self.fail(pointer, f"must be at least {schema['minimum']}")]
+        if "maximum" in schema:
+            lines += [f"if {value} > {schema['maximum']!r}:",
+                      "    " + self.fail(pointer, f"must be at most {schema['maximum']}")]
+        return lines
+
+    def object(self, schema, value, pointer, source):
+        lines = []
+        for key in schema.get("required", []):
+            lines += [f"if {key!r} not in {value}:", "    " + self.fail(pointer + [self.key(key)], "is required")]
+        if "minProperties" in schema:
+            lines += [f"if len({value}) < {int(schema['minProperties'])}:",
+                      "    " + self.fail(pointer, f"must have at least {schema['minProperties']} properties")]
+        if "maxProperties" in schema:
+            lines += [f"if len({value}) > {int(schema['maxProperties'])}:",
+                      "    " + self.fail(pointer, f"must have at most {schema['maxProperties']} properties")]
+
+        properties = schema.get("properties", {})
+        for key, property_schema in properties.items():
+            item = self.variable()
+            checks = self.schema(property_schema, item, pointer + [self.key(key)], source)
+            if checks:
+                lines += [f"if {key!r} in {value}:", f"    {item} = {value}[{key!r}]"]
+                lines += ["    " + line for line in checks]
+
+        additional = schema.get("additionalProperties", True)
+        if additional is not True:
+            known = self.constant(f"frozenset({sorted(properties)!r})")
+            key, item = self.variable("k"), self.variable()
+            if additional is False:
+                checks = [self.fail(pointer + [(key, "key")], "is not allowed")]
+            else:
+                checks = self.schema(additional, item, pointer + [(key, "key")], source)
+            if checks:
+                lines += [f"for {key}, {item} in {value}.items():", f"    if {key} not in {known}:"]
+                lines += ["        " + line for line in checks]
+        return lines
+
+    def array(self, schema, value, pointer, source):
+        lines = []
+        if "minItems" in schema:
+            lines += [f"if len({value}) < {int(schema['minItems'])}:",
+                      "    " + self.fail(pointer, f"must have at least {schema['minItems']} items")]
+        if "maxItems" in schema:
+            lines += [f"if len({value}) > {int(schema['maxItems'])}:",
+                      "    " + self.fail(pointer, f"must have at most {schema['maxItems']} items")]
+        if schema.get("uniqueItems") is True:
+            lines += [f"if not is_unique({value}):", "    " + self.fail(pointer, "must have unique items")]
+        if "items" in schema:
+            index, item = self.variable("i"), self.variable()
+            checks = self.schema(schema["items"], item, pointer + [(index,)], source)
+            if checks:
+                lines += [f"for {index}, {item} in enumerate({value}):"] + ["    " + line for line in checks]
+        return lines
+
+
+def load_source(schemas_dir=SCHEMAS_DIR, cache_dir=CACHE_DIR):
+    """Returns the path and generated source of the validators, generating and caching them if needed"""
+    path = os.path.join(cache_dir, source_hash(schemas_dir) + ".py")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return path, f.read()
+    except OSError:
+        pass
+
+    source = SchemaCompiler(schemas_dir).compile()
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False, encoding="utf-8") as f:
+        f.write(source)
+    os.replace(f.name, path)
+    # validators generated from older schemas are never used again
+    for old in glob.glob(os.path.join(cache_dir, "*.py")):
+        if old != path:
+            # another worker may have removed it already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old)
+    return path, source
+
+
+class SchemaValidators():
+    _shared = None
+    _lock = threading.Lock()
+
+    def __init__(self, schemas_dir=SCHEMAS_DIR, cache_dir=CACHE_DIR):
+        path, source = load_source(schemas_dir, cache_dir)
+        namespace = dict(HELPERS)
+        exec(compile(source, path, "exec"), namespace)
+        self.validators = namespace["VALIDATORS"]
+
+    @staticmethod
+    def shared():
+        """The validators for specification/schemas, loaded once per process"""
+        with SchemaValidators._lock:
+            if SchemaValidators._shared is None:
+                SchemaValidators._shared = SchemaValidators()
+            return SchemaValidators._shared
+
+    def validator(self, schema):
+        """Returns the function validating a value against a schema, raising a SchemaValidationError if invalid"""
+        try:
+            return self.validators[schema]
+        except KeyError:
+            raise KeyError(f"No schema named {schema} in specification/schemas")
+
+    def validate(self, schema, data):
+        self.validator(schema)(data)
+
+    def is_valid(self, schema, data):
+        try:
+            self.validate(schema, data)
+        except SchemaValidationError:
+            return False
+        return True
@@ -0,0 +1,119 @@
+"""
+Resources set up once for all of the xdist workers in a test run and torn
+down once the whole run is over.
+
+The first worker to acquire a resource runs its setup and stores the result in
+a state file, guarded by an exclusive lock, in a directory shared by the run.
+Later workers get the stored result, so it must be plain JSON data. Workers
+never tear a resource down themselves: one worker finishing says nothing about
+whether another is still to acquire it, and a worker that crashes would never
+let go of it. Instead the state records how to tear it down, a module level
+function and its (plain data) arguments, and the SharedResources plugin runs
+every recorded teardown on the controller, or the only process without xdist,
+in pytest_sessionfinish, then removes the directory.
+
+    shared = config.pluginmanager.get_plugin("shared_resources").resource(name)
+    value = shared.acquire(setup, teardown, *args)
+"""
+import fcntl
+import importlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+import pytest
+
+
+def load_function(reference):
+    module, _, name = reference.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+class SharedResource():
+    def __init__(self, name, directory):
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(self.directory, re.sub(r"[^\w.-]", "-", name) + ".json")
+
+    @contextmanager
+    def locked_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = {"set_up": False, "value": None, "teardown": None, "args": []}
+                if os.path.exists(self.path):
+                    with open(self.path, encoding="utf-8") as f:
+                        state = json.load(f)
+                yield state
+                # serialised before the file is opened, so a value that isn't plain data leaves it untouched
+                data = json.dumps(state)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write(data)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def acquire(self, setup, teardown, *args):
+        """
+        Returns the result of setup, running it if no worker has yet. teardown(*args) is run once the test run is
+        over, so teardown must be a module level function and args plain data.
+        """
+        with self.locked_state() as state:
+            if not state["set_up"]:
+                state.update(
+                    set_up=True,
+                    value=setup(),
+                    teardown=f"{teardown.__module__}:{teardown.__qualname__}",
+                    args=list(args)
+                )
+            return state["value"]
+
+    def teardown(self):
+        with self.locked_state() as state:
+            if state["set_up"]:
+                load_function(state["teardown"])(*state["args"])
+                state.update(set_up=False, value=None)
+
+
+class SharedResources():
+    def __init__(self, config, directory=None):
+        self.config = config
+        if self.is_worker():
+            self.directory = config.workerinput["shared_resources"]
+        else:
+            self.directory = directory or tempfile.mkdtemp(prefix="comms-shared-resources-")
+        self.errors = []
+
+    def is_worker(self):
+        return hasattr(self.config, "workerinput")
+
+    def resource(self, name):
+        return SharedResource(name, self.directory)
+
+    @staticmethod
+    def resource_names(directory):
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        node.workerinput["shared_resources"] = self.directory
+
+    def pytest_sessionfinish(self, session):
+        if self.is_worker():
+            return
+        for name in SharedResources.resource_names(self.directory):
+            try:
+                self.resource(name).teardown()
+            except Exception as e:
+                self.errors.append(f"{name}: {e!r}")
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.errors:
+            terminalreporter.write_sep("-", "shared resources that failed to tear down")
+            for error in self.errors:
+                terminalreporter.write_line(error)
@@ -0,0 +1,327 @@
+"""
+Capture and replay of API traffic.
+
+TrafficRecorder appends one compact JSON line per request to the proxy under
+test made through the requests library. Enable it for a pytest run with --record-traffic=<file>.
+Under xdist each worker records to <file>.<worker id>, and the controller
+merges those into <file> in time order once the workers are done:
+
+    {"ts":1700000000.123456,"d":0.0842,"m":"POST","p":"/v1/messages","h":{"Accept":"*/*"},"b":"{...}","s":201}
+
+ts is when the request was sent, d how long it took, p the path relative to the
+proxy base path and s the response status (or exception name). Overlapping
+ts/d intervals give the concurrency of the original run. Authorization headers
+are never recorded.
+
+TrafficReplayer re-issues a recording against another base url keeping the
+original inter-arrival times, optionally sped up, or as fast as the recorded
+concurrency allows:
+
+    PYTHONPATH=./tests python -m lib.traffic traffic.jsonl --url http://localhost:9000 --local-sandbox --speed 10
+    PYTHONPATH=./tests python -m lib.traffic traffic.jsonl --url https://sandbox.api.service.nhs.uk/comms --speed max
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import pytest
+import requests
+from lib import http_hooks
+from lib.authentication import AuthenticationCache
+from lib.constants.constants import INT_URL, PROD_URL
+from lib.load_generator import LoadResult, format_report
+
+API_PATH_ROOTS = ("/v1/", "/channels/", "/_ping", "/_status")
+RECORDED_HEADERS = ["Accept", "Content-Type", "Prefer", "X-Correlation-Id", "If-None-Match"]
+MESSAGE_ID_PATH = re.compile(r"^/v1/messages/[^/?]+")
+
+# base urls of the proxy under test: nhsd_apim_proxy_url, added as tests set it up (see conftest.py), and the
+# urls the integration and production tests use in its place. Requests to anything else, such as the Apigee
+# management API or the identity service, aren't API calls.
+PROXY_URLS = {INT_URL, PROD_URL}
+
+
+def add_proxy_url(url):
+    PROXY_URLS.add(url.rstrip("/"))
+
+
+def is_api_path(path):
+    """Whether path, relative to the proxy base path, is one the API serves"""
+    return path.startswith(API_PATH_ROOTS)
+
+
+def api_path(url):
+    """Returns the path (and query) of url relative to the proxy base path, or None if it is not an API call"""
+    split = urlsplit(url)
+    for proxy_url in PROXY_URLS:
+        base = urlsplit(proxy_url)
+        if (split.scheme, split.netloc.lower()) != (base.scheme, base.netloc.lower()):
+            continue
+        if not split.path.startswith(base.path + "/"):
+            continue
+        path = split.path[len(base.path):]
+        if is_api_path(path):
+            return path + (f"?{split.query}" if split.query else "")
+    return None
+
+
+def local_sandbox_path(path):
+    """Maps a proxy path onto the route served by the sandbox backend"""
+    if path.startswith("/v1/message-batches"):
+        path = "/v1/send" + path[len("/v1/message-batches"):]
+    if path.startswith("/_"):
+        return path
+    return "/api" + path
+
+
+def route(method, path):
+    path = path.split("?")[0]
+    if MESSAGE_ID_PATH.match(path):
+        path = "/v1/messages/{messageId}"
+    return f"{method} {path}"
+
+
+class TrafficRecorder():
+    def __init__(self, path, include_bodies=True):
+        self.path = path
+        self.include_bodies = include_bodies
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, request, response, exception, started, elapsed):
+        path = api_path(request.url)
+        if path is None:
+            return
+
+        entry = {
+            "ts": round(started, 6),
+            "d": round(elapsed, 6),
+            "m": request.method,
+            "p": path,
+            "h": {k: request.headers[k] for k in RECORDED_HEADERS if request.headers.get(k) is not None},
+            "s": response.status_code if response is not None else type(exception).__name__
+        }
+
+        if self.include_bodies and request.body:
+            body = request.body
+            entry["b"] = body.decode("utf-8") if isinstance(body, bytes) else body
+
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def start(self):
+        http_hooks.add_listener(self)
+        return self
+
+    def stop(self):
+        http_hooks.remove_listener(self)
+        self.file.close()
+
+
+class TrafficRecording():
+    """Pytest plugin for --record-traffic, recording to a file per xdist worker that the controller merges"""
+    def __init__(self, config, path):
+        self.config = config
+        self.path = path
+        self.worker_paths = []
+        self.recorder = None
+        if self.is_worker():
+            self.recorder = TrafficRecorder(f"{path}.{config.workerinput['workerid']}").start()
+        elif config.getoption("dist", "no") == "no":
+            self.recorder = TrafficRecorder(path).start()
+
+    def is_worker(self):
+        return hasattr(self.config, "workerinput")
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        self.worker_paths.append(f"{self.path}.{node.workerinput['workerid']}")
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_sessionfinish(self, session):
+        if self.worker_paths:
+            merge_traffic(self.worker_paths, self.path)
+
+    def pytest_unconfigure(self, config):
+        if self.recorder is not None:
+            self.recorder.stop()
+
+
+def merge_traffic(paths, path):
+    """Appends the records in paths to path in time order, removing paths"""
+    records = []
+    for worker_path in paths:
+        if os.path.exists(worker_path):
+            with open(worker_path, encoding="utf-8") as f:
+                records += [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["ts"])
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    for worker_path in paths:
+        if os.path.exists(worker_path):
+            os.remove(worker_path)
+
+
+def load_traffic(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r["ts"])
+
+
+def max_concurrency(records):
+    events = []
+    for r in records:
+        events.append((r["ts"], 1))
+        events.append((r["ts"] + r["d"], -1))
+
+    in_flight = 0
+    peak = 0
+    for _, change in sorted(events):
+        in_flight += change
+        peak = max(peak, in_flight)
+    return peak
+
+
+class TrafficReplayer():
+    def __init__(self, url, records, speed=1.0, auth_env=None, authentication_cache=None,
+                 local_sandbox=False, max_workers=None, timeout=30):
+        """speed of None replays as fast as the recorded peak concurrency allows"""
+        self.url = url.rstrip("/")
+        self.records = records
+        self.speed = speed
+        self.auth_env = auth_env
+        self.authentication_cache = authentication_cache or AuthenticationCache()
+        self.local_sandbox = local_sandbox
+        self.timeout = timeout
+        self.status_mismatches = Counter()
+        self.local = threading.local()
+
+        peak = max(1, max_concurrency(records))
+        if max_workers is not None:
+            self.max_workers = max_workers
+        elif speed is None:
+            self.max_workers = peak
+        else:
+            self.max_workers = max(1, math.ceil(peak * speed))
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def headers(self, record):
+        headers = dict(record.get("h", {}))
+        if self.auth_env is not None:
+            headers["Authorization"] = self.authentication_cache.generate_authentication(self.auth_env).value
+        return headers
+
+    def execute(self, record, intended_start, result):
+        path = local_sandbox_path(record["p"]) if self.local_sandbox else record["p"]
+        body = record.get("b")
+        actual_start = time.perf_counter()
+        try:
+            resp = self.session().request(
+                record["m"],
+                f"{self.url}{path}",
+                headers=self.headers(record),
+                data=body.encode("utf-8") if body is not None else None,
+                timeout=self.timeout
+            )
+            status = resp.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+
+        if status != record["s"]:
+            with result.lock:
+                self.status_mismatches[f"{record['s']} -> {status}"] += 1
+
+        result.record(
+            route(record["m"], record["p"]),
+            status,
+            (finished - (intended_start or actual_start)) * 1_000_000,
+            (finished - actual_start) * 1_000_000
+        )
+
+    def run(self):
+        result = LoadResult()
+        if not self.records:
+            result.started_at = result.finished_at = time.perf_counter()
+            return result
+
+        first_ts = self.records[0]["ts"]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            result.started_at = time.perf_counter()
+            for record in self.records:
+                intended_start = None
+                if self.speed is not None:
+                    intended_start = result.started_at + (record["ts"] - first_ts) / self.speed
+                    delay = intended_start - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                executor.submit(self.execute, record, intended_start, result)
+
+        result.finished_at = time.perf_counter()
+        return result
+
+
+def parse_speed(value):
+    if value == "max":
+        return None
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be greater than zero")
+    return speed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded communications manager API traffic")
+    parser.add_argument("recording", help="file written by --record-traffic")
+    parser.add_argument("--url", required=True, help="base url of the proxy, or of the sandbox with --local-sandbox")
+    parser.add_argument("--speed", type=parse_speed, default=1.0,
+                        help="replay speed multiplier, e.g. 1, 10x, or max to ignore the recorded timings")
+    parser.add_argument("--auth-env", help="AuthenticationCache environment used to sign requests, e.g. internal-dev")
+    parser.add_argument("--local-sandbox", action="store_true", help="target a sandbox server directly (/api/* paths)")
+    parser.add_argument("--max-workers", type=int, help="override the number of requests in flight")
+    parser.add_argument("--json", dest="json_output", help="write the report as json to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    replayer = TrafficReplayer(
+        args.url,
+        load_traffic(args.recording),
+        speed=args.speed,
+        auth_env=args.auth_env,
+        local_sandbox=args.local_sandbox,
+        max_workers=args.max_workers
+    )
+    result = replayer.run()
+
+    print(format_report(result))
+    if replayer.status_mismatches:
+        print("\nStatus changes from recording:")
+        for change, count in replayer.status_mismatches.most_common():
+            print(f"  {change:<24}{count:>8}")
+
+    if args.json_output:
+        report = result.to_dict()
+        report["status_mismatches"] = dict(replayer.status_mismatches)
+        with open(args.json_output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
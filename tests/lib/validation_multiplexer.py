@@ -0,0 +1,98 @@
+import re
+import threading
+import uuid
+import requests
+import lib.constants.constants as constants
+from lib.error_handler import error_handler
+from lib.generators import Generators
+from lib.permutations import Permutations
+from lib.constants.message_batches_paths import MESSAGES_PATH
+
+MESSAGE_ERROR_POINTER = re.compile(r"^" + re.escape(MESSAGES_PATH) + r"/(\d+)(?:/|$)")
+
+# every case adds one error, leave headroom under the 100 errors the proxy returns
+CASES_PER_REQUEST = constants.NUM_MAX_ERRORS // 2
+
+
+class MultiplexedResult():
+    def __init__(self, resp, pointer, errors):
+        self.resp = resp
+        self.pointer = pointer
+        self.errors = errors
+
+
+class ValidationMultiplexer():
+    """
+    Packs independent invalid message cases into a single create message batch
+    request, one case per message, and maps the returned errors back to each
+    case by the message index in their source pointer.
+
+    Cases are registered when the test module is imported. The first lookup for
+    a given url and correlation id sends every registered case, later lookups
+    are served from the stored responses, so a parametrised test costs one
+    request per correlation id instead of one per value. Each stored result is
+    served once: a second lookup of the same case comes from a rerun of its
+    test, so every case is sent again for it rather than it getting the
+    response its failed attempt did.
+    """
+    def __init__(self, environment="sandbox", cases_per_request=CASES_PER_REQUEST):
+        self.environment = environment
+        self.cases_per_request = cases_per_request
+        self.cases = []
+        self.indexes = {}
+        # {(url, correlation id): ([MultiplexedResult], indexes of the results served)}
+        self.results = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def case_key(pointer, value):
+        # values such as [] and {} are not hashable
+        return pointer, repr(value)
+
+    def add(self, pointer, values):
+        """pointer is relative to a message, e.g. /recipient/nhsNumber"""
+        for value in values:
+            key = ValidationMultiplexer.case_key(pointer, value)
+            if key not in self.indexes:
+                self.indexes[key] = len(self.cases)
+                self.cases.append((pointer, value))
+        return self
+
+    def body(self, cases):
+        body = Generators.generate_valid_create_message_batch_body(self.environment)
+        template = body["data"]["attributes"]["messages"][0]
+
+        messages = []
+        for pointer, value in cases:
+            message = Permutations.new_dict_with_value_at_pointer(template, "/messageReference", str(uuid.uuid4()))
+            messages.append(Permutations.new_dict_with_value_at_pointer(message, pointer, value))
+
+        return Permutations.new_dict_with_value_at_pointer(body, MESSAGES_PATH, messages)
+
+    def send(self, url, headers):
+        results = []
+        for start in range(0, len(self.cases), self.cases_per_request):
+            cases = self.cases[start:start + self.cases_per_request]
+            resp = requests.post(url, headers=headers, json=self.body(cases))
+            error_handler.handle_retry(resp)
+
+            errors_by_message = [[] for _ in cases]
+            if resp.status_code == 400:
+                for error in resp.json().get("errors"):
+                    match = MESSAGE_ERROR_POINTER.match(error.get("source", {}).get("pointer", ""))
+                    if match is not None and int(match.group(1)) < len(cases):
+                        errors_by_message[int(match.group(1))].append(error)
+
+            for i, (pointer, _) in enumerate(cases):
+                results.append(MultiplexedResult(resp, f"{MESSAGES_PATH}/{i}{pointer}", errors_by_message[i]))
+        return results
+
+    def result(self, url, headers, pointer, value):
+        index = self.indexes[ValidationMultiplexer.case_key(pointer, value)]
+        key = (url, headers.get("X-Correlation-Id"))
+        with self.lock:
+            if key not in self.results or index in self.results[key][1]:
+                self.results[key] = (self.send(url, headers), set())
+            results, served = self.results[key]
+            served.add(index)
+            return results[index]
@@ -1,7 +1,7 @@
 import requests
 import pytest
 import uuid
-from lib import Assertions, Permutations, Generators
+from lib import Assertions, Permutations, Generators, ValidationMultiplexer
 import lib.constants.constants as constants
 from lib.constants.message_batches_paths import MISSING_PROPERTIES_PATHS, NULL_PROPERTIES_PATHS, \
     INVALID_PROPERTIES_PATHS, DUPLICATE_PROPERTIES_PATHS, TOO_FEW_PROPERTIES_PATHS, MESSAGE_BATCHES_ENDPOINT
@@ -15,6 +15,12 @@ INVALID_MESSAGE_VALUES = [""]
 INVALID_NHS_NUMBER = ["012345678"]
 INVALID_DOB = ["1990-10-1"]
 
+# the invalid message value cases are packed into one request per correlation id, see ValidationMultiplexer
+multiplexer = ValidationMultiplexer("prod")
+multiplexer.add("/recipient/nhsNumber", INVALID_NHS_NUMBER)
+multiplexer.add("/recipient/dateOfBirth", INVALID_DOB)
+multiplexer.add("/personalisation", constants.INVALID_PERSONALISATION_VALUES + constants.NULL_VALUES)
+
 
 @pytest.mark.prodtest
 def test_invalid_body(bearer_token_prod):
@@ -50,9 +56,9 @@ def test_property_missing(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_batch_body(),
-            property
+            pointer
         ),
     )
 
@@ -76,9 +82,9 @@ def test_data_null(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_batch_body(),
-            property
+            pointer
         ),
     )
 
@@ -102,9 +108,9 @@ def test_data_invalid(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body(),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -157,9 +163,9 @@ def test_data_too_few_items(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body(),
-            property,
+            pointer,
             []
         ),
     )
@@ -178,21 +184,19 @@ def test_invalid_nhs_number(bearer_token_prod, nhs_number):
     """
     .. include:: ../../partials/validation/test_invalid_nhs_number.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("prod")
-    data["data"]["attributes"]["messages"][0]["recipient"]["nhsNumber"] = nhs_number
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.PROD_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=data
+        "/recipient/nhsNumber",
+        nhs_number
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_nhs_number_error("/data/attributes/messages/0/recipient/nhsNumber"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_nhs_number_error(result.pointer),
         None
     )
 
@@ -203,21 +207,19 @@ def test_invalid_dob(bearer_token_prod, dob):
     """
     .. include:: ../../partials/validation/test_invalid_dob.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("prod")
-    data["data"]["attributes"]["messages"][0]["recipient"]["dateOfBirth"] = dob
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.PROD_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=data
+        "/recipient/dateOfBirth",
+        dob
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/recipient/dateOfBirth"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         None
     )
 
@@ -349,21 +351,19 @@ def test_invalid_personalisation(bearer_token_prod, personalisation):
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("prod")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.PROD_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         None
     )
 
@@ -374,21 +374,19 @@ def test_null_personalisation(bearer_token_prod, personalisation):
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    data = Generators.generate_valid_create_message_batch_body("prod")
-    data["data"]["attributes"]["messages"][0]["personalisation"] = personalisation
-    resp = requests.post(
+    result = multiplexer.result(
         f"{constants.PROD_URL}{MESSAGE_BATCHES_ENDPOINT}",
-        headers={
+        {
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=data
+        "/personalisation",
+        personalisation
     )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_null_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_null_value_error(result.pointer),
         None
     )
 
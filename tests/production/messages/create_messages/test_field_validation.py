@@ -49,9 +49,9 @@ def test_property_missing(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_body("prod"),
-            property
+            pointer
         ),
     )
 
@@ -78,9 +78,9 @@ def test_data_null(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_body("prod"),
-            property
+            pointer
         ),
     )
 
@@ -107,9 +107,9 @@ def test_data_invalid(bearer_token_prod, property, pointer):
             **headers,
             "Authorization": bearer_token_prod.value
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_body("prod"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -1,7 +1,7 @@
 import requests
 import pytest
 import uuid
-from lib import Assertions, Permutations, Generators
+from lib import Assertions, Permutations, Generators, ValidationMultiplexer
 import lib.constants.constants as constants
 from lib.constants.message_batches_paths import MISSING_PROPERTIES_PATHS, NULL_PROPERTIES_PATHS, \
     INVALID_PROPERTIES_PATHS, DUPLICATE_PROPERTIES_PATHS, TOO_FEW_PROPERTIES_PATHS, MESSAGE_BATCHES_ENDPOINT
@@ -10,6 +10,12 @@ headers = {
     "Content-Type": "application/json"
 }
 
+# the invalid message value cases are packed into one request per correlation id, see ValidationMultiplexer
+multiplexer = ValidationMultiplexer("sandbox")
+multiplexer.add("/recipient/nhsNumber", constants.INVALID_NHS_NUMBER)
+multiplexer.add("/recipient/dateOfBirth", constants.INVALID_DOB)
+multiplexer.add("/personalisation", constants.INVALID_PERSONALISATION_VALUES + constants.NULL_VALUES)
+
 
 @pytest.mark.sandboxtest
 @pytest.mark.parametrize("correlation_id", constants.CORRELATION_IDS)
@@ -50,9 +56,9 @@ def test_property_missing(nhsd_apim_proxy_url, property, pointer, correlation_id
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_batch_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -80,9 +86,9 @@ def test_data_null(nhsd_apim_proxy_url, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_batch_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -110,9 +116,9 @@ def test_data_invalid(nhsd_apim_proxy_url, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("sandbox"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -173,9 +179,9 @@ def test_data_too_few_items(nhsd_apim_proxy_url, property, pointer, correlation_
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_batch_body("sandbox"),
-            property,
+            pointer,
             []
         ),
     )
@@ -195,33 +201,16 @@ def test_invalid_nhs_number(nhsd_apim_proxy_url, nhs_number, correlation_id):
     """
     .. include:: ../../partials/validation/test_invalid_nhs_number.rst
     """
-    resp = requests.post(f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}", headers={
-        **headers,
-        "X-Correlation-Id": correlation_id
-    }, json={
-        "data": {
-            "type": "MessageBatch",
-            "attributes": {
-                "routingPlanId": "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
-                "messageBatchReference": str(uuid.uuid1()),
-                "messages": [
-                    {
-                        "messageReference": "72f2fa29-1570-47b7-9a67-63dc4b28fc1b",
-                        "recipient": {
-                            "nhsNumber": nhs_number,
-                            "dateOfBirth": "2023-01-01"
-                        },
-                        "personalisation": {}
-                    }
-                ]
-            }
-        }
-    })
+    result = multiplexer.result(
+        f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
+        {**headers, "X-Correlation-Id": correlation_id},
+        "/recipient/nhsNumber",
+        nhs_number
+    )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_nhs_number_error("/data/attributes/messages/0/recipient/nhsNumber"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_nhs_number_error(result.pointer),
         correlation_id
     )
 
@@ -233,32 +222,16 @@ def test_invalid_dob(nhsd_apim_proxy_url, dob, correlation_id):
     """
     .. include:: ../../partials/validation/test_invalid_dob.rst
     """
-    resp = requests.post(f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}", headers={
-        **headers,
-        "X-Correlation-Id": correlation_id
-    }, json={
-        "data": {
-            "type": "MessageBatch",
-            "attributes": {
-                "routingPlanId": "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
-                "messageBatchReference": str(uuid.uuid1()),
-                "messages": [
-                    {
-                        "messageReference": "72f2fa29-1570-47b7-9a67-63dc4b28fc1b",
-                        "recipient": {
-                            "nhsNumber": "9990548609",
-                            "dateOfBirth": dob
-                        },
-                        "personalisation": {}
-                    }
-                ]
-            }
-        }
-    })
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/recipient/dateOfBirth"),
+    result = multiplexer.result(
+        f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
+        {**headers, "X-Correlation-Id": correlation_id},
+        "/recipient/dateOfBirth",
+        dob
+    )
+
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -480,33 +453,16 @@ def test_invalid_personalisation(nhsd_apim_proxy_url, correlation_id, personalis
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    resp = requests.post(f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}", headers={
-        **headers,
-        "X-Correlation-Id": correlation_id
-    }, json={
-        "data": {
-            "type": "MessageBatch",
-            "attributes": {
-                "routingPlanId": "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
-                "messageBatchReference": str(uuid.uuid1()),
-                "messages": [
-                    {
-                        "messageReference": "72f2fa29-1570-47b7-9a67-63dc4b28fc1b",
-                        "recipient": {
-                            "nhsNumber": "9990548609",
-                            "dateOfBirth": "2023-01-01"
-                        },
-                        "personalisation": personalisation
-                    }
-                ]
-            }
-        }
-    })
+    result = multiplexer.result(
+        f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
+        {**headers, "X-Correlation-Id": correlation_id},
+        "/personalisation",
+        personalisation
+    )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_invalid_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_invalid_value_error(result.pointer),
         correlation_id
     )
 
@@ -518,33 +474,16 @@ def test_null_personalisation(nhsd_apim_proxy_url, correlation_id, personalisati
     """
     .. include:: ../../partials/validation/test_invalid_personalisation.rst
     """
-    resp = requests.post(f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}", headers={
-        **headers,
-        "X-Correlation-Id": correlation_id
-    }, json={
-        "data": {
-            "type": "MessageBatch",
-            "attributes": {
-                "routingPlanId": "b838b13c-f98c-4def-93f0-515d4e4f4ee1",
-                "messageBatchReference": str(uuid.uuid1()),
-                "messages": [
-                    {
-                        "messageReference": "72f2fa29-1570-47b7-9a67-63dc4b28fc1b",
-                        "recipient": {
-                            "nhsNumber": "9990548609",
-                            "dateOfBirth": "2023-01-01"
-                        },
-                        "personalisation": personalisation
-                    }
-                ]
-            }
-        }
-    })
+    result = multiplexer.result(
+        f"{nhsd_apim_proxy_url}{MESSAGE_BATCHES_ENDPOINT}",
+        {**headers, "X-Correlation-Id": correlation_id},
+        "/personalisation",
+        personalisation
+    )
 
-    Assertions.assert_error_with_optional_correlation_id(
-        resp,
-        400,
-        Generators.generate_null_value_error("/data/attributes/messages/0/personalisation"),
+    Assertions.assert_multiplexed_error(
+        result,
+        Generators.generate_null_value_error(result.pointer),
         correlation_id
     )
 
@@ -53,9 +53,9 @@ def test_property_missing(nhsd_apim_proxy_url, property, pointer, correlation_id
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_without_key(
+        json=Permutations.new_dict_without_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -83,9 +83,9 @@ def test_data_null(nhsd_apim_proxy_url, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_null_key(
+        json=Permutations.new_dict_with_null_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property
+            pointer
         ),
     )
 
@@ -113,9 +113,9 @@ def test_data_invalid(nhsd_apim_proxy_url, property, pointer, correlation_id):
             **headers,
             "X-Correlation-Id": correlation_id
         },
-        json=Permutations.new_dict_with_new_value(
+        json=Permutations.new_dict_with_value_at_pointer(
             Generators.generate_valid_create_message_body("sandbox"),
-            property,
+            pointer,
             "invalid string"
         ),
     )
@@ -37,3 +37,33 @@ def test_200_get_message_valid_response_bodies(nhsd_apim_proxy_url, message_ids)
     url = f"{nhsd_apim_proxy_url}{MESSAGES_ENDPOINT}/{message_ids}"
     resp = requests.get(url)
     Assertions.assert_200_valid_message_id_response_body(resp, message_ids, url)
+
+
+@pytest.mark.sandboxtest
+@pytest.mark.parametrize('message_ids', get_200_message_ids())
+def test_304_get_message_not_modified(nhsd_apim_proxy_url, message_ids):
+    """
+    .. include:: ../../partials/happy_path/test_304_get_message_not_modified.rst
+    """
+    url = f"{nhsd_apim_proxy_url}{MESSAGES_ENDPOINT}/{message_ids}"
+    resp = requests.get(url, headers={"Accept": constants.DEFAULT_CONTENT_TYPE})
+    Assertions.assert_200_response_message(resp, nhsd_apim_proxy_url)
+
+    etag = resp.headers.get("ETag")
+    assert etag is not None
+    assert not etag.startswith("W/")
+
+    not_modified_resp = requests.get(url, headers={
+        "Accept": constants.DEFAULT_CONTENT_TYPE,
+        "If-None-Match": etag
+    })
+    assert not_modified_resp.status_code == 304
+    assert not_modified_resp.headers.get("ETag") == etag
+    assert not_modified_resp.content == b""
+
+    modified_resp = requests.get(url, headers={
+        "Accept": constants.DEFAULT_CONTENT_TYPE,
+        "If-None-Match": "\"stale-etag\""
+    })
+    assert modified_resp.status_code == 200
+    assert modified_resp.json() == resp.json()
@@ -1,6 +1,9 @@
+import asyncio
+import json
+import os
 import requests
 import pytest
-from lib import Assertions, Generators
+from lib import Assertions, Generators, NhsAppAccountsPaginator
 from lib.constants.nhsapp_accounts_paths import NHSAPP_ACCOUNTS_ENDPOINT, ODS_CODE_PARAM_NAME, PAGE_PARAM_NAME, \
     SINGLE_PAGE_ODS_CODES, MULTIPLE_PAGES_ODS_CODES, CORRELATION_IDS, VALID_MULTI_PAGE_NUMBERS, \
     MULTI_LAST_PAGE, VALID_SINGLE_PAGE_NUMBERS
@@ -46,3 +49,31 @@ def test_multi_pages(nhsd_apim_proxy_url, ods_code, page, correlation_id):
     self_page_in_response = page if page is not None else 1
 
     Assertions.assert_200_response_nhsapp_accounts(resp, nhsd_apim_proxy_url, ods_code, self_page_in_response)
+
+
+def get_multi_page_accounts():
+    directory_path = os.path.join(os.path.dirname(__file__), '../../../sandbox/nhsapp-accounts')
+    accounts = []
+    for page in range(1, MULTI_LAST_PAGE + 1):
+        with open(os.path.join(directory_path, f"{page}.json")) as f:
+            accounts.extend(json.load(f).get("data").get("attributes").get("accounts"))
+    return accounts
+
+
+@pytest.mark.sandboxtest
+@pytest.mark.parametrize("ods_code", MULTIPLE_PAGES_ODS_CODES)
+def test_all_pages_paginated(nhsd_apim_proxy_url, ods_code):
+
+    """
+    .. include:: ../../partials/happy_path/test_200_get_nhsapp_accounts_all_pages.rst
+    """
+    paginator = NhsAppAccountsPaginator(nhsd_apim_proxy_url, {}, ods_code)
+    expected_accounts = get_multi_page_accounts()
+
+    assert list(paginator) == expected_accounts
+    assert paginator.last_page == MULTI_LAST_PAGE
+
+    async def collect():
+        return [account async for account in NhsAppAccountsPaginator(nhsd_apim_proxy_url, {}, ods_code)]
+
+    assert asyncio.run(collect()) == expected_accounts
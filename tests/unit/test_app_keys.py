@@ -0,0 +1,60 @@
+import pytest
+from types import SimpleNamespace
+from lib import app_keys
+
+DEV_EMAIL = "apm-testing-internal-dev@nhs.net"
+APP_NAME = "apim-auto-app"
+PRODUCT_NAME = "communications-manager-pr-1"
+
+
+class AppKeysAPI():
+    """Raises like pytest_nhsd_apim's AppKeysAPI when the DELETE doesn't return a 200"""
+    deleted = []
+    status_code = 200
+
+    def __init__(self, client):
+        pass
+
+    def delete_product_app_key_association(self, email, app_name, app_key, apiproduct_name):
+        if self.status_code != 200:
+            raise Exception(f"DELETE request to https://example.com failed with status_code: {self.status_code}, "
+                            "Reason: Error and Content: {}")
+        AppKeysAPI.deleted.append((email, app_name, app_key, apiproduct_name))
+        return {"apiProducts": []}
+
+
+@pytest.fixture(autouse=True)
+def api(monkeypatch):
+    monkeypatch.setenv("NON_PROD_API_KEY", "key")
+    monkeypatch.setattr(app_keys, "ApigeeNonProdCredentials", lambda: None)
+    monkeypatch.setattr(app_keys, "ApigeeClient", lambda config: SimpleNamespace())
+    monkeypatch.setattr(app_keys, "AppKeysAPI", AppKeysAPI)
+    AppKeysAPI.deleted = []
+    AppKeysAPI.status_code = 200
+    return AppKeysAPI
+
+
+def remove():
+    return app_keys.remove_api_product_from_application(DEV_EMAIL, APP_NAME, "NON_PROD_API_KEY", PRODUCT_NAME)
+
+
+@pytest.mark.unittest
+def test_remove_deletes_the_association(api):
+    assert remove() == {"apiProducts": []}
+    assert api.deleted == [(DEV_EMAIL, APP_NAME, "key", PRODUCT_NAME)]
+
+
+@pytest.mark.unittest
+def test_remove_treats_404_as_already_removed(api):
+    api.status_code = 404
+
+    assert remove() is None
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("status_code", [401, 500])
+def test_remove_raises_other_failures(api, status_code):
+    api.status_code = status_code
+
+    with pytest.raises(Exception, match=f"status_code: {status_code}"):
+        remove()
@@ -0,0 +1,140 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from lib.burst import Burst, BurstResult
+
+
+class BurstServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BurstHandler)
+        self.requests = []
+        self.lock = threading.Lock()
+        self.limit = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/messages?page=1"
+
+
+class BurstHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.requests.append((time.perf_counter(), self.client_address, self.path, dict(self.headers), body))
+            count = len(self.server.requests)
+        if self.server.limit == "close":
+            self.close_connection = True
+            return
+        status = 429 if self.server.limit is not None and count > self.server.limit else 200
+        content = f'{{"count": {count}}}'.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = BurstServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def burst(server):
+    return Burst(server.url, {"Authorization": "Bearer token", "X-Correlation-Id": None}, method="POST", body="{}")
+
+
+@pytest.mark.unittest
+def test_requests_are_released_together_on_connections_of_their_own(server):
+    result = burst(server).send(10)
+
+    assert result.statuses() == [200] * 10
+    assert len({address for _, address, _, _, _ in server.requests}) == 10
+    assert max(result.sent_at) - min(result.sent_at) < 0.1
+
+
+@pytest.mark.unittest
+def test_requests_are_sent_as_given(server):
+    resp = burst(server).send(1).last()
+
+    _, _, path, headers, body = server.requests[0]
+    assert path == "/v1/messages?page=1"
+    assert headers["Authorization"] == "Bearer token"
+    assert "X-Correlation-Id" not in headers
+    assert body == b"{}"
+    assert isinstance(resp, requests.Response)
+    assert resp.json() == {"count": 1}
+    assert resp.headers["content-type"] == "application/json"
+
+
+@pytest.mark.unittest
+def test_rate_spaces_requests_on_a_fixed_schedule(server):
+    result = burst(server).send(5, rate=20)
+
+    offsets = [sent - result.sent_at[0] for sent in result.sent_at]
+    for i, offset in enumerate(offsets):
+        assert i / 20 - 0.005 <= offset < i / 20 + 0.04
+    assert result.duration() >= 0.2
+
+
+@pytest.mark.unittest
+def test_first_429_to_arrive_is_returned(server):
+    server.limit = 3
+
+    result = burst(server).send(6, rate=50)
+
+    assert result.statuses() == [200, 200, 200, 429, 429, 429]
+    assert result.first_limited() == 3
+    assert result.limited_or_last().status_code == 429
+    assert result.limited_or_last().json() == {"count": 4}
+
+
+@pytest.mark.unittest
+def test_failed_request_is_raised(server):
+    server.limit = "close"
+
+    with pytest.raises(Exception):
+        burst(server).send(2)
+
+
+def response(status_code):
+    resp = requests.Response()
+    resp.status_code = status_code
+    return resp
+
+
+@pytest.mark.unittest
+def test_result_orders_responses_by_arrival():
+    responses = [response(200), response(429), response(200), response(429)]
+    result = BurstResult(responses, sent_at=[0, 0, 0, 0], received_at=[4, 2, 1, 3])
+
+    assert result.statuses() == [200, 429, 429, 200]
+    assert result.first_limited() == 1
+    assert result.limited() == [responses[1], responses[3]]
+    assert result.limited_or_last() is responses[1]
+    assert result.last() is responses[0]
+    assert result.duration() == 4
+
+
+@pytest.mark.unittest
+def test_result_without_429_returns_last_to_arrive():
+    responses = [response(200), response(200)]
+    result = BurstResult(responses, sent_at=[0, 1], received_at=[3, 2])
+
+    assert result.first_limited() is None
+    assert result.limited() == []
+    assert result.limited_or_last() is responses[0]
+    assert result.duration() == 3
@@ -0,0 +1,299 @@
+import json
+import socket
+import threading
+import time
+import pytest
+from lib.callback_receiver import API_KEY_HEADER, MAX_BODY_SIZE, SIGNATURE_HEADER, CallbackReceiver, sign
+
+API_KEY = "api-key"
+SECRET = "secret"
+MESSAGE_ID = "2WL3qFTEFM0qMY8xjRbt1LIKCzM"
+MESSAGE_REFERENCE = "1642109b-69eb-447f-8f97-ab70a74f5db4"
+
+
+def message_status(status, idempotency_key=None):
+    item = {
+        "type": "MessageStatus",
+        "attributes": {
+            "messageId": MESSAGE_ID,
+            "messageReference": MESSAGE_REFERENCE,
+            "messageStatus": status,
+            "channels": [{"type": "nhsapp", "channelStatus": "delivered"}],
+            "timestamp": "2023-11-17T14:27:51.413Z",
+            "routingPlan": {"id": "b838b13c-f98c-4def-93f0-515d4e4f4ee1", "version": "ztoe2qRAM8M8vS0bqajhyEBcvXacrGPp"}
+        },
+        "links": {"message": f"https://api.service.nhs.uk/comms/v1/messages/{MESSAGE_ID}"},
+        "meta": {"idempotencyKey": idempotency_key or f"{MESSAGE_ID}-{status}"}
+    }
+    return item
+
+
+def channel_status(status):
+    return {
+        "type": "ChannelStatus",
+        "attributes": {
+            "messageId": MESSAGE_ID,
+            "messageReference": MESSAGE_REFERENCE,
+            "channel": "nhsapp",
+            "channelStatus": status,
+            "timestamp": "2023-11-17T14:27:51.413Z"
+        },
+        "meta": {"idempotencyKey": f"{MESSAGE_ID}-nhsapp-{status}"}
+    }
+
+
+def body(*items):
+    return json.dumps({"data": list(items)}).encode("utf-8")
+
+
+class Connection():
+    """A keep-alive HTTP/1.1 connection to the receiver, sending raw bytes so malformed requests can be made"""
+    def __init__(self, receiver):
+        self.socket = socket.create_connection((receiver.host, receiver.port), timeout=5)
+        self.file = self.socket.makefile("rb")
+
+    def send(self, request):
+        self.socket.sendall(request)
+        status_line = self.file.readline().decode("latin-1")
+        headers = {}
+        while True:
+            line = self.file.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return int(status_line.split(" ")[1]), headers
+
+    def post(self, content, headers=None, method=b"POST"):
+        if headers is None:
+            headers = {
+                API_KEY_HEADER.encode("latin-1"): API_KEY.encode("latin-1"),
+                SIGNATURE_HEADER.encode("latin-1"): sign(SECRET, content).encode("latin-1")
+            }
+        head = b"".join(name + b": " + value + b"\r\n" for name, value in headers.items())
+        return self.send(method + b" /callbacks HTTP/1.1\r\nHost: localhost\r\n" + head +
+                         f"Content-Length: {len(content)}\r\n\r\n".encode("latin-1") + content)
+
+    def closed(self):
+        return self.file.read(1) == b""
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+def post(receiver, content):
+    connection = Connection(receiver)
+    try:
+        return connection.post(content)
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def receiver():
+    receiver = CallbackReceiver(API_KEY, SECRET).start_in_thread()
+    yield receiver
+    receiver.stop_in_thread()
+
+
+@pytest.fixture
+def connection(receiver):
+    connection = Connection(receiver)
+    yield connection
+    connection.close()
+
+
+def signed_headers(content, api_key=API_KEY.encode("latin-1"), signature=None):
+    return {
+        API_KEY_HEADER.encode("latin-1"): api_key,
+        SIGNATURE_HEADER.encode("latin-1"): signature or sign(SECRET, content).encode("latin-1")
+    }
+
+
+@pytest.mark.unittest
+def test_accepts_signed_callback_on_keep_alive_connection(receiver, connection):
+    first = connection.post(body(message_status("sending")))
+    second = connection.post(body(message_status("delivered")))
+
+    assert first == (202, {"content-length": "0", "connection": "keep-alive"})
+    assert second[0] == 202
+    assert [event.status for event in receiver.history(MESSAGE_ID)] == ["sending", "delivered"]
+    assert receiver.received == 2
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("api_key", [None, b"wrong-key", "clé".encode("utf-8")], ids=["missing", "wrong", "non-ascii"])
+def test_rejects_wrong_api_key_with_401(receiver, connection, api_key):
+    content = body(message_status("delivered"))
+    headers = signed_headers(content)
+    if api_key is None:
+        del headers[API_KEY_HEADER.encode("latin-1")]
+    else:
+        headers[API_KEY_HEADER.encode("latin-1")] = api_key
+
+    assert connection.post(content, headers)[0] == 401
+    assert receiver.history(MESSAGE_ID) == []
+    assert receiver.rejected == 1
+
+
+@pytest.mark.unittest
+def test_accepts_non_ascii_api_key():
+    receiver = CallbackReceiver("clé", SECRET).start_in_thread()
+    connection = Connection(receiver)
+    try:
+        content = body(message_status("delivered"))
+
+        assert connection.post(content, signed_headers(content, api_key="clé".encode("utf-8")))[0] == 202
+    finally:
+        connection.close()
+        receiver.stop_in_thread()
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("signature", [b"0" * 64, "é".encode("utf-8") * 32], ids=["wrong", "non-ascii"])
+def test_rejects_wrong_signature_with_403(receiver, connection, signature):
+    content = body(message_status("delivered"))
+
+    assert connection.post(content, signed_headers(content, signature=signature))[0] == 403
+    assert receiver.history(MESSAGE_ID) == []
+
+
+@pytest.mark.unittest
+def test_signature_covers_the_body(receiver, connection):
+    headers = signed_headers(body(message_status("sending")))
+
+    assert connection.post(body(message_status("delivered")), headers)[0] == 403
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("content", [
+    b"not json",
+    b"{}",
+    json.dumps({"data": [{"type": "MessageStatus", "attributes": {}}]}).encode("utf-8")
+], ids=["not-json", "no-data", "missing-attributes"])
+def test_rejects_malformed_callback_with_400(receiver, connection, content):
+    assert connection.post(content)[0] == 400
+    assert receiver.rejected == 1
+
+
+@pytest.mark.unittest
+def test_rejects_callback_not_matching_schema_with_400():
+    receiver = CallbackReceiver(API_KEY, SECRET, validate=True).start_in_thread()
+    connection = Connection(receiver)
+    try:
+        invalid = message_status("delivered")
+        invalid["attributes"]["messageId"] = "not-a-ksuid"
+
+        assert connection.post(body(invalid))[0] == 400
+        assert connection.post(body(message_status("delivered")))[0] == 202
+    finally:
+        connection.close()
+        receiver.stop_in_thread()
+
+
+@pytest.mark.unittest
+def test_rejects_other_methods_with_405(receiver, connection):
+    assert connection.post(body(message_status("delivered")), method=b"PUT")[0] == 405
+
+
+@pytest.mark.unittest
+def test_rejects_request_without_length_with_411_and_closes(connection):
+    status, headers = connection.send(b"POST /callbacks HTTP/1.1\r\nHost: localhost\r\n\r\n")
+
+    assert status == 411
+    assert headers["connection"] == "close"
+    assert connection.closed()
+
+
+@pytest.mark.unittest
+def test_rejects_body_over_limit_with_413_and_closes(connection):
+    status, headers = connection.send(
+        f"POST /callbacks HTTP/1.1\r\nHost: localhost\r\nContent-Length: {MAX_BODY_SIZE + 1}\r\n\r\n".encode("latin-1"))
+
+    assert status == 413
+    assert headers["connection"] == "close"
+    assert connection.closed()
+
+
+@pytest.mark.unittest
+def test_ignores_redelivered_idempotency_key(receiver, connection):
+    assert connection.post(body(message_status("delivered", "key-1")))[0] == 202
+    assert connection.post(body(message_status("delivered", "key-1")))[0] == 202
+
+    assert len(receiver.history(MESSAGE_ID)) == 1
+    assert receiver.received == 1
+    assert receiver.duplicates == 1
+
+
+@pytest.mark.unittest
+def test_ignores_redelivered_content_without_idempotency_key(receiver, connection):
+    item = message_status("delivered")
+    del item["meta"]
+
+    connection.post(body(item))
+    connection.post(body(item))
+
+    assert receiver.received == 1
+    assert receiver.duplicates == 1
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("message", [MESSAGE_ID, MESSAGE_REFERENCE], ids=["message-id", "message-reference"])
+def test_wait_resolves_when_status_arrives(receiver, message):
+    post(receiver, body(message_status("sending")))
+
+    # the status arrives from another thread while the receiver is waiting for it
+    threading.Timer(0.2, lambda: post(receiver, body(message_status("delivered")))).start()
+    event = receiver.wait(message, "delivered", timeout=5)
+
+    assert event.message_id == MESSAGE_ID
+    assert event.message_reference == MESSAGE_REFERENCE
+    assert event.status == "delivered"
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("message", [MESSAGE_ID, MESSAGE_REFERENCE], ids=["message-id", "message-reference"])
+def test_wait_resolves_straight_away_for_status_already_reached(receiver, connection, message):
+    connection.post(body(message_status("delivered")))
+
+    assert receiver.wait(message, "delivered", timeout=1).status == "delivered"
+
+
+@pytest.mark.unittest
+def test_wait_for_channel_status(receiver, connection):
+    connection.post(body(channel_status("delivered")))
+
+    event = receiver.wait(MESSAGE_REFERENCE, "delivered", channel="nhsapp", timeout=1)
+
+    assert event.channel == "nhsapp"
+    with pytest.raises(TimeoutError):
+        receiver.wait(MESSAGE_ID, "delivered", timeout=0.1)
+
+
+@pytest.mark.unittest
+def test_wait_fails_when_message_fails_first(receiver):
+    threading.Timer(0.2, lambda: post(receiver, body(message_status("failed")))).start()
+
+    with pytest.raises(ValueError, match="failed while waiting for it to be delivered"):
+        receiver.wait(MESSAGE_ID, "delivered", timeout=5)
+
+
+@pytest.mark.unittest
+def test_wait_fails_straight_away_when_message_already_failed(receiver, connection):
+    connection.post(body(message_status("failed")))
+
+    with pytest.raises(ValueError):
+        receiver.wait(MESSAGE_REFERENCE, "delivered", timeout=5)
+    assert receiver.wait(MESSAGE_ID, "failed", timeout=1).status == "failed"
+
+
+@pytest.mark.unittest
+def test_wait_times_out(receiver, connection):
+    connection.post(body(message_status("sending")))
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="Received: \\[CallbackEvent"):
+        receiver.wait(MESSAGE_ID, "delivered", timeout=0.2)
+
+    assert time.monotonic() - started < 2
@@ -0,0 +1,225 @@
+import json
+import pytest
+import requests
+import yaml
+from types import SimpleNamespace
+from lib.contract import Contract, ContractValidator
+from lib.schema_validators import SchemaValidationError, SchemaValidators
+
+MESSAGE_URL = "https://example.com/comms/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM"
+MESSAGES_URL = "https://example.com/comms/v1/messages"
+NODEID = "tests/test_messages.py::test_get_message"
+
+SPECIFICATION = {
+    "specification/communications-manager.yaml": {
+        "paths": {
+            "/v1/messages": {"post": {"$ref": "endpoints/create_message.yaml"}},
+            "/v1/messages/{messageId}": {
+                "get": {
+                    "responses": {
+                        "200": {"content": {"application/vnd.api+json": {
+                            "schema": {"$ref": "schemas/responses/GetMessage.yaml"}}}},
+                        "404": {"description": "Not found"}
+                    }
+                }
+            },
+            "/v1/inline": {
+                "get": {"responses": {"200": {"content": {"application/json": {"schema": {"type": "object"}}}}}}
+            },
+            "/v1/missing-schema": {
+                "get": {"responses": {"200": {"content": {"application/json": {
+                    "schema": {"$ref": "schemas/responses/Missing.yaml"}}}}}}
+            },
+            "message-status-callback": {"post": {"responses": {"202": {"description": "Accepted"}}}}
+        }
+    },
+    "specification/endpoints/create_message.yaml": {
+        "responses": {
+            "201": {"content": {"application/vnd.api+json": {
+                "schema": {"$ref": "../schemas/responses/GetMessage.yaml"}}}},
+            "4XX": {"content": {"application/vnd.api+json": {
+                "schema": {"$ref": "../schemas/responses/Error.yaml"}}}}
+        }
+    },
+    "specification/schemas/responses/GetMessage.yaml": {
+        "type": "object",
+        "required": ["data"],
+        "properties": {"data": {"type": "object", "required": ["id"], "properties": {"id": {"type": "string"}}}}
+    },
+    "specification/schemas/responses/Error.yaml": {
+        "type": "object",
+        "required": ["errors"],
+        "properties": {"errors": {"type": "array", "minItems": 1}}
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def proxy_url(monkeypatch):
+    monkeypatch.setattr("lib.traffic.PROXY_URLS", {"https://example.com/comms"})
+
+
+@pytest.fixture
+def contract(tmp_path):
+    for path, document in SPECIFICATION.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(yaml.safe_dump(document), encoding="utf-8")
+    validators = SchemaValidators(str(tmp_path / "specification" / "schemas"), str(tmp_path / "cache"))
+    return Contract(str(tmp_path / "specification" / "communications-manager.yaml"), validators)
+
+
+def response(method, url, status_code, body=None, content=None, content_type="application/vnd.api+json"):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = content if content is not None else (json.dumps(body).encode("utf-8") if body is not None else b"")
+    resp.headers["Content-Type"] = content_type
+    resp.request = requests.Request(method, url).prepare()
+    return resp
+
+
+def assert_violation(contract, resp, message):
+    with pytest.raises(SchemaValidationError, match=message):
+        contract.validate_response(resp)
+
+
+@pytest.mark.unittest
+def test_matching_response_passes(contract):
+    resp = response("GET", MESSAGE_URL, 200, {"data": {"id": "2WL3qFTEFM0qMY8xjRbt1LIKCzM"}})
+
+    assert contract.validate_response(resp) == "GET /v1/messages/{messageId}"
+
+
+@pytest.mark.unittest
+def test_body_not_matching_schema_is_a_violation(contract):
+    assert_violation(contract, response("GET", MESSAGE_URL, 200, {"data": {}}), "/data/id is required")
+
+
+@pytest.mark.unittest
+def test_undocumented_status_is_a_violation(contract):
+    assert_violation(contract, response("GET", MESSAGE_URL, 500, {"errors": []}),
+                     "status 500 is not documented for GET /v1/messages/{messageId}")
+
+
+@pytest.mark.unittest
+def test_status_range_is_documented(contract):
+    assert contract.validate_response(response("POST", MESSAGES_URL, 429, {"errors": [{}]})) == "POST /v1/messages"
+    assert_violation(contract, response("POST", MESSAGES_URL, 400, {"errors": []}), "/errors must have at least 1")
+
+
+@pytest.mark.unittest
+def test_missing_body_is_a_violation(contract):
+    assert_violation(contract, response("GET", MESSAGE_URL, 200), "must have a body")
+
+
+@pytest.mark.unittest
+def test_body_that_is_not_json_is_a_violation(contract):
+    assert_violation(contract, response("GET", MESSAGE_URL, 200, content=b"<html>"), "response body is not json")
+
+
+@pytest.mark.unittest
+def test_status_without_content_needs_no_body(contract):
+    assert contract.validate_response(response("GET", MESSAGE_URL, 404)) == "GET /v1/messages/{messageId}"
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("method, url", [
+    ("GET", "https://example.com/comms/v1/undocumented"),
+    ("DELETE", MESSAGE_URL),
+    ("GET", "https://example.com/oauth2/token"),
+    ("GET", "https://api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/product"),
+])
+def test_requests_that_are_not_documented_operations_are_not_checked(contract, method, url):
+    assert contract.validate_response(response(method, url, 500)) is None
+
+
+@pytest.mark.unittest
+def test_callbacks_are_not_operations(contract):
+    assert "POST message-status-callback" not in contract.operations
+
+
+@pytest.fixture
+def validator(contract):
+    validator = ContractValidator(SimpleNamespace(), contract)
+    validator.nodeid = NODEID
+    return validator
+
+
+def call(validator, resp):
+    validator(resp.request, resp, None, 0, 0)
+
+
+@pytest.mark.unittest
+def test_violations_are_recorded_against_the_test(validator):
+    call(validator, response("GET", MESSAGE_URL, 500, {}))
+    call(validator, response("GET", MESSAGE_URL, 200, {"data": {"id": "1"}}))
+
+    assert validator.violations == {
+        NODEID: ["GET /v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM 500: / status 500 is not documented for "
+                 "GET /v1/messages/{messageId}"]
+    }
+    assert validator.counts == {"responses": 2, "violations": 1}
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("url, error", [
+    ("https://example.com/comms/v1/inline", "ValueError"),
+    ("https://example.com/comms/v1/missing-schema", "KeyError"),
+])
+def test_broken_specification_is_recorded_not_raised(validator, url, error):
+    call(validator, response("GET", url, 200, {}))
+
+    [violation] = validator.violations[NODEID]
+    assert f"cannot check, {error}" in violation
+
+
+@pytest.mark.unittest
+def test_failed_request_is_not_checked(validator):
+    validator(requests.Request("GET", MESSAGE_URL).prepare(), None, ConnectionError(), 0, 0)
+
+    assert validator.counts == {}
+
+
+def make_report(validator, item, outcome="passed"):
+    report = SimpleNamespace(outcome=outcome, passed=outcome == "passed", longrepr=None, sections=[])
+    hook = validator.pytest_runtest_makereport(item, SimpleNamespace(when="call"))
+    next(hook)
+    with pytest.raises(StopIteration):
+        hook.send(SimpleNamespace(get_result=lambda: report))
+    return report
+
+
+@pytest.mark.unittest
+def test_passing_test_with_violations_fails(validator):
+    item = SimpleNamespace(nodeid=NODEID)
+    call(validator, response("GET", MESSAGE_URL, 200))
+
+    report = make_report(validator, item)
+
+    assert report.outcome == "failed"
+    assert "GET /v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM 200: / must have a body" in report.longrepr
+
+
+@pytest.mark.unittest
+def test_failing_test_reports_violations_in_a_section(validator):
+    item = SimpleNamespace(nodeid=NODEID)
+    call(validator, response("GET", MESSAGE_URL, 200))
+
+    report = make_report(validator, item, "failed")
+
+    assert report.longrepr is None
+    assert report.sections[0][0] == "contract"
+
+
+@pytest.mark.unittest
+def test_violations_are_reset_when_test_is_rerun(validator):
+    item = SimpleNamespace(nodeid=NODEID)
+    call(validator, response("GET", MESSAGE_URL, 200))
+    assert make_report(validator, item).outcome == "failed"
+
+    # the rerun gets a matching response, so only it decides the outcome
+    validator.pytest_runtest_setup(item)
+    call(validator, response("GET", MESSAGE_URL, 200, {"data": {"id": "1"}}))
+
+    assert make_report(validator, item).outcome == "passed"
+    assert validator.counts["violations"] == 1
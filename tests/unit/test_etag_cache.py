@@ -0,0 +1,118 @@
+import pytest
+import requests
+from lib.etag_cache import EtagCache
+from lib.helper import Helper
+
+URL = "https://example.com/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM"
+HEADERS = {"Authorization": "Bearer token"}
+
+
+def response(status_code, headers, content=b""):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.headers.update(headers)
+    resp._content = content
+    resp.url = URL
+    return resp
+
+
+class FakeServer():
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers):
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer([])
+    monkeypatch.setattr("lib.helper.requests.get", server.get)
+    return server
+
+
+@pytest.mark.unittest
+def test_not_modified_returns_cached_body_with_fresh_headers(server):
+    etag_cache = EtagCache()
+    server.responses = [
+        response(200, {"ETag": '"1"', "Content-Type": "application/json", "X-Correlation-Id": "first"},
+                 b'{"data": {}}'),
+        response(304, {"ETag": '"1"', "Content-Length": "0", "X-Correlation-Id": "second"}),
+    ]
+
+    Helper.conditional_get(URL, HEADERS, etag_cache)
+    resp = Helper.conditional_get(URL, HEADERS, etag_cache)
+
+    assert server.requests[1]["If-None-Match"] == '"1"'
+    assert resp.status_code == 200
+    assert resp.json() == {"data": {}}
+    assert resp.headers["X-Correlation-Id"] == "second"
+    assert resp.headers["Content-Type"] == "application/json"
+    assert "Content-Length" not in resp.headers
+    assert etag_cache.revalidations == 1
+
+
+@pytest.mark.unittest
+def test_cached_response_is_not_changed_by_revalidation(server):
+    etag_cache = EtagCache()
+    first = response(200, {"ETag": '"1"', "X-Correlation-Id": "first"}, b"{}")
+    server.responses = [first, response(304, {"X-Correlation-Id": "second"})]
+
+    Helper.conditional_get(URL, HEADERS, etag_cache)
+    Helper.conditional_get(URL, HEADERS, etag_cache)
+
+    assert first.headers["X-Correlation-Id"] == "first"
+
+
+@pytest.mark.unittest
+def test_changed_resource_replaces_cached_response(server):
+    etag_cache = EtagCache()
+    second = response(200, {"ETag": '"2"'}, b'{"version": 2}')
+    server.responses = [response(200, {"ETag": '"1"'}, b'{"version": 1}'), second]
+
+    Helper.conditional_get(URL, HEADERS, etag_cache)
+    resp = Helper.conditional_get(URL, HEADERS, etag_cache)
+
+    assert resp is second
+    assert etag_cache.get((URL, HEADERS["Authorization"])) is second
+
+
+@pytest.mark.unittest
+def test_no_cache_sends_unconditional_get(server):
+    server.responses = [response(200, {"ETag": '"1"'}, b"{}"), response(200, {"ETag": '"1"'}, b"{}")]
+
+    Helper.conditional_get(URL, HEADERS)
+    Helper.conditional_get(URL, HEADERS)
+
+    assert "If-None-Match" not in server.requests[1]
+
+
+@pytest.mark.unittest
+def test_poll_revalidates_without_a_cache_from_the_caller(server, monkeypatch):
+    monkeypatch.setattr("lib.helper.time.sleep", lambda seconds: None)
+    sending = b'{"data": {"attributes": {"messageStatus": "sending"}}}'
+    server.responses = [
+        response(200, {"ETag": '"1"'}, sending),
+        response(304, {"ETag": '"1"'}),
+        response(200, {"ETag": '"2"'}, b'{"data": {"attributes": {"messageStatus": "delivered"}}}'),
+    ]
+
+    Helper.poll_get_message("https://example.com", HEADERS, "2WL3qFTEFM0qMY8xjRbt1LIKCzM")
+
+    assert [headers.get("If-None-Match") for headers in server.requests] == [None, '"1"', '"1"']
+
+
+@pytest.mark.unittest
+def test_least_recently_used_response_is_evicted():
+    etag_cache = EtagCache(max_size=2)
+    etag_cache.put("a", response(200, {}))
+    etag_cache.put("b", response(200, {}))
+    etag_cache.get("a")
+    etag_cache.put("c", response(200, {}))
+
+    assert etag_cache.get("b") is None
+    assert etag_cache.get("a") is not None
+    assert etag_cache.get("c") is not None
+    assert etag_cache.evictions == 1
@@ -0,0 +1,125 @@
+import json
+import pytest
+import requests
+from types import SimpleNamespace
+from lib.http_profiler import HttpProfiler, build_report, endpoint
+
+NODEID = "tests/test_messages.py::test_get_message"
+
+
+@pytest.fixture(autouse=True)
+def proxy_url(monkeypatch):
+    monkeypatch.setattr("lib.traffic.PROXY_URLS", {"https://example.com/comms"})
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    return HttpProfiler(SimpleNamespace(), str(tmp_path / "http-profile.json"))
+
+
+def call(profiler, method, url, status=200, elapsed=0.1, body=None, content=b"{}"):
+    request = requests.Request(method, url, data=body).prepare()
+    response = requests.Response()
+    response.status_code = status
+    response._content = content
+    profiler(request, response, None, 0, elapsed)
+
+
+def run_test(profiler, item, *calls):
+    """Runs the hooks of one attempt at item around calls to the profiler"""
+    protocol = profiler.pytest_runtest_protocol(item, None)
+    next(protocol)
+    profiler.pytest_runtest_setup(item)
+    for args in calls:
+        call(profiler, *args)
+    makereport = profiler.pytest_runtest_makereport(item, SimpleNamespace(when="teardown"))
+    next(makereport)
+    with pytest.raises(StopIteration):
+        next(makereport)
+    with pytest.raises(StopIteration):
+        next(protocol)
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("method, url, expected", [
+    ("GET", "https://example.com/comms/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM", "GET /v1/messages/{messageId}"),
+    ("POST", "https://example.com/comms/v1/messages", "POST /v1/messages"),
+    ("PUT", "https://api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/product",
+     "PUT api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/product"),
+])
+def test_endpoint_groups_api_calls_by_route(method, url, expected):
+    assert endpoint(method, url) == expected
+
+
+@pytest.mark.unittest
+def test_requests_are_attributed_to_the_fixture_setting_up(profiler):
+    item = SimpleNamespace(nodeid=NODEID, user_properties=[])
+    protocol = profiler.pytest_runtest_protocol(item, None)
+    next(protocol)
+    fixture_setup = profiler.pytest_fixture_setup(SimpleNamespace(argname="bearer_token_internal_dev"), None)
+    next(fixture_setup)
+    call(profiler, "POST", "https://example.com/oauth2/token")
+    with pytest.raises(StopIteration):
+        next(fixture_setup)
+    call(profiler, "GET", "https://example.com/comms/v1/messages/1")
+
+    assert [(r["nodeid"], r["fixture"]) for r in profiler.records] == [
+        (NODEID, "bearer_token_internal_dev"), (NODEID, None)
+    ]
+
+
+@pytest.mark.unittest
+def test_junit_properties_describe_the_last_attempt(profiler):
+    item = SimpleNamespace(nodeid=NODEID, user_properties=[("other", 1)])
+    run_test(profiler, item, ("GET", "https://example.com/comms/v1/messages/1", 500),
+             ("GET", "https://example.com/comms/v1/messages/1", 500))
+    run_test(profiler, item, ("GET", "https://example.com/comms/v1/messages/1", 200, 0.25, None, b'{"data": {}}'))
+
+    properties = dict(item.user_properties)
+    assert len(item.user_properties) == len(properties)
+    assert properties == {
+        "other": 1,
+        "http_requests": 1,
+        "http_seconds": 0.25,
+        "http_bytes_sent": 0,
+        "http_bytes_received": 12,
+        "http_attempt": 2,
+    }
+
+
+@pytest.mark.unittest
+def test_report_ranks_by_time_and_counts_requests_made_by_reruns(profiler):
+    item = SimpleNamespace(nodeid=NODEID, user_properties=[])
+    run_test(profiler, item, ("POST", "https://example.com/comms/v1/messages", 201, 0.5, b"{}"))
+    run_test(profiler, item, ("POST", "https://example.com/comms/v1/messages", 201, 0.5, b"{}"),
+             ("GET", "https://example.com/comms/v1/messages/1", 200, 2))
+
+    report = build_report(profiler.records)
+
+    assert report["requests"] == 3
+    assert [row["endpoint"] for row in report["endpoints"]] == ["GET /v1/messages/{messageId}", "POST /v1/messages"]
+    post = report["endpoints"][1]
+    assert post["requests"] == 2
+    assert post["rerun_requests"] == 1
+    assert post["bytes_sent"] == 4
+    assert post["statuses"] == {"201": 2}
+    assert report["tests"][0]["rerun_requests"] == 2
+    assert report["fixtures"] == []
+
+
+@pytest.mark.unittest
+def test_controller_reports_the_records_of_every_worker(tmp_path):
+    path = str(tmp_path / "http-profile.json")
+    workers = [HttpProfiler(SimpleNamespace(workerinput={}, workeroutput={}), path) for _ in range(2)]
+    for worker in workers:
+        run_test(worker, SimpleNamespace(nodeid=NODEID, user_properties=[]),
+                 ("GET", "https://example.com/comms/v1/messages/1"))
+        worker.pytest_sessionfinish(None)
+    controller = HttpProfiler(SimpleNamespace(), path)
+
+    for worker in workers:
+        controller.pytest_testnodedown(SimpleNamespace(workeroutput=worker.config.workeroutput), None)
+    controller.pytest_sessionfinish(None)
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["requests"] == 2
@@ -0,0 +1,140 @@
+import pytest
+import requests
+from types import SimpleNamespace
+from lib import impact
+from lib.impact import ImpactMap, ImpactRecorder, SourceIndex, matches_path, select
+
+GET_MESSAGE_TEST = "tests/sandbox/messages/get_message/test_success.py"
+CREATE_BATCH_TEST = "tests/sandbox/message_batches/create_message_batches/test_success.py"
+ACCOUNTS_TEST = "tests/sandbox/nhsapp_accounts/test_success.py"
+UNKNOWN_PATHS_TEST = "tests/sandbox/test_unknown.py"
+LIVE_GET_MESSAGE_TEST = "tests/development/messages/get_message/test_success.py"
+
+TEST_PATHS = {
+    GET_MESSAGE_TEST: {"/v1/messages/x"},
+    CREATE_BATCH_TEST: {"/v1/message-batches"},
+    ACCOUNTS_TEST: {"/channels/nhsapp/accounts"},
+    UNKNOWN_PATHS_TEST: set(),
+    LIVE_GET_MESSAGE_TEST: {"/v1/messages/x"},
+}
+
+
+class FakeImpactMap():
+    def paths(self, path):
+        return TEST_PATHS[path]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SourceIndex()
+
+
+def selected(index, *changed):
+    return select(list(changed), sorted(TEST_PATHS), FakeImpactMap(), index)
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("value, pattern, expected", [
+    ("/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM", "/v1/messages/{messageId}", True),
+    ("/v1/messages/", "/v1/messages", True),
+    ("/v1/messages/a/b", "/v1/messages/{messageId}", False),
+    ("/v1/messages/a/b", "/v1/messages/*", False),
+    ("/v1/messages/a/b", "/v1/**", True),
+    ("/v1/message-batches", "/v1/messages", False),
+])
+def test_matches_path(value, pattern, expected):
+    assert matches_path(value, pattern) is expected
+
+
+@pytest.mark.unittest
+def test_flow_policies_and_resources_map_to_their_flow(index):
+    assert index.proxy["proxies/shared/partials/Partial.Flows.GetMessageEndpoint.xml"] == {"/v1/messages/{messageId}"}
+    assert index.proxy["proxies/shared/policies/AssignMessage.Messages.GetSingle.Request.xml"] == \
+        {"/v1/messages/{messageId}"}
+    assert index.proxy["proxies/shared/resources/jsc/MessageBatches.Create.Validate.js"] == {"/v1/message-batches"}
+    assert index.proxy["proxies/shared/partials/Partial.Proxy.PreFlow.xml"] == {"**"}
+
+
+@pytest.mark.unittest
+def test_sandbox_files_map_to_their_routes(index):
+    assert index.backend["sandbox/handlers/get_message.js"] == {"/api/v1/messages/{messageId}"}
+    assert index.impact("sandbox/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM.json") == \
+        [({"sandbox"}, "backend", {"/api/v1/messages/{messageId}"})]
+    assert index.backend_paths("/v1/messages/x") == {"/api/v1/messages/x"}
+
+
+@pytest.mark.unittest
+def test_specification_files_map_to_the_paths_that_reference_them(index):
+    assert index.spec["specification/schemas/requests/CreateMessageBatch.yaml"] == {"/v1/message-batches"}
+
+
+@pytest.mark.unittest
+def test_policy_change_selects_the_tests_for_its_flow(index):
+    assert selected(index, "proxies/shared/policies/AssignMessage.Messages.GetSingle.Request.xml") == [
+        LIVE_GET_MESSAGE_TEST, GET_MESSAGE_TEST, UNKNOWN_PATHS_TEST
+    ]
+
+
+@pytest.mark.unittest
+def test_sandbox_change_selects_only_sandbox_tests_reaching_it(index):
+    assert selected(index, "sandbox/handlers/nhsapp_accounts.js") == [ACCOUNTS_TEST, UNKNOWN_PATHS_TEST]
+
+
+@pytest.mark.unittest
+def test_proxy_change_outside_a_flow_selects_every_test_in_its_tier(index):
+    assert selected(index, "proxies/sandbox/apiproxy/proxies/default.xml") == sorted(
+        path for path in TEST_PATHS if path.startswith("tests/sandbox/"))
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("changed", ["tests/lib/helper.py", "pyproject.toml", "Makefile"])
+def test_unmapped_file_runs_everything(index, changed):
+    assert selected(index, "proxies/shared/policies/AssignMessage.Messages.GetSingle.Request.xml", changed) is None
+
+
+@pytest.mark.unittest
+def test_documentation_change_selects_nothing(index):
+    assert selected(index, "README.md", "docs/proxies.md", "tests/docs/conf.py") == []
+
+
+@pytest.mark.unittest
+def test_changed_tests_and_conftest_select_themselves(index):
+    assert selected(index, ACCOUNTS_TEST, "tests/development/conftest.py") == [LIVE_GET_MESSAGE_TEST, ACCOUNTS_TEST]
+
+
+@pytest.mark.unittest
+def test_test_paths_come_from_literals_and_constants():
+    paths = impact.TestPaths().source_paths(
+        'requests.get(f"{url}{MESSAGES_ENDPOINT}/{message_id}")\nrequests.get(url + "/_ping")\n')
+
+    assert {"/v1/messages", "/v1/messages/x", "/_ping"} <= paths
+
+
+@pytest.mark.unittest
+def test_map_keeps_recorded_paths_and_rereads_changed_files(tmp_path, monkeypatch):
+    reads = []
+    monkeypatch.setattr("lib.impact.sha", lambda path: "sha-" + path)
+    test_paths = SimpleNamespace(paths=lambda path: reads.append(path) or ["/v1/messages"])
+    impact_map = ImpactMap(str(tmp_path / "impact.json"))
+
+    impact_map.update([GET_MESSAGE_TEST], test_paths)
+    impact_map.record({GET_MESSAGE_TEST: {"/v1/messages/x"}})
+    impact_map.save()
+    reloaded = ImpactMap(str(tmp_path / "impact.json"))
+    reloaded.update([GET_MESSAGE_TEST], test_paths)
+
+    assert reads == [GET_MESSAGE_TEST]
+    assert reloaded.paths(GET_MESSAGE_TEST) == {"/v1/messages", "/v1/messages/x"}
+
+
+@pytest.mark.unittest
+def test_recorder_records_the_api_paths_each_test_file_calls(monkeypatch):
+    monkeypatch.setattr("lib.traffic.PROXY_URLS", {"https://example.com/comms"})
+    recorder = ImpactRecorder(SimpleNamespace())
+    recorder.current = GET_MESSAGE_TEST
+
+    for url in ["https://example.com/comms/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM",
+                "https://api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/product"]:
+        recorder(requests.Request("GET", url).prepare(), None, None, 0, 0)
+
+    assert recorder.recorded == {GET_MESSAGE_TEST: {"/v1/messages/{messageId}"}}
@@ -0,0 +1,96 @@
+import pytest
+import requests
+from lib.load_generator import LoadGenerator, LoadResult, SANDBOX_MESSAGE_ID
+from lib.schema_validators import SchemaValidationError
+
+
+class FakeResponse():
+    def __init__(self, method, status_code=201):
+        self.request = requests.Request(method, "http://localhost").prepare()
+        self.status_code = status_code
+        self.content = b"{}"
+        self.headers = {"Content-Type": "application/vnd.api+json"}
+
+    def json(self):
+        return {}
+
+
+class FakeSession():
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = []
+
+    def request(self, method, url, headers=None, data=None, timeout=None):
+        self.requests.append((method, url))
+        if self.error is not None:
+            raise self.error
+        return FakeResponse(method)
+
+
+class FakeValidator():
+    def __init__(self, error=None):
+        self.error = error
+
+    def validate(self, *args):
+        if self.error is not None:
+            raise self.error
+
+
+def generator(session, error=None, **kwargs):
+    load_generator = LoadGenerator("http://localhost/", ["messages", "get-message"], 100, 0.05, **kwargs)
+    # each worker thread would otherwise open its own session
+    load_generator.session = lambda: session
+    if error is not None:
+        load_generator.validators = FakeValidator()
+        load_generator.contract = FakeValidator(error)
+    return load_generator
+
+
+@pytest.mark.unittest
+def test_execute_records_the_response_status():
+    session = FakeSession()
+    result = LoadResult()
+
+    generator(session).execute("get-message", 0, result)
+
+    assert session.requests == [("GET", f"http://localhost/v1/messages/{SANDBOX_MESSAGE_ID}")]
+    assert result.statuses == {201: 1}
+    assert result.scenarios == {"get-message": 1}
+    assert result.latency.total_count == 1
+
+
+@pytest.mark.unittest
+def test_execute_records_request_errors_by_type():
+    result = LoadResult()
+
+    generator(FakeSession(requests.ConnectionError())).execute("messages", 0, result)
+
+    assert result.statuses == {"ConnectionError": 1}
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("error, status", [
+    (SchemaValidationError("/data", "must be object"), "SchemaValidationError"),
+    (ValueError("Cannot compile schemas/Broken"), "ValueError"),
+    (KeyError("No schema named Broken"), "KeyError"),
+])
+def test_execute_records_responses_that_fail_or_cannot_be_validated(error, status):
+    result = LoadResult()
+
+    generator(FakeSession(), error).execute("messages", 0, result)
+
+    assert result.statuses == {status: 1}
+
+
+@pytest.mark.unittest
+def test_run_sends_every_scheduled_request():
+    session = FakeSession()
+
+    result = generator(session, local_sandbox=True).run()
+
+    assert result.latency.total_count == 5
+    assert result.scenarios == {"messages": 3, "get-message": 2}
+    assert set(session.requests) == {
+        ("POST", "http://localhost/api/v1/messages"),
+        ("GET", f"http://localhost/api/v1/messages/{SANDBOX_MESSAGE_ID}"),
+    }
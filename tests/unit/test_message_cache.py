@@ -0,0 +1,152 @@
+import pytest
+from lib.helper import Helper
+from lib.message_cache import MessageCache
+
+MESSAGE_URL = "https://example.com/v1/messages/2WL3qFTEFM0qMY8xjRbt1LIKCzM"
+
+
+class FakeResponse():
+    def __init__(self, message_status, status_code=200):
+        self.status_code = status_code
+        self.message_status = message_status
+
+    def json(self):
+        return {"data": {"attributes": {"messageStatus": self.message_status}}}
+
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return MessageCache(ttl=5, max_size=2, clock=clock)
+
+
+@pytest.mark.unittest
+def test_transient_message_expires_after_ttl(cache, clock):
+    resp = FakeResponse("sending")
+    cache.put(MESSAGE_URL, resp)
+
+    clock.now = 4.9
+    assert cache.get(MESSAGE_URL) is resp
+
+    clock.now = 5
+    assert cache.get(MESSAGE_URL) is None
+    assert cache.stats()["transient_entries"] == 0
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("message_status", ["delivered", "failed"])
+def test_terminal_message_never_expires(cache, clock, message_status):
+    resp = FakeResponse(message_status)
+    cache.put(MESSAGE_URL, resp)
+
+    clock.now = 10 ** 6
+    assert cache.get(MESSAGE_URL) is resp
+    assert cache.get(MESSAGE_URL, terminal_only=True) is resp
+
+
+@pytest.mark.unittest
+def test_terminal_only_skips_transient_messages(cache):
+    cache.put(MESSAGE_URL, FakeResponse("sending"))
+
+    assert cache.get(MESSAGE_URL, terminal_only=True) is None
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.unittest
+def test_terminal_message_replaces_transient_entry(cache):
+    cache.put(MESSAGE_URL, FakeResponse("sending"))
+    delivered = FakeResponse("delivered")
+    cache.put(MESSAGE_URL, delivered)
+
+    assert cache.get(MESSAGE_URL) is delivered
+    assert cache.stats()["transient_entries"] == 0
+    assert cache.stats()["terminal_entries"] == 1
+
+
+@pytest.mark.unittest
+def test_least_recently_used_transient_message_is_evicted(cache):
+    cache.put("a", FakeResponse("sending"))
+    cache.put("b", FakeResponse("sending"))
+    cache.get("a")
+    cache.put("c", FakeResponse("sending"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.unittest
+def test_stats_count_hits_and_misses(cache):
+    cache.put(MESSAGE_URL, FakeResponse("delivered"))
+    cache.get(MESSAGE_URL)
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+class FakeApi():
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.gets = 0
+        self.sleeps = 0
+
+    def conditional_get(self, url, headers, etag_cache=None):
+        self.gets += 1
+        return FakeResponse(self.statuses.pop(0))
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeApi([])
+    monkeypatch.setattr(Helper, "conditional_get", api.conditional_get)
+    monkeypatch.setattr("lib.helper.time.sleep", api.sleep)
+    return api
+
+
+@pytest.mark.unittest
+def test_poll_sleeps_between_polls_of_a_cached_non_terminal_message(cache, api):
+    api.statuses = ["sending", "sending", "delivered"]
+
+    Helper.poll_get_message("https://example.com", {}, "2WL3qFTEFM0qMY8xjRbt1LIKCzM", cache=cache)
+
+    assert api.gets == 3
+    assert api.sleeps == 2
+
+
+@pytest.mark.unittest
+def test_poll_serves_terminal_message_from_cache(cache, api):
+    cache.put(MESSAGE_URL, FakeResponse("delivered"))
+
+    Helper.poll_get_message("https://example.com", {}, "2WL3qFTEFM0qMY8xjRbt1LIKCzM", cache=cache)
+
+    assert api.gets == 0
+    assert api.sleeps == 0
+
+
+@pytest.mark.unittest
+def test_poll_raises_on_failed_message_without_sleeping(cache, api):
+    api.statuses = ["failed"]
+
+    with pytest.raises(ValueError):
+        Helper.poll_get_message("https://example.com", {}, "2WL3qFTEFM0qMY8xjRbt1LIKCzM", cache=cache)
+
+    assert api.sleeps == 0
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from lib.constants.nhsapp_accounts_paths import PAGE_PARAM_NAME
+from lib.paginator import NhsAppAccountsPaginator
+
+LAST_PAGE = 6
+SLOW_PAGE = 3
+
+
+class AccountsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), AccountsHandler)
+        self.slow_page_delay = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class AccountsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        page = int(parse_qs(urlparse(self.path).query)[PAGE_PARAM_NAME][0])
+        if page == SLOW_PAGE:
+            time.sleep(self.server.slow_page_delay)
+        body = json.dumps({
+            "data": {"attributes": {"accounts": [{"page": page, "account": i} for i in range(2)]}},
+            "links": {"last": f"{self.server.url}/channels/nhsapp/accounts?{PAGE_PARAM_NAME}={LAST_PAGE}"}
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.api+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = AccountsServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+EXPECTED = [{"page": page, "account": i} for page in range(1, LAST_PAGE + 1) for i in range(2)]
+
+
+class SessionRecordingPaginator(NhsAppAccountsPaginator):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+
+    def fetch_page(self, page):
+        with self.sessions_lock:
+            self.sessions.setdefault(threading.get_ident(), set()).add(id(self.session))
+        return super().fetch_page(page)
+
+
+@pytest.mark.unittest
+def test_iterates_every_page_in_order(server):
+    paginator = NhsAppAccountsPaginator(server.url, {}, "T00001", max_workers=2)
+
+    assert list(paginator) == EXPECTED
+    assert paginator.last_page == LAST_PAGE
+
+
+@pytest.mark.unittest
+def test_async_iterates_every_page_in_order(server):
+    async def collect():
+        return [account async for account in NhsAppAccountsPaginator(server.url, {}, "T00001", max_workers=2)]
+
+    assert asyncio.run(collect()) == EXPECTED
+
+
+@pytest.mark.unittest
+def test_each_thread_has_a_session_of_its_own(server):
+    paginator = SessionRecordingPaginator(server.url, {}, "T00001", max_workers=3)
+    list(paginator)
+
+    sessions = [session for thread_sessions in paginator.sessions.values() for session in thread_sessions]
+    assert len(paginator.sessions) > 1
+    assert all(len(thread_sessions) == 1 for thread_sessions in paginator.sessions.values())
+    assert len(set(sessions)) == len(sessions)
+
+
+@pytest.mark.unittest
+def test_stopping_async_iteration_early_does_not_block_the_event_loop(server):
+    server.slow_page_delay = 2
+
+    async def first_accounts():
+        accounts = NhsAppAccountsPaginator(server.url, {}, "T00001", max_workers=4).__aiter__()
+        # once page 2 is yielded pages 3 to 6 are in flight, and page 3 takes slow_page_delay seconds
+        received = [await accounts.__anext__() for _ in range(3)]
+        started = time.monotonic()
+        await accounts.aclose()
+        return received, time.monotonic() - started
+
+    received, closing = asyncio.run(first_accounts())
+
+    assert received == EXPECTED[:3]
+    assert closing < 1
+
+
+@pytest.mark.unittest
+def test_stopping_iteration_early_does_not_wait_for_pages_in_flight(server):
+    server.slow_page_delay = 2
+    accounts = iter(NhsAppAccountsPaginator(server.url, {}, "T00001", max_workers=4))
+    received = [next(accounts) for _ in range(3)]
+
+    started = time.monotonic()
+    accounts.close()
+
+    assert received == EXPECTED[:3]
+    assert time.monotonic() - started < 1
@@ -0,0 +1,50 @@
+import json
+import pytest
+from lib.payload_factory import PayloadFactory, REFERENCE_SLOT
+from lib.schema_validators import SchemaValidators
+
+
+@pytest.fixture(scope="module")
+def validators(tmp_path_factory):
+    return SchemaValidators(cache_dir=str(tmp_path_factory.mktemp("validators")))
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("environment", ["sandbox", "internal-dev"])
+def test_message_bodies_are_valid_create_message_requests(validators, environment):
+    bodies = [json.loads(body) for body in PayloadFactory(environment).message_bodies(3)]
+
+    for body in bodies:
+        validators.validate("requests/CreateMessage", body)
+    references = [body["data"]["attributes"]["messageReference"] for body in bodies]
+    assert len(set(references)) == 3
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("environment", ["sandbox", "internal-dev"])
+def test_message_batch_bodies_are_valid_create_message_batch_requests(validators, environment):
+    bodies = [json.loads(body) for body in PayloadFactory(environment).message_batch_bodies(2, messages=3)]
+
+    references = []
+    for body in bodies:
+        validators.validate("requests/CreateMessageBatch", body)
+        attributes = body["data"]["attributes"]
+        references.append(attributes["messageBatchReference"])
+        references.extend(message["messageReference"] for message in attributes["messages"])
+    assert len(references) == 8
+    assert len(set(references)) == 8
+
+
+@pytest.mark.unittest
+def test_references_are_unique_across_factories():
+    first, second = PayloadFactory(), PayloadFactory()
+
+    assert first.reference() != second.reference()
+
+
+@pytest.mark.unittest
+def test_template_needs_exactly_one_slot():
+    with pytest.raises(ValueError, match="found 2"):
+        PayloadFactory.compile({"a": REFERENCE_SLOT, "b": REFERENCE_SLOT}, REFERENCE_SLOT)
+    with pytest.raises(ValueError, match="found 0"):
+        PayloadFactory.compile({"a": "b"}, REFERENCE_SLOT)
@@ -0,0 +1,98 @@
+import pytest
+from lib.permutations import Permutations
+
+BODY = {
+    "data": {
+        "type": "MessageBatch",
+        "attributes": {
+            "messages": [
+                {"messageReference": "a", "recipient": {"nhsNumber": "9990548609"}},
+                {"messageReference": "b", "recipient": {"nhsNumber": "9990548610"}}
+            ],
+            "a/b": {"c~d": 1}
+        }
+    }
+}
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("pointer, tokens", [
+    ("", []),
+    ("/data", ["data"]),
+    ("/data/attributes/messages/0", ["data", "attributes", "messages", "0"]),
+    ("/a~1b/c~0d", ["a/b", "c~d"]),
+    ("/~01", ["~1"]),
+    ("/", [""]),
+])
+def test_parse_and_format_pointer(pointer, tokens):
+    assert Permutations.parse_pointer(pointer) == tokens
+    assert Permutations.format_pointer(tokens) == pointer
+
+
+@pytest.mark.unittest
+def test_format_pointer_accepts_list_indexes():
+    assert Permutations.format_pointer(["messages", 0]) == "/messages/0"
+
+
+@pytest.mark.unittest
+def test_parse_pointer_must_start_with_slash():
+    with pytest.raises(ValueError, match="Invalid JSON pointer"):
+        Permutations.parse_pointer("data")
+
+
+@pytest.mark.unittest
+def test_without_pointer_removes_only_that_node():
+    body = Permutations.new_dict_without_pointer(BODY, "/data/attributes/messages/0/recipient/nhsNumber")
+
+    assert body["data"]["attributes"]["messages"][0] == {"messageReference": "a", "recipient": {}}
+    assert body["data"]["attributes"]["messages"][1] == BODY["data"]["attributes"]["messages"][1]
+    assert BODY["data"]["attributes"]["messages"][0]["recipient"] == {"nhsNumber": "9990548609"}
+
+
+@pytest.mark.unittest
+def test_without_pointer_removes_list_item():
+    body = Permutations.new_dict_without_pointer(BODY, "/data/attributes/messages/0")
+
+    assert [m["messageReference"] for m in body["data"]["attributes"]["messages"]] == ["b"]
+    assert len(BODY["data"]["attributes"]["messages"]) == 2
+
+
+@pytest.mark.unittest
+def test_null_and_value_at_pointer():
+    nulled = Permutations.new_dict_with_null_pointer(BODY, "/data/type")
+    changed = Permutations.new_dict_with_value_at_pointer(BODY, "/data/attributes/messages/1/messageReference", 1)
+
+    assert nulled["data"]["type"] is None
+    assert changed["data"]["attributes"]["messages"][1]["messageReference"] == 1
+    assert BODY["data"]["type"] == "MessageBatch"
+    assert BODY["data"]["attributes"]["messages"][1]["messageReference"] == "b"
+
+
+@pytest.mark.unittest
+def test_escaped_tokens_name_keys_with_slash_and_tilde():
+    body = Permutations.new_dict_with_value_at_pointer(BODY, "/data/attributes/a~1b/c~0d", 2)
+
+    assert body["data"]["attributes"]["a/b"] == {"c~d": 2}
+
+
+@pytest.mark.unittest
+def test_only_containers_on_the_path_are_copied():
+    body = Permutations.new_dict_with_null_pointer(BODY, "/data/attributes/messages/0/messageReference")
+
+    assert body["data"] is not BODY["data"]
+    assert body["data"]["attributes"]["messages"] is not BODY["data"]["attributes"]["messages"]
+    assert body["data"]["attributes"]["messages"][1] is BODY["data"]["attributes"]["messages"][1]
+    assert body["data"]["attributes"]["a/b"] is BODY["data"]["attributes"]["a/b"]
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("pointer, error, message", [
+    ("", ValueError, "Cannot change the root"),
+    ("/data/missing", KeyError, "'missing' is not present"),
+    ("/data/attributes/messages/2", KeyError, "'2' is not an index"),
+    ("/data/attributes/messages/first", KeyError, "'first' is not an index"),
+    ("/data/type/0", ValueError, "Cannot follow a JSON pointer through str"),
+])
+def test_pointer_that_does_not_name_a_node_raises(pointer, error, message):
+    with pytest.raises(error, match=message):
+        Permutations.new_dict_with_null_pointer(BODY, pointer)
@@ -0,0 +1,93 @@
+import copy
+import json
+import pytest
+from lib.rate_limiting import RateLimiting
+
+PRODUCT_NAME = "communications-manager-internal-dev"
+
+
+class ProductsApi():
+    """Management API whose reads show a PUT only after stale_reads more reads"""
+    def __init__(self, stale_reads=0):
+        self.product = {"attributes": [{"name": "ratelimiting", "value": "{}"}]}
+        self.pending = None
+        self.stale_reads = stale_reads
+        self.puts = 0
+        self.reads = 0
+
+    def get_product_by_name(self, name):
+        self.reads += 1
+        if self.pending is not None:
+            if self.stale_reads == 0:
+                self.product, self.pending = self.pending, None
+            else:
+                self.stale_reads -= 1
+        return copy.deepcopy(self.product)
+
+    def put_product_by_name(self, name, product):
+        self.puts += 1
+        self.pending = copy.deepcopy(product)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("lib.rate_limiting.time.sleep", sleeps.append)
+    return sleeps
+
+
+def ratelimit(products_api):
+    return RateLimiting.attribute_values(products_api.get_product_by_name(PRODUCT_NAME))["ratelimiting"]
+
+
+@pytest.mark.unittest
+def test_update_waits_until_the_product_shows_the_change(sleeps):
+    products_api = ProductsApi(stale_reads=2)
+    rate_limiting = RateLimiting(products_api, None, PRODUCT_NAME)
+
+    rate_limiting.set_rate_limit(app_quota=4)
+
+    assert products_api.puts == 1
+    assert len(sleeps) == 2
+    assert json.loads(ratelimit(products_api))["app"]["quota"]["limit"] == 4
+
+
+@pytest.mark.unittest
+def test_unchanged_rate_limit_is_not_put(sleeps):
+    products_api = ProductsApi()
+    rate_limiting = RateLimiting(products_api, None, PRODUCT_NAME)
+    rate_limiting.set_default_rate_limit()
+
+    rate_limiting.set_default_rate_limit()
+
+    assert products_api.puts == 1
+
+
+@pytest.mark.unittest
+def test_update_that_never_shows_times_out(sleeps):
+    products_api = ProductsApi(stale_reads=1000)
+    rate_limiting = RateLimiting(products_api, None, PRODUCT_NAME, timeout=0)
+
+    with pytest.raises(Exception, match="Timed out after 0s waiting for product"):
+        rate_limiting.set_rate_limit(app_quota=4)
+
+
+@pytest.mark.unittest
+def test_poll_response_stops_at_the_first_match(sleeps):
+    responses = iter([200, 429, 200])
+
+    resp = RateLimiting(ProductsApi(), None, PRODUCT_NAME).poll_response(lambda: next(responses), lambda r: r == 429)
+
+    assert resp == 429
+    assert len(sleeps) == 1
+
+
+@pytest.mark.unittest
+def test_poll_response_gives_up_after_a_few_attempts(sleeps):
+    sent = []
+
+    resp = RateLimiting(ProductsApi(), None, PRODUCT_NAME, attempts=3).poll_response(
+        lambda: sent.append(1) or 200, lambda r: r == 429)
+
+    assert resp == 200
+    assert len(sent) == 3
@@ -0,0 +1,311 @@
+import glob
+import os
+import pytest
+import yaml
+from lib.schema_validators import (
+    SchemaCompiler, SchemaValidationError, SchemaValidators, is_date_time, load_source, source_hash
+)
+
+
+def write_schemas(tmp_path, files):
+    """Writes {path under specification: schema} and returns the schemas directory"""
+    specification_dir = tmp_path / "specification"
+    for path, schema in files.items():
+        target = specification_dir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(yaml.safe_dump(schema), encoding="utf-8")
+    schemas_dir = specification_dir / "schemas"
+    schemas_dir.mkdir(parents=True, exist_ok=True)
+    return str(schemas_dir)
+
+
+@pytest.fixture
+def compile_schemas(tmp_path):
+    def compile_schemas(files):
+        return SchemaValidators(write_schemas(tmp_path, files), str(tmp_path / "cache"))
+    return compile_schemas
+
+
+@pytest.fixture
+def validators(compile_schemas):
+    def validators(schema):
+        return compile_schemas({"schemas/Test.yaml": schema})
+    return validators
+
+
+def assert_invalid(validators, schema, value, pointer):
+    with pytest.raises(SchemaValidationError) as e:
+        validators.validate(schema, value)
+    assert e.value.pointer == pointer
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("schema_type, valid, invalid", [
+    ("string", "a", 1),
+    ("integer", 1, 1.5),
+    ("integer", 1, True),
+    ("number", 1.5, "1.5"),
+    ("number", 1, False),
+    ("boolean", False, 0),
+    ("object", {}, []),
+    ("array", [], {}),
+])
+def test_type(validators, schema_type, valid, invalid):
+    compiled = validators({"type": schema_type})
+
+    assert compiled.is_valid("Test", valid)
+    assert not compiled.is_valid("Test", invalid)
+
+
+@pytest.mark.unittest
+def test_nullable(validators):
+    compiled = validators({
+        "type": "object",
+        "properties": {
+            "nullable": {"type": "string", "nullable": True, "minLength": 2},
+            "required": {"type": "string"}
+        }
+    })
+
+    assert compiled.is_valid("Test", {"nullable": None})
+    assert compiled.is_valid("Test", {"nullable": "ab"})
+    assert_invalid(compiled, "Test", {"nullable": "a"}, "/nullable")
+    assert_invalid(compiled, "Test", {"nullable": 1}, "/nullable")
+    assert_invalid(compiled, "Test", {"required": None}, "/required")
+
+
+@pytest.mark.unittest
+def test_additional_properties_schema(validators):
+    compiled = validators({
+        "type": "object",
+        "properties": {"known": {"type": "integer"}},
+        "additionalProperties": {"type": "string", "maxLength": 3}
+    })
+
+    assert compiled.is_valid("Test", {"known": 1, "other": "abc"})
+    assert_invalid(compiled, "Test", {"other": "abcd"}, "/other")
+    assert_invalid(compiled, "Test", {"a/b": 1}, "/a~1b")
+    assert_invalid(compiled, "Test", {"known": "1"}, "/known")
+
+
+@pytest.mark.unittest
+def test_additional_properties_false(validators):
+    compiled = validators({
+        "type": "object",
+        "properties": {"known": {"type": "integer"}},
+        "additionalProperties": False
+    })
+
+    assert compiled.is_valid("Test", {"known": 1})
+    assert_invalid(compiled, "Test", {"known": 1, "other": 1}, "/other")
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("values, valid, invalid", [
+    (["sms", "email"], "sms", "letter"),
+    (["sms", "email"], "email", ["sms"]),
+    ([1, "one", None], None, True),
+    ([1, "one", None], 1, {}),
+    ([True, [1, 2]], [1, 2], 1),
+])
+def test_enum(validators, values, valid, invalid):
+    compiled = validators({"enum": values})
+
+    assert compiled.is_valid("Test", valid)
+    assert not compiled.is_valid("Test", invalid)
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("schema_format, valid, invalid", [
+    ("uuid", "b838b13c-f98c-4def-93f0-515d4e4f4ee1", "b838b13c-f98c-4def-93f0"),
+    ("date", "2024-02-29", "2023-02-29"),
+    ("date", "2024-02-29", "2024-2-29"),
+    ("date-time", "2023-11-17T14:27:51.413Z", "2023-11-17 14:27:51Z"),
+    ("date-time", "2023-11-17t14:27:51+01:00", "2023-13-17T14:27:51Z"),
+    ("date-time", "2023-11-17T14:27:51z", "2023-11-17T14:27:51"),
+    ("uri", "https://api.service.nhs.uk/comms/v1/messages", "not a uri"),
+])
+def test_format(validators, schema_format, valid, invalid):
+    compiled = validators({"type": "string", "format": schema_format})
+
+    assert compiled.is_valid("Test", valid)
+    assert not compiled.is_valid("Test", invalid)
+
+
+@pytest.mark.unittest
+def test_unknown_format_raises_value_error():
+    with pytest.raises(ValueError, match="unsupported format email"):
+        SchemaCompiler().schema({"type": "string", "format": "email"}, "data", [], "Test.yaml")
+
+
+@pytest.mark.unittest
+def test_date_time_accepts_lower_case_separator():
+    assert is_date_time("2023-11-17t14:27:51.413Z")
+
+
+@pytest.mark.unittest
+def test_string_number_and_array_keywords(validators):
+    compiled = validators({
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"type": "string", "minLength": 1, "maxLength": 3, "pattern": "^[a-z]+$"},
+            "count": {"type": "integer", "minimum": 1, "maximum": 10},
+            "tags": {"type": "array", "minItems": 1, "maxItems": 2, "uniqueItems": True,
+                     "items": {"type": "string"}}
+        }
+    })
+
+    assert compiled.is_valid("Test", {"name": "abc", "count": 10, "tags": ["a", "b"]})
+    assert_invalid(compiled, "Test", {}, "/name")
+    assert_invalid(compiled, "Test", {"name": ""}, "/name")
+    assert_invalid(compiled, "Test", {"name": "abcd"}, "/name")
+    assert_invalid(compiled, "Test", {"name": "ABC"}, "/name")
+    assert_invalid(compiled, "Test", {"name": "a", "count": 0}, "/count")
+    assert_invalid(compiled, "Test", {"name": "a", "count": 11}, "/count")
+    assert_invalid(compiled, "Test", {"name": "a", "tags": []}, "/tags")
+    assert_invalid(compiled, "Test", {"name": "a", "tags": ["a", "b", "c"]}, "/tags")
+    assert_invalid(compiled, "Test", {"name": "a", "tags": ["a", "a"]}, "/tags")
+    assert_invalid(compiled, "Test", {"name": "a", "tags": ["a", 1]}, "/tags/1")
+
+
+@pytest.mark.unittest
+def test_ref_chain(compile_schemas):
+    compiled = compile_schemas({
+        "schemas/requests/Request.yaml": {
+            "type": "object",
+            "properties": {"recipient": {"$ref": "../components/Recipient.yaml"}}
+        },
+        "schemas/components/Recipient.yaml": {
+            "type": "object",
+            "properties": {"nhsNumber": {"$ref": "../../snippets/NhsNumber.yaml"}}
+        },
+        "snippets/NhsNumber.yaml": {"type": "string", "pattern": "^\\d{10}$"},
+    })
+
+    assert compiled.is_valid("requests/Request", {"recipient": {"nhsNumber": "9990548609"}})
+    assert_invalid(compiled, "requests/Request", {"recipient": {"nhsNumber": "1"}}, "/recipient/nhsNumber")
+    assert compiled.is_valid("components/Recipient", {"nhsNumber": "9990548609"})
+    # files outside specification/schemas are compiled, but not named
+    with pytest.raises(KeyError):
+        compiled.validator("../snippets/NhsNumber")
+
+
+@pytest.mark.unittest
+def test_ref_cycle(compile_schemas):
+    compiled = compile_schemas({
+        "schemas/Node.yaml": {
+            "type": "object",
+            "required": ["name"],
+            "properties": {
+                "name": {"type": "string"},
+                "children": {"type": "array", "items": {"$ref": "Node.yaml"}}
+            }
+        },
+        "schemas/Tree.yaml": {"$ref": "Node.yaml"},
+    })
+
+    tree = {"name": "root", "children": [{"name": "a", "children": [{"name": "b"}]}]}
+    assert compiled.is_valid("Node", tree)
+    assert compiled.is_valid("Tree", tree)
+    assert_invalid(compiled, "Tree", {"name": "root", "children": [{"children": []}]}, "/children/0/name")
+    assert_invalid(compiled, "Node", {"name": "root", "children": [{"name": "a", "children": [{"name": 1}]}]},
+                   "/children/0/children/0/name")
+
+
+@pytest.mark.unittest
+def test_unsupported_keyword_raises_value_error():
+    with pytest.raises(ValueError, match="unsupported keywords oneOf"):
+        SchemaCompiler().schema({"oneOf": [{"type": "string"}]}, "data", [], "Test.yaml")
+
+
+@pytest.mark.unittest
+def test_schema_that_cannot_compile_fails_validation_against_it_and_schemas_that_ref_it(compile_schemas):
+    compiled = compile_schemas({
+        "schemas/Unsupported.yaml": {"type": "object", "properties": {"id": {"anyOf": [{"type": "string"}]}}},
+        "schemas/Referrer.yaml": {"type": "object", "properties": {"child": {"$ref": "Unsupported.yaml"}}},
+        "schemas/MissingRef.yaml": {"$ref": "Missing.yaml"},
+        "schemas/Valid.yaml": {"type": "string"},
+    })
+
+    with pytest.raises(ValueError, match="Cannot compile schemas/Unsupported: unsupported keywords anyOf"):
+        compiled.validate("Unsupported", {})
+    with pytest.raises(ValueError, match="Cannot compile schemas/Unsupported"):
+        compiled.validate("Referrer", {})
+    with pytest.raises(ValueError, match="Missing.yaml is not a file in the specification"):
+        compiled.validate("MissingRef", {})
+    assert compiled.is_valid("Valid", "a")
+
+
+@pytest.mark.unittest
+def test_annotations_and_extensions_are_ignored(validators):
+    compiled = validators({"type": "string", "description": "a", "example": "b", "x-internal": True})
+
+    assert compiled.is_valid("Test", "a")
+
+
+@pytest.mark.unittest
+def test_unknown_schema_name_raises_key_error(validators):
+    with pytest.raises(KeyError, match="No schema named Other"):
+        validators({"type": "string"}).validator("Other")
+
+
+@pytest.mark.unittest
+def test_cached_source_is_reused_until_a_schema_changes(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    schemas_dir = write_schemas(tmp_path, {"schemas/Test.yaml": {"type": "string"}})
+
+    path, source = load_source(schemas_dir, cache_dir)
+    assert os.path.basename(path) == source_hash(schemas_dir) + ".py"
+
+    # a second load reads the cached file rather than compiling again
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("# cached\n")
+    assert load_source(schemas_dir, cache_dir) == (path, source + "# cached\n")
+
+    write_schemas(tmp_path, {"schemas/Test.yaml": {"type": "integer"}})
+    new_path, new_source = load_source(schemas_dir, cache_dir)
+
+    assert new_path != path
+    assert "# cached" not in new_source
+    assert glob.glob(os.path.join(cache_dir, "*.py")) == [new_path]
+    assert SchemaValidators(schemas_dir, cache_dir).is_valid("Test", 1)
+
+
+@pytest.mark.unittest
+def test_stale_source_already_removed_is_ignored(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    schemas_dir = write_schemas(tmp_path, {"schemas/Test.yaml": {"type": "string"}})
+    load_source(schemas_dir, cache_dir)
+    write_schemas(tmp_path, {"schemas/Test.yaml": {"type": "integer"}})
+
+    # another worker removes the stale file between the glob and the remove
+    glob_files = glob.glob
+
+    def stale_glob(pattern, **kwargs):
+        files = glob_files(pattern, **kwargs)
+        return files + [os.path.join(cache_dir, "removed.py")] if pattern.startswith(cache_dir) else files
+
+    monkeypatch.setattr("lib.schema_validators.glob.glob", stale_glob)
+    new_path, _ = load_source(schemas_dir, cache_dir)
+
+    assert glob_files(os.path.join(cache_dir, "*.py")) == [new_path]
+
+
+@pytest.mark.unittest
+def test_hash_covers_files_outside_schemas(tmp_path):
+    schemas_dir = write_schemas(tmp_path, {"snippets/Snippet.yaml": {"type": "string"}})
+    before = source_hash(schemas_dir)
+
+    write_schemas(tmp_path, {"snippets/Snippet.yaml": {"type": "integer"}})
+
+    assert source_hash(schemas_dir) != before
+
+
+@pytest.mark.unittest
+def test_specification_schemas_compile():
+    source = SchemaCompiler().compile()
+
+    compile(source, "validators.py", "exec")
+    assert "unsupported format" not in source
+    assert "def validate_schemas_requests_CreateMessage(" in source
@@ -0,0 +1,98 @@
+import os
+import pytest
+import requests
+from types import SimpleNamespace
+from lib.shared_resource import SharedResource, SharedResources
+
+torn_down = []
+
+
+def teardown(*args):
+    torn_down.append(args)
+
+
+def failing_teardown(*args):
+    raise ValueError("teardown failed")
+
+
+@pytest.fixture(autouse=True)
+def clear_torn_down():
+    torn_down.clear()
+
+
+@pytest.fixture
+def controller(tmp_path):
+    return SharedResources(SimpleNamespace(), str(tmp_path / "shared"))
+
+
+def worker(controller):
+    node = SimpleNamespace(workerinput={})
+    controller.pytest_configure_node(node)
+    return SharedResources(SimpleNamespace(workerinput=node.workerinput))
+
+
+@pytest.mark.unittest
+def test_setup_runs_once_for_every_worker(controller):
+    setups = []
+
+    def setup():
+        setups.append(1)
+        return {"apiProducts": ["communications-manager-pr-1"]}
+
+    values = [worker(controller).resource("product").acquire(setup, teardown, "app") for _ in range(3)]
+
+    assert len(setups) == 1
+    assert values == [{"apiProducts": ["communications-manager-pr-1"]}] * 3
+
+
+@pytest.mark.unittest
+def test_workers_finishing_do_not_tear_down(controller):
+    first, second = worker(controller), worker(controller)
+    first.resource("product").acquire(lambda: None, teardown, "app")
+    first.pytest_sessionfinish(None)
+
+    second.resource("product").acquire(lambda: None, teardown, "app")
+    second.pytest_sessionfinish(None)
+
+    assert torn_down == []
+
+
+@pytest.mark.unittest
+def test_controller_tears_down_each_resource_once_and_removes_directory(controller):
+    worker(controller).resource("product-a").acquire(lambda: None, teardown, "a", 1)
+    worker(controller).resource("product-b").acquire(lambda: None, teardown, "b", 2)
+
+    controller.pytest_sessionfinish(None)
+
+    assert sorted(torn_down) == [("a", 1), ("b", 2)]
+    assert not os.path.exists(controller.directory)
+
+
+@pytest.mark.unittest
+def test_teardown_failure_is_reported_and_others_still_torn_down(controller):
+    worker(controller).resource("product-a").acquire(lambda: None, failing_teardown)
+    worker(controller).resource("product-b").acquire(lambda: None, teardown, "b")
+
+    controller.pytest_sessionfinish(None)
+
+    assert torn_down == [("b",)]
+    assert controller.errors == ["product-a: ValueError('teardown failed')"]
+
+
+@pytest.mark.unittest
+def test_value_must_be_plain_data(controller):
+    shared = worker(controller).resource("product")
+
+    with pytest.raises(TypeError):
+        shared.acquire(requests.Response, teardown)
+
+    assert shared.acquire(lambda: "value", teardown) == "value"
+
+
+@pytest.mark.unittest
+def test_without_xdist_controller_is_only_holder(controller):
+    controller.resource("product").acquire(lambda: None, teardown, "app")
+
+    controller.pytest_sessionfinish(None)
+
+    assert torn_down == [("app",)]
@@ -0,0 +1,106 @@
+import os
+import pytest
+import requests
+from types import SimpleNamespace
+from lib.traffic import TrafficRecording, api_path, load_traffic
+
+
+def config(dist="no", **kwargs):
+    return SimpleNamespace(getoption=lambda name, default=None: dist, **kwargs)
+
+
+def record(recording, ts, path):
+    request = requests.Request("GET", f"https://example.com/comms{path}").prepare()
+    response = requests.Response()
+    response.status_code = 200
+    recording.recorder(request, response, None, ts, 0.1)
+
+
+def worker(controller, workerid):
+    node = SimpleNamespace(workerinput={"workerid": workerid})
+    controller.pytest_configure_node(node)
+    return TrafficRecording(config("load", workerinput=node.workerinput), controller.path)
+
+
+@pytest.fixture(autouse=True)
+def proxy_url(monkeypatch):
+    monkeypatch.setattr("lib.traffic.PROXY_URLS", {"https://example.com/comms"})
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "traffic.jsonl")
+
+
+@pytest.mark.unittest
+def test_without_xdist_records_to_the_file(path):
+    recording = TrafficRecording(config(), path)
+    record(recording, 1.0, "/v1/messages")
+    recording.pytest_sessionfinish(None)
+    recording.pytest_unconfigure(None)
+
+    assert [r["p"] for r in load_traffic(path)] == ["/v1/messages"]
+
+
+@pytest.mark.unittest
+def test_workers_record_to_files_of_their_own_merged_by_the_controller(path):
+    controller = TrafficRecording(config("load"), path)
+    first, second = worker(controller, "gw0"), worker(controller, "gw1")
+
+    assert controller.recorder is None
+    assert first.recorder.path == f"{path}.gw0"
+    assert second.recorder.path == f"{path}.gw1"
+
+    record(first, 1.0, "/v1/messages/1")
+    record(second, 2.0, "/v1/messages/2")
+    record(first, 3.0, "/v1/messages/3")
+    for recording in (first, second):
+        recording.pytest_sessionfinish(None)
+        recording.pytest_unconfigure(None)
+
+    assert not os.path.exists(path)
+
+    controller.pytest_sessionfinish(None)
+
+    assert [r["p"] for r in load_traffic(path)] == ["/v1/messages/1", "/v1/messages/2", "/v1/messages/3"]
+    assert not os.path.exists(f"{path}.gw0")
+    assert not os.path.exists(f"{path}.gw1")
+
+
+@pytest.mark.unittest
+def test_controller_merges_what_a_crashed_worker_recorded(path):
+    controller = TrafficRecording(config("load"), path)
+    crashed, finished = worker(controller, "gw0"), worker(controller, "gw1")
+    record(crashed, 1.0, "/v1/messages/1")
+    crashed.recorder.stop()
+    finished.pytest_unconfigure(None)
+
+    controller.pytest_sessionfinish(None)
+
+    assert [r["p"] for r in load_traffic(path)] == ["/v1/messages/1"]
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("url, path", [
+    ("https://example.com/comms/v1/messages", "/v1/messages"),
+    ("https://EXAMPLE.com/comms/channels/nhsapp/accounts?page=2", "/channels/nhsapp/accounts?page=2"),
+    ("https://example.com/comms/_ping", "/_ping"),
+    ("http://example.com/comms/v1/messages", None),
+    ("https://example.com/other/v1/messages", None),
+    ("https://example.com/comms-pr-1/v1/messages", None),
+    ("https://api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/product", None),
+])
+def test_only_requests_to_the_proxy_are_api_calls(url, path):
+    assert api_path(url) == path
+
+
+@pytest.mark.unittest
+def test_management_api_requests_are_not_recorded(path):
+    recording = TrafficRecording(config(), path)
+    record(recording, 1.0, "/v1/messages")
+    request = requests.Request("PUT", "https://api.enterprise.apigee.com/v1/organizations/nhsd-nonprod/apiproducts/p",
+                               json={"attributes": []}).prepare()
+    recording.recorder(request, None, ConnectionError(), 2.0, 0.1)
+    recording.pytest_unconfigure(None)
+
+    assert [r["p"] for r in load_traffic(path)] == ["/v1/messages"]
@@ -0,0 +1,66 @@
+import json
+import pytest
+import requests
+from lib.validation_multiplexer import ValidationMultiplexer
+
+URL = "https://example.com/comms/v1/message-batches"
+
+
+class FakeApi():
+    def __init__(self):
+        self.bodies = []
+
+    def post(self, url, headers, **kwargs):
+        body = kwargs["json"]
+        self.bodies.append(body)
+        resp = requests.Response()
+        resp.status_code = 400
+        resp._content = json.dumps({"errors": [
+            {"source": {"pointer": f"/data/attributes/messages/{i}/recipient/nhsNumber"}, "attempt": len(self.bodies)}
+            for i in range(len(body["data"]["attributes"]["messages"]))
+        ]}).encode("utf-8")
+        return resp
+
+
+@pytest.fixture
+def api(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr("lib.validation_multiplexer.requests.post", api.post)
+    return api
+
+
+@pytest.fixture
+def multiplexer():
+    return ValidationMultiplexer("sandbox").add("/recipient/nhsNumber", ["1", "2", "3"])
+
+
+@pytest.mark.unittest
+def test_cases_are_sent_in_one_request_per_correlation_id(api, multiplexer):
+    for value in ["1", "2", "3"]:
+        multiplexer.result(URL, {"X-Correlation-Id": "a"}, "/recipient/nhsNumber", value)
+        multiplexer.result(URL, {"X-Correlation-Id": "b"}, "/recipient/nhsNumber", value)
+
+    assert len(api.bodies) == 2
+    assert len(api.bodies[0]["data"]["attributes"]["messages"]) == 3
+
+
+@pytest.mark.unittest
+def test_errors_are_mapped_back_to_their_case(api, multiplexer):
+    result = multiplexer.result(URL, {}, "/recipient/nhsNumber", "2")
+
+    assert result.pointer == "/data/attributes/messages/1/recipient/nhsNumber"
+    assert [error["source"]["pointer"] for error in result.errors] == [result.pointer]
+    assert api.bodies[0]["data"]["attributes"]["messages"][1]["recipient"]["nhsNumber"] == "2"
+
+
+@pytest.mark.unittest
+def test_rerun_of_a_case_gets_a_new_response(api, multiplexer):
+    first = multiplexer.result(URL, {}, "/recipient/nhsNumber", "1")
+    rerun = multiplexer.result(URL, {}, "/recipient/nhsNumber", "1")
+
+    assert len(api.bodies) == 2
+    assert first.errors[0]["attempt"] == 1
+    assert rerun.errors[0]["attempt"] == 2
+    # the cases still to run are served from the latest request
+    assert multiplexer.result(URL, {}, "/recipient/nhsNumber", "2").errors[0]["attempt"] == 2
+    assert len(api.bodies) == 2